@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Execução de comandos externos: argv sem shell, pool limitado, timeout e contadores"""
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import tracer
+
+# Processos simultâneos no máximo, e tempo (s) até um comando ser considerado travado
+COMMAND_WORKERS = 4
+COMMAND_TIMEOUT = 15
+
+
+class CommandResult:
+    """Resultado de um comando: código de saída, saídas capturadas e duração
+
+    `returncode` fica None se o processo não pôde ser iniciado ou estourou
+    o timeout; `error` descreve o motivo.
+    """
+
+    def __init__(self, argv, returncode=None, stdout="", stderr="", seconds=0.0, error=None):
+        self.argv = argv
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.returncode == 0
+
+    def describe_error(self):
+        """Motivo da falha em uma linha, para as mensagens de erro"""
+        if self.error:
+            return self.error
+        return self.stderr.strip() or f"código {self.returncode}"
+
+
+class CommandRunner:
+    """Executa listas argv diretamente (sem /bin/sh), com timeout por comando
+
+    `run_many` distribui comandos independentes em até `max_workers`
+    processos simultâneos e devolve os resultados na ordem pedida. Cada
+    comando vira um span do tracer; `spawns` e `spawn_seconds` acumulam
+    quantos processos foram criados e quanto tempo levaram.
+    """
+
+    def __init__(self, max_workers=COMMAND_WORKERS, timeout=COMMAND_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.spawns = 0
+        self.spawn_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, argv, timeout=None):
+        """Executa um comando e espera o fim (ou o timeout)"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        with tracer.span(" ".join(argv[:2]), "command", command=" ".join(argv)) as span:
+            try:
+                completed = subprocess.run(argv, capture_output=True, text=True, timeout=timeout)
+                result = CommandResult(argv, completed.returncode, completed.stdout, completed.stderr)
+            except FileNotFoundError:
+                result = CommandResult(argv, error=f"{argv[0]} não encontrado")
+            except subprocess.TimeoutExpired:
+                result = CommandResult(argv, error=f"{argv[0]} não respondeu em {timeout} s")
+            result.seconds = time.perf_counter() - start
+            span["result"] = "ok" if result.ok else result.describe_error()
+
+        with self._lock:
+            self.spawns += 1
+            self.spawn_seconds += result.seconds
+        return result
+
+    def run_many(self, commands, timeout=None):
+        """Executa comandos independentes em paralelo; resultados na mesma ordem"""
+        commands = list(commands)
+        if len(commands) <= 1:
+            return [self.run(argv, timeout) for argv in commands]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(commands))) as pool:
+            return list(pool.map(lambda argv: self.run(argv, timeout), commands))
+
+    def reset_counters(self):
+        with self._lock:
+            self.spawns = 0
+            self.spawn_seconds = 0.0
+
+
+# Instância usada por todo o aplicativo
+runner = CommandRunner()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""Daemon da sessão: estado das extensões e do dconf mantido em memória, controlado via D-Bus"""
+import threading
+
+from gi.repository import Gio, GLib
+
+from index import (
+    PROFILES, SETTINGS_PATHS, apply_scheduler, create_backup, current_status, dconf_cache, extension_state,
+    profile_store, restore_backup, save_trace, snapshot_store, watch_live_state
+)
+
+# ===========================
+# CONSTANTES D-BUS
+# ===========================
+DAEMON_BUS_NAME = "io.github.druxpp.GnomeCustomizer"
+DAEMON_OBJECT_PATH = "/io/github/druxpp/GnomeCustomizer"
+DAEMON_INTERFACE = "io.github.druxpp.GnomeCustomizer"
+DAEMON_ERROR_UNKNOWN_PROFILE = f"{DAEMON_INTERFACE}.Error.UnknownProfile"
+DAEMON_ERROR_UNKNOWN_SNAPSHOT = f"{DAEMON_INTERFACE}.Error.UnknownSnapshot"
+DAEMON_ERROR_FAILED = f"{DAEMON_INTERFACE}.Error.Failed"
+DAEMON_ERROR_CANCELLED = f"{DAEMON_INTERFACE}.Error.Cancelled"
+
+# Timeout das chamadas rápidas (ms); ApplyProfile e Restore duram a troca inteira e não têm limite
+DBUS_CALL_TIMEOUT = 5000
+
+INTROSPECTION_XML = f"""
+<node>
+  <interface name="{DAEMON_INTERFACE}">
+    <method name="ApplyProfile">
+      <arg type="s" direction="in" name="profile"/>
+      <arg type="b" direction="out" name="success"/>
+    </method>
+    <method name="Cancel"/>
+    <method name="ListProfiles">
+      <arg type="a(ssas)" direction="out" name="profiles"/>
+    </method>
+    <method name="Status">
+      <arg type="a{{sv}}" direction="out" name="status"/>
+    </method>
+    <method name="Snapshot">
+      <arg type="s" direction="in" name="label"/>
+      <arg type="s" direction="out" name="id"/>
+    </method>
+    <method name="Restore">
+      <arg type="s" direction="in" name="id"/>
+      <arg type="b" direction="out" name="success"/>
+    </method>
+    <signal name="Progress">
+      <arg type="s" name="profile"/>
+      <arg type="s" name="message"/>
+      <arg type="d" name="fraction"/>
+      <arg type="d" name="eta"/>
+    </signal>
+  </interface>
+</node>
+"""
+
+
+def status_to_variant(status):
+    """Converte o resultado de current_status para a{sv}"""
+    entries = {
+        "profiles": GLib.Variant("as", status["profiles"]),
+        "snapshot": GLib.Variant("s", status["snapshot"] or ""),
+    }
+    # Sem "extensions": o GNOME Shell não respondeu
+    if status["extensions"] is not None:
+        entries["extensions"] = GLib.Variant("a{sb}", status["extensions"])
+    if status["interrupted"] is not None:
+        entries["interrupted"] = GLib.Variant("(suu)", status["interrupted"])
+    return GLib.Variant("(a{sv})", (entries,))
+
+
+def variant_to_status(variant):
+    status = variant.unpack()[0]
+    return {
+        "extensions": status.get("extensions"),
+        "profiles": status["profiles"],
+        "snapshot": status["snapshot"] or None,
+        "interrupted": status.get("interrupted"),
+    }
+
+
+# ===========================
+# SERVIÇO
+# ===========================
+class CustomizerDaemon:
+    """Objeto exportado no barramento de sessão
+
+    O snapshot das extensões acompanha o sinal ExtensionStateChanged e as
+    subárvores dconf ficam em cache até o sinal Notify do dconf; assim
+    cada troca começa com o estado já conhecido. Trocas e backups passam
+    pelo apply_scheduler, fora do main loop: um ApplyProfile novo substitui
+    o que ainda espera e cancela o que está rodando.
+    """
+
+    def __init__(self):
+        self.connection = None
+
+    def warm_up(self):
+        """Carrega o estado das extensões, as subárvores dconf (as dos backups também) e os perfis"""
+        extension_state.refresh()
+        dconf_cache.read_many(SETTINGS_PATHS.values())
+        for profile_id in PROFILES:
+            profile_store.load_dconf(profile_id)
+
+    def on_method_call(self, connection, sender, path, interface, method, params, invocation):
+        if method == "ApplyProfile":
+            profile_id = params.unpack()[0]
+            if profile_id not in PROFILES:
+                invocation.return_dbus_error(DAEMON_ERROR_UNKNOWN_PROFILE, f"Perfil desconhecido: {profile_id}")
+                return
+            self.apply(profile_id, invocation)
+        elif method == "Cancel":
+            apply_scheduler.cancel()
+            invocation.return_value(None)
+        elif method == "ListProfiles":
+            profiles = [(profile_id, profile["name"], list(profile["extensions"]))
+                        for profile_id, profile in PROFILES.items()]
+            invocation.return_value(GLib.Variant("(a(ssas))", (profiles,)))
+        elif method == "Status":
+            invocation.return_value(status_to_variant(current_status()))
+        elif method == "Snapshot":
+            label = params.unpack()[0] or "manual"
+            future = apply_scheduler.call(create_backup, label)
+            future.add_done_callback(lambda future: self.on_snapshot_done(future, invocation))
+        elif method == "Restore":
+            # Identificador vazio: o backup mais recente
+            snapshot_id = params.unpack()[0] or None
+            if snapshot_id is not None and all(entry["id"] != snapshot_id for entry in snapshot_store.list()):
+                invocation.return_dbus_error(DAEMON_ERROR_UNKNOWN_SNAPSHOT, f"Backup não encontrado: {snapshot_id}")
+                return
+            future = apply_scheduler.call(restore_backup, snapshot_id)
+            future.add_done_callback(lambda future: self.on_restore_done(future, invocation))
+        else:
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.UnknownMethod", f"Método desconhecido: {method}"
+            )
+
+    def apply(self, profile_id, invocation):
+        """Enfileira a troca; a resposta sai quando ela termina (ou é substituída)"""
+        def progress_callback(message, fraction, eta):
+            self.connection.emit_signal(
+                None, DAEMON_OBJECT_PATH, DAEMON_INTERFACE, "Progress",
+                GLib.Variant("(ssdd)", (profile_id, message, fraction, eta))
+            )
+
+        def done_callback(request):
+            save_trace()
+            if request.cancelled() and not request.result:
+                invocation.return_dbus_error(DAEMON_ERROR_CANCELLED, f"Troca para {profile_id} cancelada")
+            else:
+                invocation.return_value(GLib.Variant("(b)", (request.result,)))
+
+        apply_scheduler.submit(profile_id, progress_callback, done_callback)
+
+    def on_snapshot_done(self, future, invocation):
+        snapshot_id = future.result() if future.exception() is None else None
+        if snapshot_id is None:
+            invocation.return_dbus_error(DAEMON_ERROR_FAILED, "Não foi possível criar o backup")
+        else:
+            invocation.return_value(GLib.Variant("(s)", (snapshot_id,)))
+
+    def on_restore_done(self, future, invocation):
+        success = future.result() if future.exception() is None else False
+        invocation.return_value(GLib.Variant("(b)", (success,)))
+
+
+def run_daemon():
+    """Registra o serviço no barramento de sessão e roda até perder o nome"""
+    service = CustomizerDaemon()
+    node_info = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION_XML)
+    loop = GLib.MainLoop()
+    status = [0]
+
+    # Sinais do Shell e do dconf mantêm os caches em dia
+    watch_live_state()
+
+    def on_bus_acquired(connection, name):
+        service.connection = connection
+        connection.register_object(DAEMON_OBJECT_PATH, node_info.interfaces[0], service.on_method_call, None, None)
+
+    def on_name_acquired(connection, name):
+        threading.Thread(target=service.warm_up, daemon=True).start()
+
+    def on_name_lost(connection, name):
+        print(f"Não foi possível obter o nome {name} no barramento (outro daemon rodando?)")
+        status[0] = 1
+        loop.quit()
+
+    Gio.bus_own_name(
+        Gio.BusType.SESSION, DAEMON_BUS_NAME, Gio.BusNameOwnerFlags.NONE,
+        on_bus_acquired, on_name_acquired, on_name_lost
+    )
+    loop.run()
+    return status[0]
+
+
+# ===========================
+# CLIENTE
+# ===========================
+class DaemonClient:
+    """Acesso ao daemon da sessão para a interface e a linha de comando"""
+
+    def __init__(self, connection=None):
+        self._connection = connection
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        return self._connection
+
+    def _call(self, method, parameters=None, reply_type=None, timeout=DBUS_CALL_TIMEOUT):
+        return self._get_connection().call_sync(
+            DAEMON_BUS_NAME, DAEMON_OBJECT_PATH, DAEMON_INTERFACE, method, parameters,
+            GLib.VariantType(reply_type) if reply_type else None,
+            Gio.DBusCallFlags.NO_AUTO_START, timeout, None
+        )
+
+    def available(self):
+        """Verifica se o daemon está rodando (não o inicia)"""
+        try:
+            reply = self._get_connection().call_sync(
+                "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                "NameHasOwner", GLib.Variant("(s)", (DAEMON_BUS_NAME,)), GLib.VariantType("(b)"),
+                Gio.DBusCallFlags.NONE, DBUS_CALL_TIMEOUT, None
+            )
+        except GLib.Error:
+            return False
+        return reply.unpack()[0]
+
+    def list_profiles(self):
+        """[(identificador, nome, extensões)], ou None em caso de erro"""
+        try:
+            return self._call("ListProfiles", reply_type="(a(ssas))").unpack()[0]
+        except GLib.Error as e:
+            print(f"Erro ao consultar o daemon: {e.message}")
+            return None
+
+    def status(self):
+        """Mesmo formato de current_status, ou None em caso de erro"""
+        try:
+            return variant_to_status(self._call("Status", reply_type="(a{sv})"))
+        except GLib.Error as e:
+            print(f"Erro ao consultar o daemon: {e.message}")
+            return None
+
+    def cancel(self):
+        """Cancela a troca em andamento no daemon (e a que espera na fila)"""
+        try:
+            self._call("Cancel")
+            return True
+        except GLib.Error as e:
+            print(f"Erro ao cancelar a troca no daemon: {e.message}")
+            return False
+
+    def snapshot(self, label):
+        try:
+            return self._call("Snapshot", GLib.Variant("(s)", (label,)), "(s)").unpack()[0]
+        except GLib.Error as e:
+            print(f"Erro ao criar backup pelo daemon: {e.message}")
+            return None
+
+    def restore(self, snapshot_id=None):
+        """Restaura pelo daemon o backup (o mais recente se não informado), na fila das trocas"""
+        try:
+            return self._call("Restore", GLib.Variant("(s)", (snapshot_id or "",)), "(b)", GLib.MAXINT).unpack()[0]
+        except GLib.Error as e:
+            print(f"Erro ao restaurar backup pelo daemon: {e.message}")
+            return False
+
+    def apply_profile(self, profile_id, progress_callback=None):
+        """Pede a troca ao daemon e espera o fim, repassando o progresso
+
+        `progress_callback(mensagem, fração, segundos restantes)` é chamada
+        na thread que chamou este método. Retorna None se a troca for
+        cancelada ou substituída por um pedido mais recente; Ctrl+C durante
+        a espera cancela a troca no daemon.
+        """
+        connection = self._get_connection()
+        result = {}
+
+        # Contexto próprio: funciona em qualquer thread, com ou sem main loop rodando
+        context = GLib.MainContext.new()
+        context.push_thread_default()
+
+        def on_progress(connection, sender, path, interface, signal, parameters):
+            profile, message, fraction, eta = parameters.unpack()
+            if profile == profile_id and progress_callback:
+                progress_callback(message, fraction, eta)
+
+        def on_done(connection, task):
+            try:
+                result["success"] = connection.call_finish(task).unpack()[0]
+            except GLib.Error as e:
+                if Gio.DBusError.get_remote_error(e) == DAEMON_ERROR_CANCELLED:
+                    result["success"] = None
+                else:
+                    print(f"Erro ao aplicar perfil pelo daemon: {e.message}")
+                    result["success"] = False
+
+        subscription = connection.signal_subscribe(
+            DAEMON_BUS_NAME, DAEMON_INTERFACE, "Progress", DAEMON_OBJECT_PATH, None,
+            Gio.DBusSignalFlags.NONE, on_progress
+        )
+        try:
+            connection.call(
+                DAEMON_BUS_NAME, DAEMON_OBJECT_PATH, DAEMON_INTERFACE, "ApplyProfile",
+                GLib.Variant("(s)", (profile_id,)), GLib.VariantType("(b)"),
+                Gio.DBusCallFlags.NO_AUTO_START, GLib.MAXINT, None, on_done
+            )
+            while "success" not in result:
+                try:
+                    context.iteration(True)
+                except KeyboardInterrupt:
+                    print("Cancelando a troca...")
+                    self.cancel()
+        finally:
+            connection.signal_unsubscribe(subscription)
+            context.pop_thread_default()
+
+        return result["success"]
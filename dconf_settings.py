@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Leitura, comparação e escrita de configurações dconf (escrita via D-Bus ca.desrt.dconf.Writer)"""
+import os
+import threading
+
+from gi.repository import Gio, GLib
+
+from commands import runner
+from files import atomic_write
+
+# ===========================
+# CONSTANTES D-BUS
+# ===========================
+DCONF_BUS_NAME = "ca.desrt.dconf"
+DCONF_WRITER_PATH = "/ca/desrt/dconf/Writer/user"
+DCONF_WRITER_INTERFACE = "ca.desrt.dconf.Writer"
+
+# Timeout das chamadas D-Bus (ms)
+DBUS_CALL_TIMEOUT = 5000
+
+# Configuração do dconf do sistema (bancos em db/, perfis em profile/)
+SYSTEM_DCONF_DIR = "/etc/dconf"
+
+
+class DconfParseError(ValueError):
+    """Erro de sintaxe no texto keyfile de uma configuração"""
+
+
+def parse_keyfile(text, base_path):
+    """Converte texto keyfile (formato do `dconf dump`/`dconf load`) em valores tipados
+
+    Retorna um dicionário {chave_absoluta: GLib.Variant}. Assim como o
+    `dconf load`, os valores são interpretados como texto GVariant sem tipo
+    definido e qualquer erro invalida o bloco inteiro.
+    """
+    if not base_path.endswith("/"):
+        base_path += "/"
+
+    values = {}
+    section = None
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if line.startswith("[") and line.endswith("]"):
+            relative = line[1:-1].strip("/")
+            section = base_path + (relative + "/" if relative else "")
+            continue
+
+        if section is None or "=" not in line:
+            raise DconfParseError(f"linha {line_number}: esperado [seção] ou chave=valor")
+
+        key, value = line.split("=", 1)
+        key = key.strip()
+        try:
+            values[section + key] = GLib.Variant.parse(None, value.strip(), None, None)
+        except GLib.Error as e:
+            raise DconfParseError(f"{section}{key}: {e.message}") from None
+
+    return values
+
+
+def _parse_dump(path, result, strict):
+    """Converte a saída de `dconf dump path` (CommandResult) em valores"""
+    failed = None if strict else {}
+    if not result.ok:
+        print(f"Erro ao ler {path}: {result.describe_error()}")
+        return failed
+
+    try:
+        return parse_keyfile(result.stdout, path)
+    except DconfParseError as e:
+        print(f"Erro ao interpretar valores de {path}: {e}")
+        return failed
+
+
+def read_values(path, strict=False):
+    """Lê os valores atuais de toda a subárvore `path` do dconf
+
+    Retorna um dicionário {chave_absoluta: GLib.Variant}. Em caso de erro
+    retorna um dicionário vazio, ou None se `strict` for verdadeiro.
+    """
+    return _parse_dump(path, runner.run(["dconf", "dump", path]), strict)
+
+
+def read_many(paths, strict=False):
+    """read_values de várias subárvores, com os `dconf dump` em paralelo: {caminho: valores}"""
+    paths = list(paths)
+    results = runner.run_many([["dconf", "dump", path] for path in paths])
+    return {path: _parse_dump(path, result, strict) for path, result in zip(paths, results)}
+
+
+class DconfCache:
+    """Cache das subárvores lidas com read_values, mantido pelo sinal Notify do dconf
+
+    Enquanto watch() não é chamado nada é guardado e cada leitura vai ao
+    dconf, como read_values.
+    """
+
+    def __init__(self, connection=None):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._values = {}
+        self._watching = False
+        # Incrementado a cada invalidação; permite saber se um plano ficou velho
+        self.generation = 0
+
+    def read_many(self, paths, strict=False):
+        """Mesmo resultado de read_many(paths, strict); só as subárvores fora do cache são lidas"""
+        if not self._watching:
+            return read_many(paths, strict)
+
+        found = {}
+        with self._lock:
+            for path in paths:
+                if path in self._values:
+                    found[path] = dict(self._values[path])
+        missing = [path for path in paths if path not in found]
+
+        for path, values in read_many(missing, True).items():
+            if values is None:
+                found[path] = None if strict else {}
+                continue
+            with self._lock:
+                self._values[path] = values
+            found[path] = dict(values)
+        return {path: found[path] for path in paths}
+
+    def invalidate(self, prefix="/"):
+        """Descarta as subárvores que se sobrepõem a `prefix`"""
+        with self._lock:
+            self.generation += 1
+            for path in list(self._values):
+                if path.startswith(prefix) or prefix.startswith(path):
+                    del self._values[path]
+
+    def watch(self):
+        """Passa a guardar as leituras; o sinal Notify (no main loop padrão) as invalida"""
+        if self._watching:
+            return
+        if self._connection is None:
+            self._connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+
+        def on_notify(connection, sender, path, interface, signal, parameters):
+            prefix, changes, tag = parameters.unpack()
+            for change in changes or [""]:
+                self.invalidate(prefix + change)
+
+        self._connection.signal_subscribe(
+            None, DCONF_WRITER_INTERFACE, "Notify", DCONF_WRITER_PATH, None,
+            Gio.DBusSignalFlags.NONE, on_notify
+        )
+        self._watching = True
+
+
+def values_equal(old, new):
+    """Compara dois valores dconf (None = chave sem valor definido)"""
+    if old is None or new is None:
+        return old is new
+    return old.equal(new)
+
+
+def diff_values(changes, current):
+    """Mantém apenas as alterações que diferem dos valores atuais
+
+    Retorna {chave: (valor_atual, valor_novo)}.
+    """
+    return {
+        key: (current.get(key), value)
+        for key, value in changes.items()
+        if not values_equal(current.get(key), value)
+    }
+
+
+def format_value(value):
+    """Texto GVariant de um valor dconf, para relatórios"""
+    return value.print_(False) if value is not None else "(padrão)"
+
+
+def write_changes(changes, connection=None):
+    """Grava várias chaves dconf como um único change set atômico
+
+    changes: dicionário {chave_absoluta: GLib.Variant ou None}; None
+    redefine a chave para o padrão. É o mesmo formato a{smv} que a
+    libdconf envia para o método Change do serviço dconf.
+    """
+    if not changes:
+        return True
+
+    changeset = GLib.Variant("a{smv}", changes)
+    try:
+        if connection is None:
+            connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        connection.call_sync(
+            DCONF_BUS_NAME,
+            DCONF_WRITER_PATH,
+            DCONF_WRITER_INTERFACE,
+            "Change",
+            GLib.Variant("(ay)", (changeset.get_data_as_bytes().get_data(),)),
+            GLib.VariantType("(s)"),
+            Gio.DBusCallFlags.NONE,
+            DBUS_CALL_TIMEOUT,
+            None
+        )
+        return True
+    except GLib.Error as e:
+        print(f"Erro ao gravar configurações dconf: {e.message}")
+        return False
+
+
+# ===========================
+# BANCOS DO SISTEMA
+# ===========================
+def format_keyfile(values):
+    """Texto keyfile de um banco do sistema ([caminho/sem/barras] e chave=valor)"""
+    sections = {}
+    for key in sorted(values):
+        directory, _, name = key.rpartition("/")
+        sections.setdefault(directory.strip("/"), []).append(f"{name}={values[key].print_(True)}")
+
+    lines = []
+    for directory, entries in sections.items():
+        lines.append(f"[{directory}]")
+        lines.extend(entries)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _write_text(path, text):
+    with atomic_write(path) as f:
+        f.write(text)
+
+
+def write_system_database(db_name, file_name, values, locks=(), dconf_dir=SYSTEM_DCONF_DIR):
+    """Grava valores (e travas) como keyfile do banco `db_name` do sistema
+
+    Cria db/<db_name>.d/<file_name> e, se houver travas,
+    db/<db_name>.d/locks/<file_name>. O banco só vale depois de
+    compile_system_database. Retorna o caminho do keyfile.
+    """
+    db_dir = os.path.join(dconf_dir, "db", f"{db_name}.d")
+    keyfile_path = os.path.join(db_dir, file_name)
+    _write_text(keyfile_path, format_keyfile(values))
+
+    locks_path = os.path.join(db_dir, "locks", file_name)
+    if locks:
+        _write_text(locks_path, "\n".join(sorted(locks)) + "\n")
+    elif os.path.exists(locks_path):
+        os.unlink(locks_path)
+
+    return keyfile_path
+
+
+def compile_system_database(db_name, dconf_dir=SYSTEM_DCONF_DIR):
+    """Compila db/<db_name>.d no banco binário db/<db_name> (`dconf compile`)"""
+    db_path = os.path.join(dconf_dir, "db", db_name)
+    result = runner.run(["dconf", "compile", f"{db_path}.tmp", f"{db_path}.d"])
+    if not result.ok:
+        print(f"Erro ao compilar {db_path}: {result.describe_error()}")
+        return False
+
+    # Substituição atômica: sessões abertas nunca leem um banco pela metade
+    os.replace(f"{db_path}.tmp", db_path)
+    return True
+
+
+def profile_uses_database(db_name, profile="user", dconf_dir=SYSTEM_DCONF_DIR):
+    """Verifica se o perfil dconf (profile/<profile>) inclui system-db:<db_name>"""
+    try:
+        with open(os.path.join(dconf_dir, "profile", profile), "r") as f:
+            return any(line.strip() == f"system-db:{db_name}" for line in f)
+    except OSError:
+        return False
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Gravação atômica de arquivos: temporário no mesmo diretório e os.replace"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Permissões de um arquivo novo criado com open() (mkstemp cria com 0600)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_write(path, mode="w", sync=False):
+    """Abre um temporário para gravação e o coloca em `path` ao sair sem erro
+
+    O temporário tem nome único (tempfile.mkstemp no diretório de `path`):
+    gravações simultâneas do mesmo arquivo não se atropelam e quem lê vê o
+    conteúdo antigo ou o novo, nunca um pela metade. Com `sync` os dados vão
+    para o disco antes da troca. Se algo falhar o temporário é apagado e
+    `path` fica como estava. Cria o diretório se preciso.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            os.fchmod(f.fileno(), NEW_FILE_MODE)
+            yield f
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
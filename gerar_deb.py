@@ -5,6 +5,50 @@ import subprocess
 import sys
 from pathlib import Path
 
+# Módulos Python instalados junto com o index.py
+MODULOS = [
+    "index.py",
+    "shell_extensions.py",
+    "dconf_settings.py",
+    "profiles.py",
+    "tracing.py",
+    "commands.py",
+    "files.py",
+    "progress.py",
+    "snapshots.py",
+    "journal.py",
+    "scheduler.py",
+    "interface.py",
+    "daemon.py"
+]
+
+def compilar_perfis(destino):
+    """Valida os perfis do sistema e grava as versões compiladas (GVariant) em destino
+
+    Retorna False se algum perfil tiver valor inválido ou tipo inconsistente.
+    """
+    from dconf_settings import DconfParseError, parse_keyfile
+    from index import DCONF_PATHS, EMOJI_COPY_CONFIG
+    from profiles import ProfileStore
+
+    ok = True
+    try:
+        parse_keyfile(EMOJI_COPY_CONFIG, DCONF_PATHS["emoji"])
+    except DconfParseError as e:
+        print(f"Erro na configuração padrão do emoji-copy: {e}")
+        ok = False
+
+    # Só os perfis do sistema: nada do diretório de perfis do usuário que gera o pacote
+    store = ProfileStore(["perfis"], DCONF_PATHS)
+    erros = store.compile(destino)
+    for perfil, mensagens in erros.items():
+        for mensagem in mensagens:
+            print(f"Erro no perfil {perfil}: {mensagem}")
+
+    if ok and not erros:
+        print(f"Perfis compilados: {', '.join(sorted(store.profiles))}")
+    return ok and not erros
+
 def criar_estrutura_deb():
     # Nome do pacote e versão
     nome_pacote = "gnome-customizer"
@@ -103,9 +147,18 @@ StartupNotify=true
         else:
             print(f"Aviso: Arquivo não encontrado: {origem}")
     
-    # Copiar o script principal
+    # Copiar o script principal e os módulos auxiliares
     if os.path.exists("index.py"):
-        shutil.copy2("index.py", dir_share_gnome_customizer / "index.py")
+        for modulo in MODULOS:
+            shutil.copy2(modulo, dir_share_gnome_customizer / modulo)
+        
+        # Perfis do sistema (índice e arquivos de configuração) e suas versões compiladas
+        from profiles import COMPILED_DIR
+        shutil.copytree("perfis", dir_share_gnome_customizer / "perfis",
+                        ignore=shutil.ignore_patterns(COMPILED_DIR))
+        if not compilar_perfis(dir_share_gnome_customizer / "perfis" / COMPILED_DIR):
+            print("Erro: perfis inválidos; pacote não gerado")
+            return False
         
         # Criar script de executável em /usr/bin
         bin_content = f"""#!/bin/bash
@@ -116,6 +169,16 @@ exec python3 index.py "$@"
         with open(dir_bin / "gnome-customizer", "w") as f:
             f.write(bin_content)
         os.chmod(dir_bin / "gnome-customizer", 0o755)
+        
+        # Ativação do daemon da sessão sob demanda (chamadas D-Bus de outras ferramentas)
+        from daemon import DAEMON_BUS_NAME
+        dir_dbus = dir_share / "dbus-1" / "services"
+        dir_dbus.mkdir(parents=True, exist_ok=True)
+        with open(dir_dbus / f"{DAEMON_BUS_NAME}.service", "w") as f:
+            f.write(f"""[D-BUS Service]
+Name={DAEMON_BUS_NAME}
+Exec=/usr/bin/gnome-customizer daemon
+""")
     else:
         print("Erro: index.py não encontrado!")
         return False
@@ -161,4 +224,4 @@ def main():
     return success
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file
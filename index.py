@@ -1,18 +1,25 @@
 #!/usr/bin/env python3
-import gi
-import subprocess
-import tempfile
 import os
 import time
-import json
-import threading
-import subprocess
 import sys
-gi.require_version("Gtk", "3.0")
-from gi.repository import Gtk, Gdk, GdkPixbuf, GLib
+import argparse
+import threading
+from datetime import datetime
+from gi.repository import GLib
+from shell_extensions import ExtensionStateCache, STATE_CHANGE_TIMEOUT
+from dconf_settings import (
+    SYSTEM_DCONF_DIR, DconfCache, DconfParseError, compile_system_database, diff_values, format_value, parse_keyfile,
+    profile_uses_database, write_changes, write_system_database
+)
+from profiles import COMPILED_DIR, ProfileStore, user_cache_dir, user_profile_dir
+from tracing import tracer
+from progress import ApplyProgress, StepHistory
+from snapshots import SnapshotStore, user_snapshot_dir
+from journal import Journal, JournalBusy, user_journal_path
+from scheduler import ApplyScheduler
 
 # ===========================
-# CONFIGURAÇÃO DE CAMINHOS DE ÍCONES
+# CAMINHOS DE RECURSOS
 # ===========================
 def get_resource_path(relative_path):
     """Obtém o caminho absoluto para recursos, funciona para desenvolvimento e para o executável compilado"""
@@ -25,22 +32,6 @@ def get_resource_path(relative_path):
     
     return os.path.join(base_path, relative_path)
 
-# Caminhos dos ícones (usando a função get_resource_path)
-ICON_PATHS = {
-    "windows10": get_resource_path("icons/windows10.png"),
-    "windows11": get_resource_path("icons/windows11.png"), 
-    "macos": get_resource_path("icons/macOS.png"),
-    "ubuntu": get_resource_path("icons/ubuntu.png")
-}
-
-# Fallback para ícones padrão se os específicos não existirem
-FALLBACK_ICONS = {
-    "windows10": "windows-symbolic",
-    "windows11": "windows-symbolic",
-    "macos": "apple-symbolic",
-    "ubuntu": "ubuntu-symbolic"
-}
-
 # Lista de extensões
 extensoes = [
     "emoji-copy@felipeftn",
@@ -59,36 +50,36 @@ extensoes = [
     "user-theme@gnome-shell-extensions.gcampax.github.com"
 ]
 
+# Snapshot em memória do estado das extensões (uma chamada ListExtensions)
+extension_state = ExtensionStateCache()
+
 def is_enabled(ext_id):
     """Verifica se a extensão está habilitada"""
-    result = subprocess.run(
-        ["gnome-extensions", "info", ext_id],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        return False
-    return "State: ENABLED" in result.stdout
+    return extension_state.is_enabled(ext_id)
 
-def disable_extension(ext_id):
-    """Desabilita a extensão"""
-    subprocess.run(["gnome-extensions", "disable", ext_id])
-
-# Desabilita todas as extensões que ainda estão habilitadas
-for ext in extensoes:
-    if is_enabled(ext):
-        print(f"Desabilitando {ext}...")
-        disable_extension(ext)
-    else:
-        print(f"{ext} já está desabilitada.")
-
-# Verifica se todas estão desabilitadas
-todas_desabilitadas = all(not is_enabled(ext) for ext in extensoes)
-
-if todas_desabilitadas:
-    print("Todas as extensões estão desabilitadas. Executando index2.py...")
-    subprocess.run([sys.executable, "index2.py"])
-else:
-    print("Algumas extensões não puderam ser desabilitadas.")
+def reset_extensions():
+    """Desabilita todas as extensões da lista que ainda estão habilitadas"""
+    if extension_state.refresh() is None:
+        return False
+    enabled = [ext for ext in extensoes if is_enabled(ext)]
+    for ext in extensoes:
+        if ext in enabled:
+            print(f"Desabilitando {ext}...")
+        else:
+            print(f"{ext} já está desabilitada.")
+    
+    # Um lote via D-Bus: espera a confirmação de cada extensão, com timeout
+    set_extensions_enabled(enabled, False)
+    
+    # Verifica se todas estão desabilitadas
+    extension_state.invalidate()
+    extension_state.refresh()
+    todas_desabilitadas = all(not is_enabled(ext) for ext in extensoes)
+    
+    if not todas_desabilitadas:
+        print("Algumas extensões não puderam ser desabilitadas.")
+    
+    return todas_desabilitadas
 
 # ===========================
 # CONSTANTES
@@ -110,759 +101,952 @@ EXTENSIONS = {
 # Extensões que sempre serão habilitadas (padrão para todos os modos)
 ALWAYS_ENABLED_EXTENSIONS = ["compiz", "cube", "gsconnect", "emoji", "tiling", "appindicators", "blur"]
 
-# ===========================
-# PERFIS DE CONFIGURAÇÃO (ATUALIZADOS COM SUAS CONFIGURAÇÕES REAIS)
-# ===========================
-PROFILES = {
-    "macos_normal": {
-        "name": "macOS Normal",
-        "icon": "macos",
-        "extensions": ["dash2dock"],
-        "dconf": {
-            "dash2dock": """[/]
-animation-bounce=0.02
-animation-magnify=0.0
-animation-rise=1.0
-animation-spread=0.91
-apps-icon-front=true
-autohide-dash=true
-autohide-speed=0.0
-background-color=(0.0, 0.0, 0.0, 0.51666665077209473)
-blur-resolution=0
-border-radius=2.2
-clock-icon=false
-customize-label=true
-customize-topbar=true
-dock-padding=0.0
-downloads-icon=false
-edge-distance=-0.015
-icon-resolution=4
-icon-size=0.0
-icon-spacing=0.0
-items-pullout-angle=0.02
-mounted-icon=true
-msg-to-ext=''
-open-app-animation=true
-panel-mode=false
-preferred-monitor=0
-pressure-sense=false
-pressure-sense-sensitivity=0.0
-scroll-sensitivity=0.0
-shrink-icons=true
-topbar-background-color=(0.0, 0.0, 0.0, 0.50333333015441895)
-trash-icon=true
-"""
-        }
-    },
-    "macos_extended": {
-        "name": "macOS Estendido",
-        "icon": "macos",
-        "extensions": ["dash2dock"],
-        "dconf": {
-            "dash2dock": """[/]
-animation-bounce=0.02
-animation-magnify=0.0
-animation-rise=1.0
-animation-spread=0.91
-apps-icon-front=true
-autohide-dash=true
-autohide-speed=0.0
-background-color=(0.0, 0.0, 0.0, 0.51666665077209473)
-blur-resolution=0
-border-radius=2.2
-clock-icon=false
-customize-label=true
-customize-topbar=true
-dock-padding=0.0
-downloads-icon=false
-edge-distance=-0.015
-icon-resolution=4
-icon-size=0.0
-icon-spacing=0.0
-items-pullout-angle=0.02
-mounted-icon=true
-msg-to-ext=''
-open-app-animation=true
-panel-mode=true
-preferred-monitor=0
-pressure-sense=false
-pressure-sense-sensitivity=0.0
-scroll-sensitivity=0.0
-shrink-icons=true
-topbar-background-color=(0.0, 0.0, 0.0, 0.50333333015441895)
-trash-icon=true
-"""
-        }
-    },
-    "windows11_centered": {
-        "name": "Windows 11 Centralizado",
-        "icon": "windows11",
-        "extensions": ["panel", "arcmenu"],
-        "dconf": {
-            "panel": """[/]
-animate-appicon-hover=true
-animate-appicon-hover-animation-extent={'RIPPLE': 4, 'PLANK': 4, 'SIMPLE': 1}
-appicon-margin=0
-dot-position='TOP'
-dot-style-focused='SQUARES'
-extension-version=68
-hotkeys-overlay-combo='TEMPORARILY'
-panel-anchors='{"LGD-0x00000000":"MIDDLE"}'
-panel-element-positions='{"LGD-0x00000000":[{"element":"showAppsButton","visible":false,"position":"stackedTL"},{"element":"activitiesButton","visible":false,"position":"stackedTL"},{"element":"leftBox","visible":true,"position":"centerMonitor"},{"element":"taskbar","visible":true,"position":"centerMonitor"},{"element":"centerBox","visible":true,"position":"stackedBR"},{"element":"rightBox","visible":true,"position":"stackedBR"},{"element":"dateMenu","visible":true,"position":"stackedBR"},{"element":"systemMenu","visible":true,"position":"stackedBR"},{"element":"desktopButton","visible":true,"position":"stackedBR"}]}'
-panel-lengths='{"0":100}'
-panel-positions='{}'
-panel-sizes='{"0":48}'
-prefs-opened=false
-primary-monitor='LGD-0x00000000'
-window-preview-title-position='TOP'
-""",
-            "arcmenu": """[/]
-arc-menu-icon=71
-avatar-style='Square'
-button-padding=7
-context-menu-items=[{'id': 'ArcMenu_Settings', 'name': 'ArcMenu Settings', 'icon': 'ArcMenu_ArcMenuIcon'}, {'id': 'ArcMenu_PanelExtensionSettings', 'name': 'Panel Extension Settings', 'icon': 'application-x-addon-symbolic'}, {'id': 'ArcMenu_Separator', 'name': 'Separator', 'icon': 'list-remove-symbolic'}, {'id': 'ArcMenu_PowerOptions', 'name': 'Power Options', 'icon': 'system-shutdown-symbolic'}, {'id': 'ArcMenu_ActivitiesOverview', 'name': 'Activities Overview', 'icon': 'view-fullscreen-symbolic'}, {'id': 'ArcMenu_ShowDesktop', 'name': 'Show Desktop', 'icon': 'computer-symbolic'}]
-custom-menu-button-icon-size=26.0
-disable-recently-installed-apps=false
-disable-user-avatar=false
-distro-icon=5
-extra-categories=[(3, true), (2, true), (0, false), (1, false), (4, false)]
-force-menu-location='BottomCentered'
-group-apps-alphabetically-list-layouts=true
-hide-overview-on-startup=false
-left-panel-width=265
-menu-button-appearance='Icon'
-menu-button-border-radius=(true, 0)
-menu-button-border-width=(false, 0)
-menu-button-icon='Distro_Icon'
-menu-button-position-offset=10
-menu-height=600
-menu-layout='Eleven'
-multi-monitor=false
-override-menu-theme=false
-pinned-apps=[{'id': 'firefox.desktop'}, {'id': 'org.gnome.Nautilus.desktop'}, {'id': 'org.gnome.Terminal.desktop'}]
-position-in-panel='Left'
-prefs-visible-page=0
-right-panel-width=255
-search-entry-border-radius=(true, 25)
-show-activities-button=false
-update-notifier-project-version=66
-"""
-        }
-    },
-    "windows11_left": {
-        "name": "Windows 11 Esquerda",
-        "icon": "windows11",
-        "extensions": ["panel", "arcmenu"],
-        "dconf": {
-            "panel": """[/]
-animate-appicon-hover=true
-animate-appicon-hover-animation-extent={'RIPPLE': 4, 'PLANK': 4, 'SIMPLE': 1}
-appicon-margin=0
-dot-position='TOP'
-dot-style-focused='SQUARES'
-extension-version=68
-hotkeys-overlay-combo='TEMPORARILY'
-panel-anchors='{"LGD-0x00000000":"MIDDLE"}'
-panel-element-positions='{"LGD-0x00000000":[{"element":"showAppsButton","visible":false,"position":"stackedTL"},{"element":"activitiesButton","visible":false,"position":"stackedTL"},{"element":"leftBox","visible":true,"position":"stackedTL"},{"element":"taskbar","visible":true,"position":"stackedTL"},{"element":"centerBox","visible":true,"position":"stackedBR"},{"element":"rightBox","visible":true,"position":"stackedBR"},{"element":"dateMenu","visible":true,"position":"stackedBR"},{"element":"systemMenu","visible":true,"position":"stackedBR"},{'element':'desktopButton','visible':true,'position':'stackedBR'}]}'
-panel-lengths='{"0":100}'
-panel-positions='{}'
-panel-sizes='{"0":48}'
-prefs-opened=false
-primary-monitor='LGD-0x00000000'
-window-preview-title-position='TOP'
-""",
-            "arcmenu": """[/]
-arc-menu-icon=71
-avatar-style='Square'
-button-padding=7
-context-menu-items=[{'id': 'ArcMenu_Settings', 'name': 'ArcMenu Settings', 'icon': 'ArcMenu_ArcMenuIcon'}, {'id': 'ArcMenu_PanelExtensionSettings', 'name': 'Panel Extension Settings', 'icon': 'application-x-addon-symbolic'}, {'id': 'ArcMenu_Separator', 'name': 'Separator', 'icon': 'list-remove-symbolic'}, {'id': 'ArcMenu_PowerOptions', 'name': 'Power Options', 'icon': 'system-shutdown-symbolic'}, {'id': 'ArcMenu_ActivitiesOverview', 'name': 'Activities Overview', 'icon': 'view-fullscreen-symbolic'}, {'id': 'ArcMenu_ShowDesktop', 'name': 'Show Desktop', 'icon': 'computer-symbolic'}]
-custom-menu-button-icon-size=26.0
-disable-recently-installed-apps=false
-disable-user-avatar=false
-distro-icon=5
-extra-categories=[(3, true), (2, true), (0, false), (1, false), (4, false)]
-force-menu-location='BottomLeft'
-group-apps-alphabetically-list-layouts=true
-hide-overview-on-startup=false
-left-panel-width=265
-menu-button-appearance='Icon'
-menu-button-border-radius=(true, 0)
-menu-button-border-width=(false, 0)
-menu-button-icon='Distro_Icon'
-menu-button-position-offset=10
-menu-height=600
-menu-layout='Eleven'
-multi-monitor=false
-override-menu-theme=false
-pinned-apps=[{'id': 'firefox.desktop'}, {'id': 'org.gnome.Nautilus.desktop'}, {'id': 'org.gnome.Terminal.desktop'}]
-position-in-panel='Left'
-prefs-visible-page=0
-right-panel-width=255
-search-entry-border-radius=(true, 25)
-show-activities-button=false
-update-notifier-project-version=66
-"""
-        }
-    },
-    "windows10": {
-        "name": "Windows 10",
-        "icon": "windows10",
-        "extensions": ["panel", "arcmenu"],
-        "dconf": {
-            "panel": """[/]
-animate-appicon-hover=true
-animate-appicon-hover-animation-extent={'RIPPLE': 4, 'PLANK': 4, 'SIMPLE': 1}
-appicon-margin=0
-dot-position='TOP'
-dot-style-focused='SQUARES'
-extension-version=68
-hotkeys-overlay-combo='TEMPORARILY'
-panel-anchors='{"0":"LEFT"}'
-panel-element-positions='{"0":[{"element":"showAppsButton","visible":false,"position":"stackedTL"},{"element":"activitiesButton","visible":false,"position":"stackedTL"},{"element":"leftBox","visible":true,"position":"stackedTL"},{"element":"taskbar","visible":true,"position":"stackedTL"},{"element":"centerBox","visible":true,"position":"stackedBR"},{"element":"rightBox","visible":true,"position":"stackedBR"},{"element":"dateMenu","visible":true,"position":"stackedBR"},{"element":"systemMenu","visible":true,"position":"stackedBR"},{"element":"desktopButton","visible":true,"position":"stackedBR"}]}'
-panel-lengths='{"0":100}'
-panel-sizes='{"0":48}'
-window-preview-title-position='TOP'
-""",
-            "arcmenu": """[/]
-arc-menu-icon=71
-avatar-style='Square'
-button-padding=5
-context-menu-items=[{'id': 'ArcMenu_Settings', 'name': 'ArcMenu Settings', 'icon': 'ArcMenu_ArcMenuIcon'}, {'id': 'ArcMenu_PanelExtensionSettings', 'name': 'Panel Extension Settings', 'icon': 'application-x-addon-symbolic'}, {'id': 'ArcMenu_Separator', 'name': 'Separator', 'icon': 'list-remove-symbolic'}, {'id': 'ArcMenu_PowerOptions', 'name': 'Power Options', 'icon': 'system-shutdown-symbolic'}, {'id': 'ArcMenu_ActivitiesOverview', 'name': 'Activities Overview', 'icon': 'view-fullscreen-symbolic'}, {'id': 'ArcMenu_ShowDesktop', 'name': 'Show Desktop', 'icon': 'computer-symbolic'}]
-custom-menu-button-icon-size=26.0
-disable-recently-installed-apps=false
-disable-user-avatar=false
-distro-icon=5
-extra-categories=[(3, true), (2, true), (0, false), (1, false), (4, false)]
-force-menu-location='BottomLeft'
-group-apps-alphabetically-list-layouts=true
-hide-overview-on-startup=false
-left-panel-width=265
-menu-button-appearance='Icon'
-menu-button-border-radius=(true, 0)
-menu-button-border-width=(false, 0)
-menu-button-icon='Distro_Icon'
-menu-button-position-offset=10
-menu-height=600
-menu-layout='Windows'
-multi-monitor=false
-override-menu-theme=false
-pinned-apps=[{'id': 'firefox.desktop'}, {'id': 'org.gnome.Nautilus.desktop'}, {'id': 'org.gnome.Terminal.desktop'}]
-position-in-panel='Left'
-prefs-visible-page=0
-right-panel-width=255
-search-entry-border-radius=(true, 25)
-show-activities-button=false
-"""
-        }
-    },
-    "ubuntu": {
-        "name": "Ubuntu Like",
-        "icon": "ubuntu",
-        "extensions": ["ubuntu"],
-        "dconf": {}
-    }
-}
-
 # Configuração padrão para emoji-copy
 EMOJI_COPY_CONFIG = """[/]
 always-show=false
 recently-used=['👿', '👇', '😂', '❤️', '😍', '😭', '😊', '😒', '😘', '😩', '🤔']
 """
 
+# Mapeia IDs de extensão para caminhos dconf
+DCONF_PATHS = {
+    "dash2dock": "/org/gnome/shell/extensions/dash2dock-lite/",
+    "panel": "/org/gnome/shell/extensions/dash-to-panel/",
+    "arcmenu": "/org/gnome/shell/extensions/arcmenu/",
+    "emoji": "/org/gnome/shell/extensions/emoji-copy/"
+}
+
+# Subárvores dconf de todas as extensões gerenciadas: o que os backups guardam
+SETTINGS_PATHS = {
+    **DCONF_PATHS,
+    "ubuntu": "/org/gnome/shell/extensions/dash-to-dock/",
+    "compiz": "/org/gnome/shell/extensions/com/github/hermes83/compiz-windows-effect/",
+    "cube": "/org/gnome/shell/extensions/desktop-cube/",
+    "gsconnect": "/org/gnome/shell/extensions/gsconnect/",
+    "tiling": "/org/gnome/shell/extensions/tiling-assistant/",
+    "appindicators": "/org/gnome/shell/extensions/appindicator/",
+    "blur": "/org/gnome/shell/extensions/blur-my-shell/"
+}
+
+# Subárvores dconf lidas; só ficam em cache com watch_live_state() (daemon e janela)
+dconf_cache = DconfCache()
+
+# Planos calculados antes do clique: {perfil: (geração do estado, etapas, delta)}
+_precomputed_plans = {}
+_precomputing = {}
+_precomputed_lock = threading.Lock()
+_watching_live_state = False
+
 # ===========================
-# FUNÇÕES AUXILIARES
+# PERFIS DE CONFIGURAÇÃO
 # ===========================
-def run_cmd(cmd, show_output=False):
-    """Executa comando no terminal"""
-    try:
-        if show_output:
-            result = subprocess.run(cmd, shell=True, check=True, capture_output=True, text=True)
-            return result.stdout.strip()
-        else:
-            subprocess.run(cmd, shell=True, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-    except subprocess.CalledProcessError as e:
-        print(f"Erro ao executar: {cmd}\n{e}")
-        return False
+# Perfis do sistema (instalados com o aplicativo) e do usuário; os do
+# usuário sobrescrevem os do sistema com o mesmo identificador
+PROFILE_DIRS = [
+    get_resource_path("perfis"),
+    user_profile_dir()
+]
+
+# Perfis do sistema validados e compilados pelo gerar_deb.py (ausentes no código-fonte)
+profile_store = ProfileStore(
+    PROFILE_DIRS, DCONF_PATHS, compiled_dir=os.path.join(get_resource_path("perfis"), COMPILED_DIR)
+)
+
+# Apenas nome, ícone e extensões; o conteúdo dconf é carregado sob demanda
+PROFILES = profile_store.profiles
+
+# Arquivo do trace (formato Chrome trace-event) definido por --trace
+TRACE_PATH = None
+
+# Com --verbose cada chave dconf gravada é mostrada no terminal
+VERBOSE = False
+
+# Duração observada de cada etapa das trocas, usada para estimar o tempo restante
+STEP_HISTORY_PATH = os.path.join(user_cache_dir(), "etapas.json")
+step_history = StepHistory(STEP_HISTORY_PATH)
+
+# Implantação em massa: banco dconf do sistema (/etc/dconf/db/<banco>.d/<arquivo>)
+DEPLOY_DB_NAME = "local"
+DEPLOY_KEYFILE = "50-gnome-customizer"
+SHELL_ENABLED_EXTENSIONS_KEY = "/org/gnome/shell/enabled-extensions"
+SHELL_DISABLE_USER_EXTENSIONS_KEY = "/org/gnome/shell/disable-user-extensions"
+
+# Plano da troca em andamento, para retomar ou desfazer após uma interrupção
+journal = Journal(user_journal_path())
+
+# ===========================
+# PONTOS DE RESTAURAÇÃO
+# ===========================
+snapshot_store = SnapshotStore(user_snapshot_dir())
 
+# Backup das versões anteriores (só o estado das extensões), ainda aceito na restauração
+LEGACY_BACKUP_PATH = "~/.gnome_customizer_backup.json"
+
+# ===========================
+# FUNÇÕES AUXILIARES
+# ===========================
 def check_extension_installed(extension_id):
     """Verifica se uma extensão está instalada"""
-    try:
-        result = subprocess.run(
-            ["gnome-extensions", "list"], 
-            capture_output=True, text=True
-        )
-        return extension_id in result.stdout
-    except:
-        return False
+    return extension_state.is_installed(extension_id)
 
-def get_icon_pixbuf(icon_name, size=48):
-    """Obtém um pixbuf para o ícone especificado"""
-    try:
-        icon_path = ICON_PATHS[icon_name]
-        if os.path.exists(icon_path):
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(icon_path, size, size)
-            return pixbuf
-        else:
-            # Fallback para ícones padrão do GTK
-            theme = Gtk.IconTheme.get_default()
-            icon_info = theme.lookup_icon(FALLBACK_ICONS[icon_name], size, 0)
-            if icon_info:
-                return icon_info.load_icon()
-    except Exception as e:
-        print(f"Erro ao carregar ícone {icon_name}: {e}")
+def get_profile_dconf(profile_name):
+    """Carrega (sob demanda) o conteúdo dconf de um perfil"""
+    return profile_store.load_dconf(profile_name)
+
+def parse_dconf_config(extension_id, config_data):
+    """Converte o bloco keyfile de uma extensão em valores dconf tipados"""
+    if not config_data or extension_id not in DCONF_PATHS:
+        return {}
     
-    # Fallback final
     try:
-        return Gtk.IconTheme.get_default().load_icon("application-x-executable", size, 0)
-    except:
-        # Se tudo falhar, cria um ícone vazio
-        return GdkPixbuf.Pixbuf.new(GdkPixbuf.Colorspace.RGB, True, 8, size, size)
-
-def apply_dconf_config(extension_id, config_data):
-    """Aplica configuração dconf para uma extensão"""
-    if not config_data:
-        return True
+        return parse_keyfile(config_data, DCONF_PATHS[extension_id])
+    except DconfParseError as e:
+        print(f"Erro na configuração dconf de {extension_id}: {e}")
+        return {}
+
+def plan_dconf(configs):
+    """Calcula apenas as chaves dconf que diferem dos valores atuais
     
-    # Mapeia IDs de extensão para caminhos dconf
-    dconf_paths = {
-        "dash2dock": "/org/gnome/shell/extensions/dash2dock-lite/",
-        "panel": "/org/gnome/shell/extensions/dash-to-panel/",
-        "arcmenu": "/org/gnome/shell/extensions/arcmenu/",
-        "emoji": "/org/gnome/shell/extensions/emoji-copy/"
-    }
+    configs: dicionário {extensão: {chave: GLib.Variant}}. Lê os valores
+    atuais de cada caminho em DCONF_PATHS e retorna
+    {chave: (valor_atual, valor_novo)}, ou None se alguma subárvore não
+    puder ser lida (o valor anterior vai para o diário e precisa ser o real).
+    """
+    wanted = {DCONF_PATHS[extension_id]: changes for extension_id, changes in configs.items() if changes}
     
-    if extension_id not in dconf_paths:
-        return False
+    # Subárvores independentes: os `dconf dump` que faltam no cache rodam em paralelo
+    with tracer.span("ler dconf", "dconf", paths=len(wanted)) as span:
+        current = dconf_cache.read_many(wanted, strict=True)
+        if None in current.values():
+            span["result"] = "erro de leitura"
+            return None
+        span["result"] = f"{sum(len(values) for values in current.values())} chaves"
     
-    with tempfile.NamedTemporaryFile(delete=False, mode="w") as tmp:
-        tmp.write(config_data)
-        tmp_path = tmp.name
+    delta = {}
+    for path, changes in wanted.items():
+        delta.update(diff_values(changes, current[path]))
+    return delta
+
+def describe_dconf_delta(delta):
+    """Descreve as chaves alteradas, uma por linha"""
+    return [
+        f"{key}: {format_value(old)} -> {format_value(new)}"
+        for key, (old, new) in sorted(delta.items())
+    ]
+
+def write_dconf_delta(delta):
+    """Grava um delta ({chave: (antigo, novo)}) como um único change set atômico"""
+    if VERBOSE:
+        for line in describe_dconf_delta(delta):
+            print(f"dconf {line}")
     
-    run_cmd(f"dconf load {dconf_paths[extension_id]} < {tmp_path}")
-    os.unlink(tmp_path)
-    return True
+    with tracer.span("gravar dconf", "dconf", command="ca.desrt.dconf.Writer.Change", keys=len(delta)) as span:
+        success = write_changes({key: new for key, (old, new) in delta.items()})
+        span["result"] = "ok" if success else "erro"
+    
+    # Não espera o sinal Notify: a próxima leitura já precisa ver os valores novos
+    for key in delta:
+        dconf_cache.invalidate(key)
+    return success
 
-def apply_mode(profile_name, progress_callback=None):
-    """Aplica um perfil de configuração"""
+def value_to_text(value):
+    """Valor dconf como texto GVariant (None = chave redefinida), para o diário"""
+    return value.print_(True) if value is not None else None
+
+def text_to_value(text):
+    return GLib.Variant.parse(None, text, None, None) if text is not None else None
+
+def profile_extension_keys(profile_name):
+    """Extensões que ficam habilitadas com o perfil (as dele mais as ALWAYS_ENABLED_EXTENSIONS)"""
     profile = PROFILES[profile_name]
+    return list(profile["extensions"]) + [
+        ext_key for ext_key in ALWAYS_ENABLED_EXTENSIONS if ext_key not in profile["extensions"]
+    ]
+
+def profile_configs(profile_name):
+    """Configurações dconf que o perfil grava: {extensão: {chave: GLib.Variant}}"""
+    # Inclui a configuração padrão para emoji-copy no mesmo change set
+    configs = dict(get_profile_dconf(profile_name))
+    configs["emoji"] = parse_dconf_config("emoji", EMOJI_COPY_CONFIG)
+    return configs
+
+def plan_extensions(profile_name):
+    """Calcula apenas as operações de extensão necessárias para um perfil
     
-    # Desabilita todas as extensões primeiro
-    if progress_callback:
-        GLib.idle_add(progress_callback, "Desabilitando extensões...")
+    Compara o estado atual (snapshot) com as extensões do perfil mais as
+    ALWAYS_ENABLED_EXTENSIONS. Retorna uma lista de operações
+    {"action": "enable"|"disable", "ext_id": ...}, com as desabilitações primeiro.
+    """
+    wanted = profile_extension_keys(profile_name)
     
-    for ext_id in EXTENSIONS.values():
-        run_cmd(f"gnome-extensions disable {ext_id}")
+    plan = []
+    for ext_key, ext_id in EXTENSIONS.items():
+        if ext_key not in wanted and is_enabled(ext_id):
+            plan.append({"action": "disable", "ext_id": ext_id})
     
-    time.sleep(0.5)
+    for ext_key in wanted:
+        ext_id = EXTENSIONS[ext_key]
+        if check_extension_installed(ext_id) and not is_enabled(ext_id):
+            plan.append({"action": "enable", "ext_id": ext_id})
     
-    # Habilita as extensões do perfil
-    if progress_callback:
-        GLib.idle_add(progress_callback, "Habilitando extensões do perfil...")
+    return plan
+
+def set_extensions_enabled(ext_ids, enabled, timeout=STATE_CHANGE_TIMEOUT, on_confirmed=None):
+    """Habilita/desabilita um grupo de extensões, com um span por extensão
     
-    for ext_key in profile["extensions"]:
-        ext_id = EXTENSIONS[ext_key]
-        if check_extension_installed(ext_id):
-            run_cmd(f"gnome-extensions enable {ext_id}")
-            time.sleep(0.3)
+    `on_confirmed(ext_id, segundos)` é chamada quando cada extensão confirma.
+    Retorna a lista de extensões que não confirmaram o novo estado.
+    """
+    method = "EnableExtension" if enabled else "DisableExtension"
+    confirmed_at = {}
+    start = tracer.now()
     
-    # Habilita as extensões padrão em todos os modos
-    if progress_callback:
-        GLib.idle_add(progress_callback, "Habilitando extensões padrão...")
+    def confirmed(ext_id):
+        if on_confirmed:
+            on_confirmed(ext_id, confirmed_at[ext_id] - start)
     
-    for ext_key in ALWAYS_ENABLED_EXTENSIONS:
-        ext_id = EXTENSIONS[ext_key]
-        if check_extension_installed(ext_id):
-            run_cmd(f"gnome-extensions enable {ext_id}")
-            time.sleep(0.3)
+    not_confirmed = extension_state.set_enabled(
+        {ext_id: enabled for ext_id in ext_ids}, timeout, confirmed_at, confirmed
+    )
+    end = tracer.now()
     
-    # Aplica configurações dconf para as extensões
-    if progress_callback:
-        GLib.idle_add(progress_callback, "Aplicando configurações...")
+    for ext_id in ext_ids:
+        tracer.add_span(
+            f"{'habilitar' if enabled else 'desabilitar'} {ext_id}",
+            start, confirmed_at.get(ext_id, end), "extension",
+            command=f"{method} {ext_id}",
+            result="ok" if ext_id in confirmed_at else "não confirmado"
+        )
     
-    for ext_key, config_data in profile.get("dconf", {}).items():
-        apply_dconf_config(ext_key, config_data)
+    for ext_id in not_confirmed:
+        print(f"Aviso: {ext_id} não confirmou a {'habilitação' if enabled else 'desabilitação'}")
     
-    # Aplica configuração padrão para emoji-copy
-    apply_dconf_config("emoji", EMOJI_COPY_CONFIG)
+    return not_confirmed
+
+def plan_apply_steps(profile_name, plan, delta):
+    """Lista completa das etapas de uma troca, calculada antes de executar
     
-    # Recarrega o GNOME Shell
-    if progress_callback:
-        GLib.idle_add(progress_callback, "Recarregando GNOME Shell...")
+    As extensões são tratadas em lote (um grupo de desabilitações e um de
+    habilitações); a etapa dconf guarda os valores novos e os anteriores,
+    para poder ser desfeita. As configurações são gravadas antes das
+    habilitações, então cada extensão já sobe com os valores do perfil e
+    nenhuma precisa ser recarregada. As etapas são serializáveis em JSON
+    (vão para o diário).
+    """
+    disables = [op["ext_id"] for op in plan if op["action"] == "disable"]
+    enables = [op["ext_id"] for op in plan if op["action"] == "enable"]
     
-    reload_gnome_shell()
+    steps = []
+    if disables:
+        steps.append({"kind": "disable", "ext_ids": disables, "message": "Desabilitando extensões..."})
+    if delta:
+        steps.append({
+            "kind": "dconf",
+            "key": f"dconf:{profile_name}",
+            "message": "Aplicando configurações...",
+            "changes": {key: value_to_text(new) for key, (old, new) in delta.items()},
+            "previous": {key: value_to_text(old) for key, (old, new) in delta.items()},
+        })
+    if enables:
+        steps.append({"kind": "enable", "ext_ids": enables, "message": "Habilitando extensões..."})
+    return steps
+
+def plan_apply(profile_name):
+    """Planeja a troca inteira: operações de extensão e delta dconf
     
-    return True
+    Retorna (etapas, delta); o delta mantém os valores já tipados, para a
+    troca não reinterpretar o texto guardado no diário. Retorna None se o
+    estado atual não puder ser lido.
+    """
+    with tracer.span("planejar", "phase") as span:
+        if extension_state.refresh() is None:
+            span["result"] = "GNOME Shell indisponível"
+            return None
+        plan = plan_extensions(profile_name)
+        delta = plan_dconf(profile_configs(profile_name))
+        if delta is None:
+            span["result"] = "dconf ilegível"
+            return None
+        
+        span["result"] = f"{len(plan)} operações, {len(delta)} chaves"
+    return plan_apply_steps(profile_name, plan, delta), delta
+
+def watch_live_state():
+    """Mantém os caches de extensões e dconf em dia pelos sinais do barramento
+    
+    Os sinais chegam no main loop padrão, que precisa estar rodando. Só com
+    eles ativos um plano calculado antes do clique pode ser reaproveitado.
+    """
+    global _watching_live_state
+    extension_state.watch()
+    dconf_cache.watch()
+    _watching_live_state = True
 
-def reload_gnome_shell():
-    """Recarrega o GNOME Shell de forma não destrutiva"""
-    run_cmd("gsettings set org.gnome.shell disable-user-extensions true")
-    time.sleep(1)
-    run_cmd("gsettings set org.gnome.shell disable-user-extensions false")
+def live_state_generation():
+    """Muda sempre que o estado das extensões ou do dconf muda"""
+    return (extension_state.generation, dconf_cache.generation)
 
-def create_backup():
-    """Cria um backup das configurações atuais"""
-    backup_data = {
-        "extensions": {}
-    }
+def precompute_plan(profile_name):
+    """Calcula e guarda o plano de um perfil antes de ele ser escolhido
     
-    for ext_key, ext_id in EXTENSIONS.items():
-        backup_data["extensions"][ext_key] = check_extension_installed(ext_id)
+    Chamada fora do main loop (ao passar o mouse ou focar o tile). Sem
+    watch_live_state não há como saber se o plano envelheceu, então nada
+    é guardado.
+    """
+    if not _watching_live_state:
+        return
     
-    backup_path = os.path.expanduser("~/.gnome_customizer_backup.json")
-    with open(backup_path, 'w') as f:
-        json.dump(backup_data, f)
+    # A geração é lida antes do plano: uma mudança durante o cálculo o invalida
+    generation = live_state_generation()
+    with _precomputed_lock:
+        cached = _precomputed_plans.get(profile_name)
+        if (cached is not None and cached[0] == generation) or profile_name in _precomputing:
+            return
+        computing = _precomputing[profile_name] = threading.Event()
     
-    return backup_path
+    try:
+        plan = plan_apply(profile_name)
+        if plan is not None:
+            with _precomputed_lock:
+                _precomputed_plans[profile_name] = (generation, *plan)
+    finally:
+        with _precomputed_lock:
+            del _precomputing[profile_name]
+        computing.set()
 
-def restore_backup():
-    """Restaura configurações do backup"""
-    backup_path = os.path.expanduser("~/.gnome_customizer_backup.json")
+def take_precomputed_plan(profile_name):
+    """(etapas, delta) calculados antes do clique, ou None se não houver ou o estado mudou
     
-    if not os.path.exists(backup_path):
-        return False
+    Se o plano ainda está sendo calculado, espera por ele.
+    """
+    with _precomputed_lock:
+        computing = _precomputing.get(profile_name)
+    if computing is not None:
+        computing.wait()
     
-    try:
-        with open(backup_path, 'r') as f:
-            backup_data = json.load(f)
-        
-        # Restaurar extensões
-        for ext_key, is_enabled in backup_data["extensions"].items():
-            ext_id = EXTENSIONS[ext_key]
-            if check_extension_installed(ext_id):
-                if is_enabled:
-                    run_cmd(f"gnome-extensions enable {ext_id}")
-                else:
-                    run_cmd(f"gnome-extensions disable {ext_id}")
-        
-        reload_gnome_shell()
-        return True
-    except Exception as e:
-        print(f"Erro ao restaurar backup: {e}")
-        return False
+    with _precomputed_lock:
+        cached = _precomputed_plans.pop(profile_name, None)
+    if cached is None or cached[0] != live_state_generation():
+        return None
+    return cached[1], cached[2]
 
-# ===========================
-# INTERFACE GTK
-# ===========================
-class LoadingScreen(Gtk.Window):
-    def __init__(self, parent):
-        super().__init__(title="Trocando o tema")
-        self.set_decorated(False)
-        self.set_modal(True)
-        self.set_transient_for(parent)
-        self.set_position(Gtk.WindowPosition.CENTER)
-        self.set_default_size(400, 200)
-        
-        # Fundo laranja
-        orange_rgba = Gdk.RGBA()
-        orange_rgba.parse("rgba(255,165,0,0.95)")
-        
-        self.override_background_color(Gtk.StateFlags.NORMAL, orange_rgba)
-        
-        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
-        box.set_valign(Gtk.Align.CENTER)
-        box.set_halign(Gtk.Align.CENTER)
-        
-        # Spinner
-        self.spinner = Gtk.Spinner()
-        self.spinner.set_size_request(64, 64)
-        self.spinner.start()
-        box.pack_start(self.spinner, False, False, 0)
-        
-        # Label
-        self.label = Gtk.Label(label="Trocando o tema...")
-        self.label.set_name("loading-label")
-        css = b"#loading-label { font-size: 20px; color: white; font-weight: bold; }"
-        css_provider = Gtk.CssProvider()
-        css_provider.load_from_data(css)
-        self.label.get_style_context().add_provider(css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
-        box.pack_start(self.label, False, False, 0)
-        
-        self.add(box)
-        self.set_opacity(0.0)  # Inicia transparente
+def run_steps(steps, progress_callback=None, timeout=STATE_CHANGE_TIMEOUT, done=(), delta=None, cancelled=None):
+    """Executa as etapas ainda não concluídas, registrando cada uma no diário
+    
+    Cada etapa de extensões termina quando o Shell confirma o novo estado
+    (sinal ExtensionStateChanged) ou quando `timeout` segundos se passam.
+    `progress_callback(mensagem, fração, segundos restantes)` é chamada no
+    thread que executa as etapas a cada avanço (a interface encaminha para
+    o main loop). `delta` são os valores tipados da etapa dconf; sem ele
+    (retomada pelo diário) os valores são lidos do texto da etapa.
+    `cancelled()` é consultada antes de cada etapa. Retorna False se a
+    gravação dconf falhar e None se a execução for cancelada.
+    """
+    remaining = [(index, step) for index, step in enumerate(steps) if index not in done]
+    progress = ApplyProgress([step for index, step in remaining], step_history, progress_callback)
+    
+    for position, (index, step) in enumerate(remaining):
+        if cancelled is not None and cancelled():
+            step_history.save()
+            return None
         
-    def show_with_animation(self):
-        """Mostra a tela com animação de fade in"""
-        self.show_all()
+        progress.begin(position, step["message"])
+        kind = step["kind"]
+        start = time.perf_counter()
         
-        # Animação de fade in
-        for i in range(10):
-            opacity = i * 0.1
-            GLib.timeout_add(i * 30, self.set_opacity, opacity)
+        if kind in ("disable", "enable"):
+            # Desabilita apenas as extensões que não fazem parte do perfil e
+            # habilita apenas as (do perfil e padrão) que estão desabilitadas
+            enabled = kind == "enable"
+            # Na retomada ou no desfazer parte do grupo pode já estar no estado
+            # alvo; o Shell não emite sinal para essas e a espera iria até o timeout
+            ext_ids = [ext_id for ext_id in step["ext_ids"] if is_enabled(ext_id) != enabled]
+            durations = {}
+            
+            def on_confirmed(ext_id, seconds):
+                durations[f"{kind}:{ext_id}"] = seconds
+                progress.advance(position, len(durations) / len(ext_ids))
+            
+            with tracer.span(f"{'habilitar' if enabled else 'desabilitar'} extensões", "phase",
+                             count=len(ext_ids)):
+                if ext_ids:
+                    set_extensions_enabled(ext_ids, enabled, timeout, on_confirmed)
         
-    def hide_with_animation(self):
-        """Esconde a tela com animação de fade out"""
-        # Animação de fade out
-        for i in range(10):
-            opacity = 1.0 - (i * 0.1)
-            GLib.timeout_add(i * 30, self.set_opacity, opacity)
+        elif kind == "dconf":
+            with tracer.span("aplicar configurações", "phase", keys=len(step["changes"])):
+                step_delta = delta
+                if step_delta is None:
+                    step_delta = {
+                        key: (text_to_value(step["previous"].get(key)), text_to_value(text))
+                        for key, text in step["changes"].items()
+                    }
+                if not write_dconf_delta(step_delta):
+                    return False
+            durations = {step["key"]: time.perf_counter() - start}
         
-        GLib.timeout_add(300, self.destroy)
-
-class CustomizerWindow(Gtk.Window):
-    def __init__(self):
-        super().__init__(title="Personalizador de Ambiente GNOME")
-        self.set_border_width(15)
-        self.set_default_size(700, 500)
-        self.set_position(Gtk.WindowPosition.CENTER)
+        journal.mark_done(index)
+        progress.finish(position, durations)
+    
+    step_history.save()
+    return True
+
+def apply_mode(profile_name, progress_callback=None, timeout=STATE_CHANGE_TIMEOUT, cancelled=None):
+    """Aplica um perfil de configuração
+    
+    Usa o plano calculado por precompute_plan se o estado não mudou desde
+    então. O plano completo vai para o diário antes da primeira etapa; se a
+    troca for interrompida, recover_interrupted retoma ou desfaz o que faltou.
+    Cancelada entre duas etapas (`cancelled()` verdadeira), retorna None e
+    deixa o diário para rollback_cancelled. Normalmente chamada pelo
+    apply_scheduler.
+    """
+    # Cada troca começa um trace novo: no daemon e na janela, que ficam
+    # abertos, o trace guarda a última troca em vez de crescer sem limite
+    tracer.clear()
+    with tracer.span(f"apply_mode {profile_name}", "phase", profile=profile_name):
+        plan = take_precomputed_plan(profile_name) or plan_apply(profile_name)
+        if plan is None:
+            print(f"Não foi possível aplicar {profile_name}: o estado atual não pôde ser lido")
+            return False
+        steps, delta = plan
+        try:
+            journal.begin(profile_name, steps)
+        except JournalBusy as e:
+            print(f"Não foi possível aplicar {profile_name}: {e}")
+            return False
         
-        # Configurar ícone da janela
+        success = False
         try:
-            icon_path = get_resource_path("icon_app.png")
-            if os.path.exists(icon_path):
-                self.set_icon_from_file(icon_path)
+            success = run_steps(steps, progress_callback, timeout, delta=delta, cancelled=cancelled)
+        finally:
+            # Sem sucesso (falha, exceção ou cancelamento) o diário fica para
+            # recover_interrupted, mas a trava não pode segurar outros processos
+            if success:
+                journal.clear()
             else:
-                self.set_icon_name("system-settings")
-        except:
-            self.set_icon_name("system-settings")
-        
-        # Criar notebook (abas)
-        self.notebook = Gtk.Notebook()
-        self.add(self.notebook)
-        
-        # Aba de experiências
-        exp_box = self.create_experiences_tab()
-        self.notebook.append_page(exp_box, Gtk.Label(label="Experiências"))
-        
-        # Aba de utilitários
-        utils_box = self.create_utils_tab()
-        self.notebook.append_page(utils_box, Gtk.Label(label="Utilitários"))
-        
-        # Status bar
-        self.statusbar = Gtk.Statusbar()
-        self.statusbar.push(0, "Pronto")
-        
-        # Progress bar (inicialmente oculta)
-        self.progressbar = Gtk.ProgressBar()
-        self.progressbar.set_visible(False)
-        
-        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        main_box.pack_start(self.notebook, True, True, 0)
-        main_box.pack_start(self.progressbar, False, False, 0)
-        main_box.pack_start(self.statusbar, False, False, 0)
-        self.add(main_box)
-        
-        # Fazer backup inicial
-        self.backup_path = create_backup()
-        self.update_status(f"Backup criado em: {self.backup_path}")
-
-    def create_experiences_tab(self):
-        # Usar Grid para organizar em tiles
-        grid = Gtk.Grid()
-        grid.set_column_homogeneous(True)
-        grid.set_row_homogeneous(True)
-        grid.set_column_spacing(10)
-        grid.set_row_spacing(10)
-        grid.set_border_width(10)
-        
-        # Informação sobre extensões padrão
-        info_label = Gtk.Label()
-        info_label.set_markup("<b>Extensões sempre habilitadas:</b> Compiz, Cube, GSConnect, Emoji, Tiling, AppIndicators, Blur")
-        info_label.set_halign(Gtk.Align.START)
-        
-        # Adicionar botões de experiências em tiles
-        profiles_list = list(PROFILES.items())
-        for i, (profile_key, profile_data) in enumerate(profiles_list):
-            btn = self.create_tile_button(profile_data["name"], profile_data["icon"])
-            btn.connect("clicked", self.on_experience_selected, profile_key)
-            
-            # Calcular posição na grid (2 colunas)
-            row = i // 2
-            col = i % 2
-            grid.attach(btn, col, row, 1, 1)
-        
-        # Container principal
-        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
-        box.pack_start(info_label, False, False, 0)
-        box.pack_start(grid, True, True, 0)
-        
-        return box
+                journal.release()
+    
+    return success
 
-    def create_tile_button(self, label, icon_name):
-        """Cria um botão tile com ícone e label"""
-        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
-        box.set_border_width(10)
-        
-        # Ícone
+def undo_steps(steps, done, interrupted=True):
+    """Etapas que desfazem as concluídas e a que foi interrompida, na ordem inversa
+    
+    Com `interrupted` falso (troca cancelada entre duas etapas) a etapa
+    seguinte às concluídas não chegou a rodar e fica de fora.
+    """
+    pending = [index for index in range(len(steps)) if index not in done]
+    touched = sorted(set(done) | set(pending[:1] if interrupted else []), reverse=True)
+    
+    undo = []
+    for index in touched:
+        step = steps[index]
+        if step["kind"] in ("disable", "enable"):
+            undo.append({
+                "kind": "enable" if step["kind"] == "disable" else "disable",
+                "ext_ids": step["ext_ids"],
+                "message": "Desfazendo extensões...",
+            })
+        elif step["kind"] == "dconf":
+            undo.append({
+                "kind": "dconf",
+                "key": step["key"],
+                "message": "Restaurando configurações...",
+                "changes": step["previous"],
+                "previous": step["changes"],
+            })
+    return undo
+
+def recover_interrupted(resume, progress_callback=None, timeout=STATE_CHANGE_TIMEOUT):
+    """Trata uma troca interrompida encontrada no diário
+    
+    resume verdadeiro executa apenas as etapas que faltaram; falso desfaz
+    as que chegaram a rodar. Retorna False se não houver troca pendente
+    ou se a gravação dconf falhar.
+    """
+    entry = journal.pending()
+    if entry is None:
+        return False
+    return recover_entry(entry, resume, progress_callback, timeout)
+
+def rollback_cancelled(progress_callback=None, timeout=STATE_CHANGE_TIMEOUT):
+    """Desfaz as etapas concluídas da troca que o apply_scheduler acabou de cancelar"""
+    entry = journal.stopped()
+    if entry is None:
+        return False
+    return recover_entry(entry, False, progress_callback, timeout, interrupted=False)
+
+def recover_entry(entry, resume, progress_callback=None, timeout=STATE_CHANGE_TIMEOUT, interrupted=True):
+    """Retoma ou desfaz a troca de uma entrada do diário (veja undo_steps para `interrupted`)"""
+    steps, done = entry["steps"], set(entry["done"])
+    with tracer.span(f"{'retomar' if resume else 'desfazer'} {entry['profile']}", "phase"):
         try:
-            pixbuf = get_icon_pixbuf(icon_name, 64)
-            image = Gtk.Image.new_from_pixbuf(pixbuf)
-        except:
-            image = Gtk.Image.new_from_icon_name("application-x-executable", Gtk.IconSize.DIALOG)
-        
-        # Label
-        label_widget = Gtk.Label(label=label)
-        label_widget.set_max_width_chars(20)
-        label_widget.set_line_wrap(True)
-        label_widget.set_justify(Gtk.Justification.CENTER)
-        
-        box.pack_start(image, False, False, 0)
-        box.pack_start(label_widget, False, False, 0)
-        
-        # Botão
-        button = Gtk.Button()
-        button.add(box)
-        button.set_size_request(150, 150)
+            if resume:
+                journal.resume(entry)
+            else:
+                steps, done = undo_steps(steps, done, interrupted), set()
+                journal.begin(entry["profile"], steps)
+        except JournalBusy as e:
+            print(f"Não foi possível recuperar a troca para {entry['profile']}: {e}")
+            return False
         
-        return button
+        success = False
+        try:
+            success = run_steps(steps, progress_callback, timeout, done)
+        finally:
+            if success:
+                journal.clear()
+            else:
+                journal.release()
+    
+    return success
 
-    def create_utils_tab(self):
-        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
-        box.set_border_width(10)
-        
-        # Botão de backup
-        btn_backup = Gtk.Button.new_with_label("Criar Backup Atual")
-        btn_backup.connect("clicked", self.on_create_backup)
-        box.pack_start(btn_backup, False, False, 0)
-        
-        # Botão de restore
-        btn_restore = Gtk.Button.new_with_label("Restaurar Backup")
-        btn_restore.connect("clicked", self.on_restore_backup)
-        box.pack_start(btn_restore, False, False, 0)
-        
-        # Botão de recarregar GNOME
-        btn_reload = Gtk.Button.new_with_label("Recarregar GNOME Shell")
-        btn_reload.connect("clicked", self.on_reload_gnome)
-        box.pack_start(btn_reload, False, False, 0)
-        
-        # Verificar extensões
-        btn_check_ext = Gtk.Button.new_with_label("Verificar Extensões")
-        btn_check_ext.connect("clicked", self.on_check_extensions)
-        box.pack_start(btn_check_ext, False, False, 0)
-        
-        return box
+# Todas as trocas (janela, linha de comando e daemon) passam por esta fila
+apply_scheduler = ApplyScheduler(apply_mode, rollback_cancelled)
 
-    def on_experience_selected(self, widget, profile_name):
-        """Aplica uma experiência em uma thread separada para não travar a UI"""
-        # Mostrar tela de loading
-        self.loading_screen = LoadingScreen(self)
-        self.loading_screen.show_with_animation()
-        
-        # Aplicar mudanças após um breve delay para a animação
-        GLib.timeout_add(500, self.start_experience_application, profile_name)
-
-    def start_experience_application(self, profile_name):
-        """Inicia a aplicação da experiência após a animação"""
-        self.set_sensitive(False)
-        self.progressbar.set_visible(True)
-        self.progressbar.set_text("Preparando...")
-        
-        thread = threading.Thread(target=self.apply_experience_thread, args=(profile_name,))
-        thread.daemon = True
-        thread.start()
-
-    def apply_experience_thread(self, profile_name):
-        """Thread para aplicar experiência com feedback de progresso"""
-        def progress_callback(message):
-            GLib.idle_add(self.update_progress, message)
-        
-        # Pequeno delay para suavizar a transição
-        time.sleep(0.5)
-        
-        success = apply_mode(profile_name, progress_callback)
-        
-        GLib.idle_add(self.on_experience_applied, profile_name, success)
+def reload_gnome_shell(ext_ids=None, timeout=STATE_CHANGE_TIMEOUT):
+    """Recarrega extensões do GNOME Shell sem religar todas as do usuário
+    
+    ext_ids: extensões a recarregar; None recarrega todas as extensões
+    gerenciadas (EXTENSIONS) que estão habilitadas. Só as habilitadas são
+    desligadas e religadas, em lote, e cada fase aguarda a confirmação do
+    Shell, limitada por `timeout` segundos. Retorna False se o Shell não
+    responder ou alguma extensão não voltar a ficar habilitada.
+    """
+    if extension_state.refresh() is None:
+        return False
+    if ext_ids is None:
+        ext_ids = EXTENSIONS.values()
+    
+    enabled = [ext_id for ext_id in ext_ids if is_enabled(ext_id)]
+    if not enabled:
+        return True
+    
+    extension_state.set_enabled({ext_id: False for ext_id in enabled}, timeout)
+    return not extension_state.set_enabled({ext_id: True for ext_id in enabled}, timeout)
 
-    def update_progress(self, message):
-        """Atualiza a barra de progresso (chamada da thread principal)"""
-        self.progressbar.set_text(message)
-        self.progressbar.pulse()
+def capture_state():
+    """Estado atual das extensões gerenciadas e das suas subárvores dconf (SETTINGS_PATHS)
+    
+    Retorna o conteúdo de um snapshot, ou None se alguma leitura falhar.
+    """
+    if extension_state.refresh() is None:
+        return None
+    state = {
+        "extensions": {
+            ext_id: is_enabled(ext_id)
+            for ext_id in EXTENSIONS.values()
+            if check_extension_installed(ext_id)
+        },
+        "dconf": {}
+    }
+    
+    for path, values in dconf_cache.read_many(SETTINGS_PATHS.values(), strict=True).items():
+        if values is None:
+            return None
+        state["dconf"][path] = {key: value.print_(True) for key, value in values.items()}
+    
+    return state
+
+def create_backup(label="manual"):
+    """Cria um ponto de restauração com o estado atual
+    
+    Retorna o identificador do snapshot (o mesmo do anterior se nada mudou)
+    ou None em caso de erro.
+    """
+    state = capture_state()
+    if state is None:
+        print("Erro ao criar backup: não foi possível ler o estado atual")
+        return None
+    
+    try:
+        snapshot_id, created = snapshot_store.take(state, label)
+    except OSError as e:
+        print(f"Erro ao gravar backup: {e}")
+        return None
+    
+    if not created:
+        print(f"Backup {snapshot_id[:12]} já corresponde ao estado atual")
+    return snapshot_id
+
+def plan_restore(state):
+    """Diferença entre o estado atual e o conteúdo de um snapshot
+    
+    Retorna ({uuid: habilitar}, {chave: (valor_atual, valor_do_snapshot)}),
+    com None como valor do snapshot para as chaves que ele não tinha, ou
+    None se não foi possível ler o estado atual.
+    """
+    if extension_state.refresh() is None:
+        return None
+    extension_changes = {
+        ext_id: enabled
+        for ext_id, enabled in state["extensions"].items()
+        if check_extension_installed(ext_id) and is_enabled(ext_id) != enabled
+    }
+    
+    delta = {}
+    current_values = dconf_cache.read_many(state["dconf"], strict=True)
+    for path, values in state["dconf"].items():
+        current = current_values[path]
+        if current is None:
+            return None
+        wanted = {key: None for key in current}
+        for key, text in values.items():
+            wanted[key] = GLib.Variant.parse(None, text, None, None)
+        delta.update(diff_values(wanted, current))
+    
+    return extension_changes, delta
+
+def restore_state(state, timeout=STATE_CHANGE_TIMEOUT):
+    """Reaplica apenas o que difere do estado `state`
+    
+    Configurações e extensões são aplicadas cada uma em um único lote; as
+    configurações vão primeiro, então as extensões religadas já sobem com
+    os valores do backup, sem recarga.
+    """
+    planned = plan_restore(state)
+    if planned is None:
+        return False
+    extension_changes, delta = planned
+    
+    if delta and not write_dconf_delta(delta):
         return False
+    
+    if extension_changes:
+        not_confirmed = extension_state.set_enabled(extension_changes, timeout)
+        for ext_id in not_confirmed:
+            print(f"Aviso: {ext_id} não confirmou o estado do backup")
+    return True
 
-    def on_experience_applied(self, profile_name, success):
-        """Callback quando a experiência é aplicada"""
-        # Esconder tela de loading com animação
-        if hasattr(self, 'loading_screen'):
-            self.loading_screen.hide_with_animation()
-        
-        # Pequeno delay antes de reativar a interface
-        GLib.timeout_add(500, self.finalize_experience_application, profile_name, success)
+def restore_backup(snapshot_id=None):
+    """Restaura um ponto de restauração (o mais recente se não informado)"""
+    if snapshot_id is None:
+        latest = snapshot_store.latest()
+        if latest is None:
+            return restore_legacy_backup()
+        snapshot_id = latest["id"]
+    
+    state = snapshot_store.load(snapshot_id)
+    if state is None:
+        return False
+    
+    try:
+        return restore_state(state)
+    except Exception as e:
+        print(f"Erro ao restaurar backup: {e}")
+        return False
 
-    def finalize_experience_application(self, profile_name, success):
-        """Finaliza a aplicação da experiência"""
-        self.set_sensitive(True)
-        self.progressbar.set_visible(False)
-        
-        if success:
-            profile = PROFILES[profile_name]
-            self.show_info(
-                f"Experiência {profile['name']} aplicada com sucesso!\n\n"
-                f"Extensões habilitadas:\n- {', '.join(profile['extensions'])}\n- {', '.join(ALWAYS_ENABLED_EXTENSIONS)}"
-            )
-            self.update_status(f"Experiência {profile['name']} aplicada")
-        else:
-            self.show_error("Erro ao aplicar experiência. Verifique se as extensões estão instaladas.")
-
-    def on_create_backup(self, widget):
-        self.backup_path = create_backup()
-        self.show_info(f"Backup criado em: {self.backup_path}")
-        self.update_status("Backup criado")
-
-    def on_restore_backup(self, widget):
-        success = restore_backup()
-        if success:
-            self.show_info("Backup restaurado com sucesso!")
-            self.update_status("Backup restaurado")
-        else:
-            self.show_error("Erro ao restaurar backup ou backup não encontrado")
+def restore_legacy_backup():
+    """Recusa o backup no formato antigo (~/.gnome_customizer_backup.json)
+    
+    Esse formato só registrava quais extensões estavam instaladas, não quais
+    estavam habilitadas nem as configurações dconf: não há o que restaurar.
+    """
+    backup_path = os.path.expanduser(LEGACY_BACKUP_PATH)
+    
+    if os.path.exists(backup_path):
+        print(f"O backup {backup_path} é do formato antigo, que só registra quais extensões "
+              "estavam instaladas, e não pode ser restaurado. Crie um novo backup.")
+    return False
 
-    def on_reload_gnome(self, widget):
-        self.update_status("Recarregando GNOME Shell...")
-        reload_gnome_shell()
-        self.show_info("GNOME Shell recarregado")
-        self.update_status("GNOME Shell recarregado")
+def deploy_profile(profile_name, db_name=DEPLOY_DB_NAME, lock=False, dconf_dir=SYSTEM_DCONF_DIR):
+    """Grava o perfil como banco dconf do sistema, para todos os usuários
+    
+    O keyfile leva as configurações do perfil e a lista enabled-extensions
+    do GNOME Shell; com `lock` todas essas chaves ficam travadas. As
+    extensões precisam estar instaladas para todo o sistema. Retorna True
+    se o banco foi compilado.
+    """
+    values = {}
+    for changes in profile_configs(profile_name).values():
+        values.update(changes)
+    
+    ext_ids = [EXTENSIONS[ext_key] for ext_key in profile_extension_keys(profile_name)]
+    values[SHELL_ENABLED_EXTENSIONS_KEY] = GLib.Variant("as", ext_ids)
+    values[SHELL_DISABLE_USER_EXTENSIONS_KEY] = GLib.Variant("b", False)
+    
+    try:
+        keyfile_path = write_system_database(
+            db_name, DEPLOY_KEYFILE, values, values.keys() if lock else (), dconf_dir
+        )
+    except OSError as e:
+        print(f"Erro ao gravar o banco dconf {db_name}: {e}")
+        return False
+    print(f"{len(values)} chaves gravadas em {keyfile_path}")
+    
+    if not compile_system_database(db_name, dconf_dir):
+        return False
+    
+    # Sem o perfil dconf apontando para o banco as sessões não o leem
+    profile_path = os.path.join(dconf_dir, "profile", "user")
+    if not os.path.exists(profile_path):
+        try:
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            with open(profile_path, "w") as f:
+                f.write(f"user-db:user\nsystem-db:{db_name}\n")
+            print(f"Perfil dconf criado em {profile_path}")
+        except OSError as e:
+            print(f"Erro ao criar {profile_path}: {e}")
+            return False
+    elif not profile_uses_database(db_name, "user", dconf_dir):
+        print(f"Aviso: {profile_path} não inclui 'system-db:{db_name}'; o banco não será lido")
+    
+    return True
+
+def save_trace():
+    """Grava o trace das trocas de perfil, se --trace foi usado"""
+    if TRACE_PATH:
+        try:
+            tracer.write(TRACE_PATH)
+        except OSError as e:
+            print(f"Erro ao gravar trace em {TRACE_PATH}: {e}")
+
+# ===========================
+# LINHA DE COMANDO
+# ===========================
+# Códigos de saída
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_NOT_FOUND = 3
+EXIT_CANCELLED = 130
+
+def print_progress():
+    """Callback de progresso para o terminal: uma linha por etapa"""
+    last = [None]
+    
+    def progress_callback(message, fraction, eta):
+        if message != last[0] or fraction >= 1.0:
+            last[0] = message
+            print(f"[{fraction:4.0%}] {message}", flush=True)
+    
+    return progress_callback
+
+def find_snapshot(prefix):
+    """Snapshot cujo identificador começa com `prefix`, ou None se não houver um único"""
+    matches = [entry for entry in snapshot_store.list() if entry["id"].startswith(prefix)]
+    return matches[0] if len(matches) == 1 else None
+
+def current_status():
+    """Estado resumido: extensões instaladas (habilitada ou não), perfis
+    compatíveis, último backup e troca interrompida (perfil, concluídas, total)
+    
+    Com o GNOME Shell fora do barramento "extensions" é None e "profiles" vazio.
+    """
+    shell_available = extension_state.refresh() is not None
+    entry = journal.pending()
+    latest = snapshot_store.latest()
+    return {
+        "extensions": {
+            ext_key: is_enabled(ext_id)
+            for ext_key, ext_id in EXTENSIONS.items()
+            if check_extension_installed(ext_id)
+        } if shell_available else None,
+        "profiles": [
+            profile_id for profile_id in PROFILES if not plan_extensions(profile_id)
+        ] if shell_available else [],
+        "snapshot": latest["id"] if latest else None,
+        "interrupted": (entry["profile"], len(entry["done"]), len(entry["steps"])) if entry else None,
+    }
+
+def daemon_client(args):
+    """Cliente do daemon da sessão, se ele estiver rodando e nem --local nem --trace foram usados
+    
+    As trocas feitas pelo daemon não passam pelo tracer deste processo, então
+    --trace implica --local.
+    """
+    if args.local or args.trace:
+        return None
+    from daemon import DaemonClient
+    client = DaemonClient()
+    return client if client.available() else None
+
+def cmd_apply(args):
+    if args.profile not in PROFILES:
+        print(f"Perfil desconhecido: {args.profile}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    
+    progress_callback = None if args.quiet else print_progress()
+    client = daemon_client(args)
+    if client is not None:
+        success = client.apply_profile(args.profile, progress_callback)
+    else:
+        request = apply_scheduler.submit(args.profile, progress_callback)
+        try:
+            request.wait()
+        except KeyboardInterrupt:
+            # Ctrl+C: a troca para entre duas etapas e o que já foi feito é desfeito
+            print("Cancelando a troca...", file=sys.stderr)
+            apply_scheduler.cancel()
+            request.wait()
+        success = None if request.cancelled() and not request.result else request.result
+    
+    if success is None:
+        return EXIT_CANCELLED
+    return EXIT_OK if success else EXIT_FAILURE
+
+def cmd_list(args):
+    if args.snapshots:
+        for entry in reversed(snapshot_store.list()):
+            created = datetime.fromtimestamp(entry["created"]).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{entry['id'][:12]}  {created}  {entry['label']}")
+        return EXIT_OK
+    
+    client = daemon_client(args)
+    if client is not None:
+        profiles = client.list_profiles()
+        if profiles is None:
+            return EXIT_FAILURE
+    else:
+        profiles = [(profile_id, profile["name"], profile["extensions"]) for profile_id, profile in PROFILES.items()]
+    
+    for profile_id, name, extensions in profiles:
+        print(f"{profile_id}\t{name}\t{', '.join(extensions)}")
+    return EXIT_OK
 
-    def on_check_extensions(self, widget):
-        """Verifica se as extensões necessárias estão instaladas"""
-        missing_extensions = []
+def cmd_status(args):
+    client = daemon_client(args)
+    status = client.status() if client is not None else current_status()
+    if status is None:
+        return EXIT_FAILURE
+    
+    if status["extensions"] is None:
+        print("GNOME Shell indisponível: estado das extensões desconhecido")
+    else:
+        for ext_key in EXTENSIONS:
+            if ext_key not in status["extensions"]:
+                state = "não instalada"
+            else:
+                state = "habilitada" if status["extensions"][ext_key] else "desabilitada"
+            print(f"{ext_key:<14} {state}")
         
-        for ext_key, ext_id in EXTENSIONS.items():
-            if not check_extension_installed(ext_id):
-                missing_extensions.append(ext_id)
+        matching = status["profiles"]
+        print(f"\nPerfis com estas extensões: {', '.join(matching) if matching else 'nenhum'}")
+    print(f"Último backup: {status['snapshot'][:12] if status['snapshot'] else 'nenhum'}")
+    if client is not None:
+        print("Daemon da sessão: rodando")
+    
+    if status["interrupted"] is not None:
+        profile_id, done, total = status["interrupted"]
+        print(f"Troca interrompida: {profile_id} ({done} de {total} etapas concluídas)")
+        return EXIT_FAILURE
+    return EXIT_OK if status["extensions"] is not None else EXIT_FAILURE
+
+def cmd_backup(args):
+    client = daemon_client(args)
+    snapshot_id = client.snapshot(args.label) if client is not None else create_backup(args.label)
+    if snapshot_id is None:
+        return EXIT_FAILURE
+    print(snapshot_id)
+    return EXIT_OK
+
+def cmd_restore(args):
+    snapshot_id = None
+    if args.snapshot:
+        entry = find_snapshot(args.snapshot)
+        if entry is None:
+            print(f"Backup não encontrado ou ambíguo: {args.snapshot}", file=sys.stderr)
+            return EXIT_NOT_FOUND
+        snapshot_id = entry["id"]
+    
+    client = daemon_client(args)
+    success = client.restore(snapshot_id) if client is not None else restore_backup(snapshot_id)
+    return EXIT_OK if success else EXIT_FAILURE
+
+def cmd_deploy(args):
+    if args.profile not in PROFILES:
+        print(f"Perfil desconhecido: {args.profile}", file=sys.stderr)
+        return EXIT_NOT_FOUND
+    
+    success = deploy_profile(args.profile, args.db, args.lock, args.dconf_dir)
+    return EXIT_OK if success else EXIT_FAILURE
+
+def cmd_daemon(args):
+    from daemon import run_daemon
+    return EXIT_OK if run_daemon() == 0 else EXIT_FAILURE
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Personalizador de Ambiente GNOME",
+        epilog="Sem comando abre a interface gráfica. Códigos de saída: 0 sucesso, "
+               "1 falha, 2 uso incorreto, 3 perfil ou backup não encontrado, 130 troca cancelada (Ctrl+C)."
+    )
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Grava as etapas da última troca de perfil em FILE (formato Chrome trace-event); "
+                             "implica --local")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Mostra cada chave dconf gravada (valor anterior e novo)")
+    parser.add_argument("--local", action="store_true",
+                        help="Executa neste processo mesmo com o daemon da sessão rodando")
+    commands = parser.add_subparsers(dest="command", metavar="COMANDO")
+    
+    apply_parser = commands.add_parser("apply", help="Aplica um perfil")
+    apply_parser.add_argument("profile", help="Identificador do perfil (veja o comando list)")
+    apply_parser.add_argument("-q", "--quiet", action="store_true", help="Não mostra o progresso")
+    apply_parser.set_defaults(func=cmd_apply)
+    
+    list_parser = commands.add_parser("list", help="Lista os perfis disponíveis")
+    list_parser.add_argument("--snapshots", action="store_true", help="Lista os backups em vez dos perfis")
+    list_parser.set_defaults(func=cmd_list)
+    
+    status_parser = commands.add_parser("status", help="Mostra o estado das extensões e do último backup")
+    status_parser.set_defaults(func=cmd_status)
+    
+    backup_parser = commands.add_parser("backup", help="Cria um backup do estado atual")
+    backup_parser.add_argument("--label", default="manual", help="Descrição do backup")
+    backup_parser.set_defaults(func=cmd_backup)
+    
+    restore_parser = commands.add_parser("restore", help="Restaura um backup (o mais recente por padrão)")
+    restore_parser.add_argument("snapshot", nargs="?", help="Identificador (ou prefixo) do backup")
+    restore_parser.set_defaults(func=cmd_restore)
+    
+    deploy_parser = commands.add_parser(
+        "deploy", help="Grava um perfil no banco dconf do sistema (para todos os usuários; requer root)"
+    )
+    deploy_parser.add_argument("profile", help="Identificador do perfil (veja o comando list)")
+    deploy_parser.add_argument("--db", default=DEPLOY_DB_NAME, help="Nome do banco dconf do sistema")
+    deploy_parser.add_argument("--lock", action="store_true", help="Trava as chaves do perfil")
+    deploy_parser.add_argument("--dconf-dir", default=SYSTEM_DCONF_DIR, help=argparse.SUPPRESS)
+    deploy_parser.set_defaults(func=cmd_deploy)
+    
+    daemon_parser = commands.add_parser(
+        "daemon", help="Roda o daemon da sessão (estado em memória, controle via D-Bus)"
+    )
+    daemon_parser.set_defaults(func=cmd_daemon)
+    
+    return parser
+
+def main(argv=None):
+    global TRACE_PATH, VERBOSE
+    try:
+        args = build_parser().parse_args(argv)
+    except SystemExit as e:
+        # O argparse já mostrou o uso (ou a ajuda, com código 0)
+        return EXIT_OK if e.code == 0 else EXIT_USAGE
+    
+    if args.trace:
+        TRACE_PATH = args.trace
+        tracer.enabled = True
+    VERBOSE = args.verbose
+    
+    if args.command is None:
+        # Verificar se estamos no GNOME
+        desktop_env = os.environ.get("XDG_CURRENT_DESKTOP", "").lower()
+        if "gnome" not in desktop_env:
+            print("Aviso: Este script é otimizado para GNOME Desktop")
         
-        if missing_extensions:
-            message = "Extensões não encontradas:\n\n" + "\n".join(missing_extensions)
-            message += "\n\nInstale-as através do GNOME Extensions ou via navegador."
-            self.show_error(message)
-        else:
-            self.show_info("Todas as extensões estão instaladas!")
-
-    def update_status(self, message):
-        self.statusbar.pop(0)
-        self.statusbar.push(0, message)
-
-    def show_info(self, message):
-        dialog = Gtk.MessageDialog(
-            parent=self,
-            flags=0,
-            message_type=Gtk.MessageType.INFO,
-            buttons=Gtk.ButtonsType.OK,
-            text=message
-        )
-        dialog.run()
-        dialog.destroy()
-
-    def show_error(self, message):
-        dialog = Gtk.MessageDialog(
-            parent=self,
-            flags=0,
-            message_type=Gtk.MessageType.ERROR,
-            buttons=Gtk.ButtonsType.OK,
-            text=message
-        )
-        dialog.run()
-        dialog.destroy()
+        # O GTK só é carregado quando a janela é pedida
+        from interface import run_gui
+        run_gui()
+        status = EXIT_OK
+    else:
+        status = args.func(args)
+    
+    save_trace()
+    return status
 
 # ===========================
 # MAIN
 # ===========================
 if __name__ == "__main__":
-    # Verificar se estamos no GNOME
-    desktop_env = os.environ.get("XDG_CURRENT_DESKTOP", "").lower()
-    if "gnome" not in desktop_env:
-        print("Aviso: Este script é otimizado para GNOME Desktop")
-    
-    win = CustomizerWindow()
-    win.connect("destroy", Gtk.main_quit)
-    win.show_all()
-    Gtk.main()
\ No newline at end of file
+    # A interface importa "index"; sem isto o módulo seria carregado uma segunda vez
+    sys.modules["index"] = sys.modules[__name__]
+    sys.exit(main())
@@ -0,0 +1,699 @@
+#!/usr/bin/env python3
+"""Interface GTK do GNOME Customizer (carregada só quando a janela é pedida)"""
+import gi
+import os
+import threading
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, Gdk, GdkPixbuf, GLib
+from files import atomic_write
+from profiles import user_cache_dir
+from daemon import DaemonClient
+from tracing import tracer
+from index import (
+    ALWAYS_ENABLED_EXTENSIONS, EXTENSIONS, PROFILES, apply_scheduler, check_extension_installed,
+    create_backup, extension_state, get_resource_path, journal, precompute_plan, recover_interrupted,
+    reload_gnome_shell, reset_extensions, restore_backup, save_trace, snapshot_store, watch_live_state
+)
+
+# ===========================
+# ÍCONES
+# ===========================
+# Caminhos dos ícones (usando a função get_resource_path)
+ICON_PATHS = {
+    "windows10": get_resource_path("icons/windows10.png"),
+    "windows11": get_resource_path("icons/windows11.png"), 
+    "macos": get_resource_path("icons/macOS.png"),
+    "ubuntu": get_resource_path("icons/ubuntu.png")
+}
+
+# Cache de ícones: LRU de pixbufs decodificados e miniaturas PNG em disco
+ICON_CACHE_SIZE = 32
+ICON_CACHE_DIR = os.path.join(user_cache_dir(), "icones")
+_icon_cache = OrderedDict()
+_icon_cache_lock = threading.Lock()
+
+# Tamanho dos ícones nos tiles e número de threads que os decodificam
+TILE_ICON_SIZE = 64
+ICON_LOADER_THREADS = 2
+
+# Fallback para ícones padrão se os específicos não existirem
+FALLBACK_ICONS = {
+    "windows10": "windows-symbolic",
+    "windows11": "windows-symbolic",
+    "macos": "apple-symbolic",
+    "ubuntu": "ubuntu-symbolic"
+}
+
+def get_icon_source(icon_name, size):
+    """Resolve o arquivo de origem de um ícone (imagem própria ou ícone do tema)"""
+    icon_path = ICON_PATHS[icon_name]
+    if os.path.exists(icon_path):
+        return icon_path
+    
+    # Fallback para ícones padrão do GTK
+    theme = Gtk.IconTheme.get_default()
+    icon_info = theme.lookup_icon(FALLBACK_ICONS[icon_name], size, 0)
+    if icon_info and icon_info.get_filename():
+        return icon_info.get_filename()
+    return None
+
+def _icon_thumbnail_path(icon_name, size, source, mtime):
+    """Caminho da miniatura em disco para (ícone, tamanho, origem, mtime)"""
+    digest = hashlib.sha1(f"{source}:{mtime}".encode()).hexdigest()[:16]
+    return os.path.join(ICON_CACHE_DIR, f"{icon_name}-{size}-{digest}.png")
+
+def get_cached_icon(icon_name, size, source):
+    """Retorna o pixbuf já decodificado em memória, ou None (nunca decodifica)"""
+    key = (icon_name, size, os.stat(source).st_mtime_ns)
+    with _icon_cache_lock:
+        pixbuf = _icon_cache.get(key)
+        if pixbuf is not None:
+            _icon_cache.move_to_end(key)
+        return pixbuf
+
+def load_icon_cached(icon_name, size, source):
+    """Decodifica um ícone usando o cache em memória e as miniaturas em disco
+    
+    Só decodifica a imagem original quando não existe miniatura para a
+    versão atual do arquivo (chave: ícone, tamanho e mtime da origem).
+    """
+    pixbuf = get_cached_icon(icon_name, size, source)
+    if pixbuf is not None:
+        return pixbuf
+    
+    mtime = os.stat(source).st_mtime_ns
+    key = (icon_name, size, mtime)
+    thumbnail = _icon_thumbnail_path(icon_name, size, source, mtime)
+    if os.path.exists(thumbnail):
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file(thumbnail)
+    else:
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_size(source, size, size)
+        try:
+            os.makedirs(ICON_CACHE_DIR, exist_ok=True)
+            # Remove miniaturas de versões anteriores do mesmo ícone
+            prefix = f"{icon_name}-{size}-"
+            for name in os.listdir(ICON_CACHE_DIR):
+                if name.startswith(prefix) and name.endswith(".png"):
+                    os.unlink(os.path.join(ICON_CACHE_DIR, name))
+            # Substituição atômica: leituras concorrentes nunca veem PNG parcial
+            _, data = pixbuf.save_to_bufferv("png", [], [])
+            with atomic_write(thumbnail, "wb") as f:
+                f.write(data)
+        except (OSError, GLib.Error) as e:
+            print(f"Aviso: não foi possível gravar miniatura de {icon_name}: {e}")
+    
+    with _icon_cache_lock:
+        _icon_cache[key] = pixbuf
+        _icon_cache.move_to_end(key)
+        while len(_icon_cache) > ICON_CACHE_SIZE:
+            _icon_cache.popitem(last=False)
+    
+    return pixbuf
+
+# ===========================
+# INTERFACE GTK
+# ===========================
+class LoadingScreen(Gtk.Window):
+    def __init__(self, parent, on_cancel=None):
+        super().__init__(title="Trocando o tema")
+        self.set_decorated(False)
+        self.set_modal(True)
+        self.set_transient_for(parent)
+        self.set_position(Gtk.WindowPosition.CENTER)
+        self.set_default_size(400, 200)
+        
+        # Fundo laranja
+        orange_rgba = Gdk.RGBA()
+        orange_rgba.parse("rgba(255,165,0,0.95)")
+        
+        self.override_background_color(Gtk.StateFlags.NORMAL, orange_rgba)
+        
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=20)
+        box.set_valign(Gtk.Align.CENTER)
+        box.set_halign(Gtk.Align.CENTER)
+        
+        # Spinner
+        self.spinner = Gtk.Spinner()
+        self.spinner.set_size_request(64, 64)
+        self.spinner.start()
+        box.pack_start(self.spinner, False, False, 0)
+        
+        # Label
+        self.label = Gtk.Label(label="Trocando o tema...")
+        self.label.set_name("loading-label")
+        css = b"#loading-label { font-size: 20px; color: white; font-weight: bold; }"
+        css_provider = Gtk.CssProvider()
+        css_provider.load_from_data(css)
+        self.label.get_style_context().add_provider(css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+        box.pack_start(self.label, False, False, 0)
+        
+        # Cancelar: a troca para entre duas etapas e o que já foi feito é desfeito
+        self.on_cancel = on_cancel
+        self.cancel_button = Gtk.Button.new_with_label("Cancelar")
+        self.cancel_button.set_halign(Gtk.Align.CENTER)
+        self.cancel_button.connect("clicked", self.on_cancel_clicked)
+        box.pack_start(self.cancel_button, False, False, 0)
+        
+        self.add(box)
+        self.set_opacity(0.0)  # Inicia transparente
+    
+    def on_cancel_clicked(self, widget):
+        self.cancel_button.set_sensitive(False)
+        self.label.set_text("Cancelando...")
+        if self.on_cancel:
+            self.on_cancel()
+        
+    def show_with_animation(self):
+        """Mostra a tela com animação de fade in"""
+        self.show_all()
+        
+        # Animação de fade in
+        for i in range(10):
+            opacity = i * 0.1
+            GLib.timeout_add(i * 30, self.set_opacity, opacity)
+        
+    def hide_with_animation(self):
+        """Esconde a tela com animação de fade out"""
+        # Animação de fade out
+        for i in range(10):
+            opacity = 1.0 - (i * 0.1)
+            GLib.timeout_add(i * 30, self.set_opacity, opacity)
+        
+        GLib.timeout_add(300, self.destroy)
+
+class CustomizerWindow(Gtk.Window):
+    def __init__(self):
+        super().__init__(title="Personalizador de Ambiente GNOME")
+        self.set_border_width(15)
+        self.set_default_size(700, 500)
+        self.set_position(Gtk.WindowPosition.CENTER)
+        
+        # Configurar ícone da janela
+        try:
+            icon_path = get_resource_path("icon_app.png")
+            if os.path.exists(icon_path):
+                self.set_icon_from_file(icon_path)
+            else:
+                self.set_icon_name("system-settings")
+        except:
+            self.set_icon_name("system-settings")
+        
+        # Criar notebook (abas)
+        self.notebook = Gtk.Notebook()
+        self.add(self.notebook)
+        
+        # Aba de experiências
+        exp_box = self.create_experiences_tab()
+        self.notebook.append_page(exp_box, Gtk.Label(label="Experiências"))
+        
+        # Aba de utilitários
+        utils_box = self.create_utils_tab()
+        self.notebook.append_page(utils_box, Gtk.Label(label="Utilitários"))
+        
+        # Status bar
+        self.statusbar = Gtk.Statusbar()
+        self.statusbar.push(0, "Pronto")
+        
+        # Progress bar (inicialmente oculta)
+        self.progressbar = Gtk.ProgressBar()
+        self.progressbar.set_show_text(True)
+        self.progressbar.set_visible(False)
+        
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        main_box.pack_start(self.notebook, True, True, 0)
+        main_box.pack_start(self.progressbar, False, False, 0)
+        main_box.pack_start(self.statusbar, False, False, 0)
+        self.add(main_box)
+        
+        # Com o daemon da sessão rodando, trocas e backups partem do estado que ele mantém;
+        # com --trace as trocas rodam aqui, para que o trace tenha as etapas
+        client = None if tracer.enabled else DaemonClient()
+        self.daemon = client if client is not None and client.available() else None
+        
+        # Sem o daemon, a janela mantém os caches e calcula o plano de um tile
+        # antes do clique (o daemon já planeja a partir do estado em memória)
+        self.plan_executor = ThreadPoolExecutor(max_workers=1)
+        self.plan_future = None
+        if self.daemon is None:
+            watch_live_state()
+        
+        # Backup inicial em segundo plano (na fila das trocas), depois que a janela aparece
+        self.backup_id = None
+        self.map_handler = self.connect("map-event", self.on_window_mapped)
+
+    def on_window_mapped(self, widget, event):
+        """Dispara o backup automático sem atrasar a abertura da janela"""
+        self.disconnect(self.map_handler)
+        
+        # Uma troca interrompida é resolvida antes do backup (que gravaria o estado pela metade)
+        entry = journal.pending()
+        if entry is not None:
+            GLib.idle_add(self.ask_recovery, entry)
+        else:
+            self.start_startup_backup()
+        return False
+
+    def start_startup_backup(self):
+        # Na fila das trocas: uma troca pedida logo depois espera o backup terminar
+        apply_scheduler.call(self.run_startup_backup)
+
+    def ask_recovery(self, entry):
+        """Pergunta se a troca interrompida deve ser continuada ou desfeita"""
+        profile = PROFILES.get(entry["profile"])
+        name = profile["name"] if profile else entry["profile"]
+        total = len(entry["steps"])
+        remaining = total - len(entry["done"])
+        
+        dialog = Gtk.MessageDialog(
+            parent=self,
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.NONE,
+            text=f"A troca para a experiência {name} foi interrompida"
+        )
+        dialog.format_secondary_text(
+            f"{remaining} de {total} etapas não foram concluídas. "
+            "Continuar a troca ou desfazer as etapas já aplicadas?"
+        )
+        dialog.add_buttons("Desfazer", Gtk.ResponseType.REJECT, "Continuar", Gtk.ResponseType.ACCEPT)
+        response = dialog.run()
+        dialog.destroy()
+        
+        # Diálogo fechado: a troca continua pendente para a próxima abertura
+        if response not in (Gtk.ResponseType.ACCEPT, Gtk.ResponseType.REJECT):
+            return False
+        
+        self.set_sensitive(False)
+        self.progressbar.set_visible(True)
+        self.progressbar.set_fraction(0.0)
+        self.progressbar.set_text("Preparando...")
+        
+        apply_scheduler.call(self.run_recovery, response == Gtk.ResponseType.ACCEPT)
+        return False
+
+    def run_recovery(self, resume):
+        """Retoma ou desfaz a troca interrompida"""
+        def progress_callback(message, fraction, eta):
+            GLib.idle_add(self.update_progress, message, fraction, eta)
+        
+        success = recover_interrupted(resume, progress_callback)
+        save_trace()
+        GLib.idle_add(self.on_recovered, resume, success)
+
+    def on_recovered(self, resume, success):
+        self.set_sensitive(True)
+        self.progressbar.set_visible(False)
+        
+        if success:
+            self.update_status("Troca concluída" if resume else "Troca desfeita")
+            self.start_startup_backup()
+        else:
+            self.show_error("Erro ao recuperar a troca interrompida")
+        return False
+
+    def run_startup_backup(self):
+        """Backup automático; não grava nada se o estado for o do último snapshot"""
+        latest = snapshot_store.latest()
+        if self.daemon is not None:
+            backup_id = self.daemon.snapshot("automático")
+        else:
+            backup_id = create_backup("automático")
+        GLib.idle_add(self.on_startup_backup_done, backup_id, latest is None or latest["id"] != backup_id)
+
+    def on_startup_backup_done(self, backup_id, created):
+        self.backup_id = backup_id
+        if backup_id and created:
+            self.update_status(f"Backup {backup_id[:12]} salvo")
+        return False
+
+    def create_experiences_tab(self):
+        # Usar Grid para organizar em tiles
+        grid = Gtk.Grid()
+        grid.set_column_homogeneous(True)
+        grid.set_row_homogeneous(True)
+        grid.set_column_spacing(10)
+        grid.set_row_spacing(10)
+        grid.set_border_width(10)
+        
+        # Informação sobre extensões padrão
+        info_label = Gtk.Label()
+        info_label.set_markup("<b>Extensões sempre habilitadas:</b> Compiz, Cube, GSConnect, Emoji, Tiling, AppIndicators, Blur")
+        info_label.set_halign(Gtk.Align.START)
+        
+        # Adicionar botões de experiências em tiles
+        self.pending_icons = {}
+        profiles_list = list(PROFILES.items())
+        for i, (profile_key, profile_data) in enumerate(profiles_list):
+            btn = self.create_tile_button(profile_data["name"], profile_data["icon"])
+            btn.connect("clicked", self.on_experience_selected, profile_key)
+            btn.connect("enter-notify-event", self.on_tile_hovered, profile_key)
+            btn.connect("focus-in-event", self.on_tile_hovered, profile_key)
+            
+            # Calcular posição na grid (2 colunas)
+            row = i // 2
+            col = i % 2
+            grid.attach(btn, col, row, 1, 1)
+        
+        self.load_tile_icons()
+        
+        # Container principal
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        box.pack_start(info_label, False, False, 0)
+        box.pack_start(grid, True, True, 0)
+        
+        return box
+
+    def create_tile_button(self, label, icon_name):
+        """Cria um botão tile com ícone e label"""
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        box.set_border_width(10)
+        
+        # Ícone: placeholder agora, imagem real carregada em segundo plano
+        image = Gtk.Image.new_from_icon_name("image-loading", Gtk.IconSize.DIALOG)
+        image.set_pixel_size(TILE_ICON_SIZE)
+        self.pending_icons.setdefault(icon_name, []).append(image)
+        
+        # Label
+        label_widget = Gtk.Label(label=label)
+        label_widget.set_max_width_chars(20)
+        label_widget.set_line_wrap(True)
+        label_widget.set_justify(Gtk.Justification.CENTER)
+        
+        box.pack_start(image, False, False, 0)
+        box.pack_start(label_widget, False, False, 0)
+        
+        # Botão
+        button = Gtk.Button()
+        button.add(box)
+        button.set_size_request(150, 150)
+        
+        return button
+
+    def load_tile_icons(self):
+        """Decodifica os ícones dos tiles fora do main loop e troca os placeholders"""
+        self.icon_loader = ThreadPoolExecutor(max_workers=ICON_LOADER_THREADS)
+        
+        for icon_name, images in self.pending_icons.items():
+            try:
+                # Consulta ao tema do GTK só pode ser feita na thread principal
+                source = get_icon_source(icon_name, TILE_ICON_SIZE)
+                pixbuf = get_cached_icon(icon_name, TILE_ICON_SIZE, source) if source else None
+            except Exception as e:
+                print(f"Erro ao carregar ícone {icon_name}: {e}")
+                source = pixbuf = None
+            
+            if pixbuf is not None or source is None:
+                self.set_tile_icon(images, pixbuf)
+                continue
+            
+            future = self.icon_loader.submit(load_icon_cached, icon_name, TILE_ICON_SIZE, source)
+            future.add_done_callback(
+                lambda f, images=images: GLib.idle_add(self.on_tile_icon_loaded, f, images)
+            )
+        
+        self.pending_icons = {}
+        self.icon_loader.shutdown(wait=False)
+
+    def on_tile_icon_loaded(self, future, images):
+        """Recebe (na thread principal) um ícone decodificado em segundo plano"""
+        try:
+            pixbuf = future.result()
+        except Exception as e:
+            print(f"Erro ao carregar ícone: {e}")
+            pixbuf = None
+        self.set_tile_icon(images, pixbuf)
+        return False
+
+    def set_tile_icon(self, images, pixbuf):
+        """Troca o placeholder dos tiles pelo ícone (ou pelo ícone genérico)"""
+        for image in images:
+            if pixbuf is not None:
+                image.set_from_pixbuf(pixbuf)
+            else:
+                image.set_from_icon_name("application-x-executable", Gtk.IconSize.DIALOG)
+
+    def create_utils_tab(self):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
+        box.set_border_width(10)
+        
+        # Botão de backup
+        btn_backup = Gtk.Button.new_with_label("Criar Backup Atual")
+        btn_backup.connect("clicked", self.on_create_backup)
+        box.pack_start(btn_backup, False, False, 0)
+        
+        # Botão de restore
+        btn_restore = Gtk.Button.new_with_label("Restaurar Backup")
+        btn_restore.connect("clicked", self.on_restore_backup)
+        box.pack_start(btn_restore, False, False, 0)
+        
+        # Botão de recarregar GNOME
+        btn_reload = Gtk.Button.new_with_label("Recarregar GNOME Shell")
+        btn_reload.connect("clicked", self.on_reload_gnome)
+        box.pack_start(btn_reload, False, False, 0)
+        
+        # Verificar extensões
+        btn_check_ext = Gtk.Button.new_with_label("Verificar Extensões")
+        btn_check_ext.connect("clicked", self.on_check_extensions)
+        box.pack_start(btn_check_ext, False, False, 0)
+        
+        # Redefinir extensões (desabilita todas)
+        btn_reset_ext = Gtk.Button.new_with_label("Redefinir Extensões")
+        btn_reset_ext.connect("clicked", self.on_reset_extensions)
+        box.pack_start(btn_reset_ext, False, False, 0)
+        
+        return box
+
+    def on_tile_hovered(self, widget, event, profile_name):
+        """Começa a calcular o plano do tile sob o mouse/foco enquanto o usuário decide"""
+        if self.daemon is not None or not self.get_sensitive():
+            return False
+        
+        # Só o tile mais recente interessa: o pedido ainda na fila é descartado
+        # (apply_mode espera o plano que já estiver sendo calculado)
+        if self.plan_future is not None:
+            self.plan_future.cancel()
+        self.plan_future = self.plan_executor.submit(precompute_plan, profile_name)
+        return False
+
+    def on_experience_selected(self, widget, profile_name):
+        """Aplica uma experiência pelo apply_scheduler, sem travar a UI"""
+        # Mostrar tela de loading; a animação roda enquanto a troca começa
+        self.loading_screen = LoadingScreen(self, self.on_cancel_experience)
+        self.loading_screen.show_with_animation()
+        
+        self.start_experience_application(profile_name)
+
+    def start_experience_application(self, profile_name):
+        """Enfileira a troca; ela roda depois do backup automático, se ainda pendente"""
+        self.set_sensitive(False)
+        self.progressbar.set_visible(True)
+        self.progressbar.set_fraction(0.0)
+        self.progressbar.set_text("Preparando...")
+        
+        def progress_callback(message, fraction, eta):
+            GLib.idle_add(self.update_progress, message, fraction, eta)
+        
+        if self.daemon is not None:
+            # O daemon tem a própria fila; aqui a chamada só espera a vez do backup inicial
+            future = apply_scheduler.call(self.daemon.apply_profile, profile_name, progress_callback)
+            self.when_done(future, self.on_experience_applied, profile_name)
+        else:
+            def done_callback(request):
+                save_trace()
+                success = None if request.cancelled() and not request.result else request.result
+                GLib.idle_add(self.on_experience_applied, profile_name, success)
+            
+            apply_scheduler.submit(profile_name, progress_callback, done_callback)
+
+    def on_cancel_experience(self):
+        """Botão Cancelar da tela de loading"""
+        if self.daemon is not None:
+            self.daemon.cancel()
+        else:
+            apply_scheduler.cancel()
+
+    def update_progress(self, message, fraction, eta):
+        """Atualiza a barra de progresso (chamada da thread principal)"""
+        self.progressbar.set_fraction(fraction)
+        if fraction < 1.0:
+            self.progressbar.set_text(f"{message} {fraction:.0%} - cerca de {max(1, round(eta))} s restantes")
+        else:
+            self.progressbar.set_text("Concluído")
+        return False
+
+    def on_experience_applied(self, profile_name, success):
+        """Callback quando a experiência é aplicada"""
+        # Esconder tela de loading com animação
+        if hasattr(self, 'loading_screen'):
+            self.loading_screen.hide_with_animation()
+        
+        # Pequeno delay antes de reativar a interface
+        GLib.timeout_add(500, self.finalize_experience_application, profile_name, success)
+
+    def finalize_experience_application(self, profile_name, success):
+        """Finaliza a aplicação da experiência"""
+        self.set_sensitive(True)
+        self.progressbar.set_visible(False)
+        
+        if success:
+            profile = PROFILES[profile_name]
+            self.show_info(
+                f"Experiência {profile['name']} aplicada com sucesso!\n\n"
+                f"Extensões habilitadas:\n- {', '.join(profile['extensions'])}\n- {', '.join(ALWAYS_ENABLED_EXTENSIONS)}"
+            )
+            self.update_status(f"Experiência {profile['name']} aplicada")
+        elif success is None:
+            self.update_status("Troca cancelada; as configurações anteriores foram mantidas")
+        else:
+            self.show_error("Erro ao aplicar experiência. Verifique se as extensões estão instaladas.")
+
+    def on_create_backup(self, widget):
+        """Cria o backup na fila das trocas (pelo daemon, se houver) sem travar a UI"""
+        self.set_sensitive(False)
+        self.update_status("Criando backup...")
+        
+        if self.daemon is not None:
+            future = apply_scheduler.call(self.daemon.snapshot, "manual")
+        else:
+            future = apply_scheduler.call(create_backup)
+        self.when_done(future, self.on_backup_created, failure=None)
+
+    def on_backup_created(self, backup_id):
+        self.set_sensitive(True)
+        self.backup_id = backup_id
+        if backup_id:
+            self.show_info(f"Backup {self.backup_id[:12]} salvo em: {snapshot_store.root}")
+            self.update_status("Backup criado")
+        else:
+            self.show_error("Erro ao criar backup")
+            self.update_status("Erro ao criar backup")
+        return False
+
+    def on_restore_backup(self, widget):
+        """Restaura na fila das trocas (pelo daemon, se houver) sem travar a UI"""
+        self.set_sensitive(False)
+        self.update_status("Restaurando backup...")
+        
+        if self.daemon is not None:
+            future = apply_scheduler.call(self.daemon.restore)
+        else:
+            future = apply_scheduler.call(restore_backup)
+        self.when_done(future, self.on_backup_restored)
+
+    def on_backup_restored(self, success):
+        self.set_sensitive(True)
+        if success:
+            self.show_info("Backup restaurado com sucesso!")
+            self.update_status("Backup restaurado")
+        else:
+            self.show_error("Erro ao restaurar backup ou backup não encontrado")
+            self.update_status("Erro ao restaurar backup")
+        return False
+
+    def on_reload_gnome(self, widget):
+        """Recarrega as extensões na fila das trocas para não travar a UI"""
+        self.set_sensitive(False)
+        self.update_status("Recarregando GNOME Shell...")
+        
+        future = apply_scheduler.call(reload_gnome_shell)
+        self.when_done(future, self.on_gnome_reloaded)
+
+    def on_gnome_reloaded(self, success):
+        self.set_sensitive(True)
+        if success:
+            self.show_info("GNOME Shell recarregado")
+            self.update_status("GNOME Shell recarregado")
+        else:
+            self.show_error("Erro ao recarregar o GNOME Shell")
+            self.update_status("Erro ao recarregar o GNOME Shell")
+        return False
+
+    def on_check_extensions(self, widget):
+        """Verifica se as extensões necessárias estão instaladas"""
+        missing_extensions = []
+        
+        if extension_state.refresh() is None:
+            self.show_error("O GNOME Shell não respondeu; não foi possível verificar as extensões.")
+            return
+        
+        for ext_key, ext_id in EXTENSIONS.items():
+            if not check_extension_installed(ext_id):
+                missing_extensions.append(ext_id)
+        
+        if missing_extensions:
+            message = "Extensões não encontradas:\n\n" + "\n".join(missing_extensions)
+            message += "\n\nInstale-as através do GNOME Extensions ou via navegador."
+            self.show_error(message)
+        else:
+            self.show_info("Todas as extensões estão instaladas!")
+
+    def on_reset_extensions(self, widget):
+        """Desabilita as extensões na fila das trocas para não travar a UI"""
+        self.set_sensitive(False)
+        self.update_status("Redefinindo extensões...")
+        
+        future = apply_scheduler.call(reset_extensions)
+        self.when_done(future, self.on_extensions_reset)
+
+    def on_extensions_reset(self, success):
+        """Callback quando as extensões são redefinidas"""
+        self.set_sensitive(True)
+        if success:
+            self.show_info("Todas as extensões foram desabilitadas.")
+            self.update_status("Extensões redefinidas")
+        else:
+            self.show_error("Algumas extensões não puderam ser desabilitadas.")
+            self.update_status("Erro ao redefinir extensões")
+
+    def when_done(self, future, callback, *args, failure=False):
+        """Chama `callback(*args, resultado)` no main loop quando o Future terminar
+        
+        Se a tarefa levantar uma exceção, o erro vai para o terminal e
+        `callback` recebe `failure`: a janela nunca fica desabilitada.
+        """
+        def done(future):
+            error = future.exception()
+            if error is not None:
+                print(f"Erro na fila das trocas: {error!r}")
+                result = failure
+            else:
+                result = future.result()
+            GLib.idle_add(callback, *args, result)
+        
+        future.add_done_callback(done)
+
+    def update_status(self, message):
+        self.statusbar.pop(0)
+        self.statusbar.push(0, message)
+
+    def show_info(self, message):
+        dialog = Gtk.MessageDialog(
+            parent=self,
+            flags=0,
+            message_type=Gtk.MessageType.INFO,
+            buttons=Gtk.ButtonsType.OK,
+            text=message
+        )
+        dialog.run()
+        dialog.destroy()
+
+    def show_error(self, message):
+        dialog = Gtk.MessageDialog(
+            parent=self,
+            flags=0,
+            message_type=Gtk.MessageType.ERROR,
+            buttons=Gtk.ButtonsType.OK,
+            text=message
+        )
+        dialog.run()
+        dialog.destroy()
+
+def run_gui():
+    """Abre a janela principal e roda o main loop do GTK"""
+    win = CustomizerWindow()
+    win.connect("destroy", Gtk.main_quit)
+    win.show_all()
+    Gtk.main()
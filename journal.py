@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Diário (write-ahead) das trocas de perfil, para retomar ou desfazer uma troca interrompida"""
+import fcntl
+import json
+import os
+import time
+
+from gi.repository import GLib
+
+from files import atomic_write
+
+
+def user_journal_path():
+    """Arquivo do diário (~/.local/state/gnome-customizer/journal.json)"""
+    return os.path.join(GLib.get_user_state_dir(), "gnome-customizer", "journal.json")
+
+
+class JournalBusy(RuntimeError):
+    """Outro processo está executando uma troca (segura a trava do diário)"""
+
+
+class Journal:
+    """Guarda o plano de uma troca antes de executá-lo e marca cada etapa concluída
+
+    Se o aplicativo for encerrado no meio da troca o arquivo continua lá:
+    {"profile": ..., "started": ..., "pid": ..., "steps": [...], "done": [índices]}.
+    As etapas precisam ser serializáveis em JSON.
+
+    Enquanto a troca roda o processo dono segura um flock em `<path>.lock`;
+    o sistema solta a trava quando o processo morre. Assim uma troca em
+    andamento, neste processo ou em outro (daemon, linha de comando), não é
+    confundida com uma interrompida.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._entry = None
+        self._lock_fd = None
+
+    def _acquire(self):
+        """Trava o diário para este processo; JournalBusy se outro processo estiver trocando"""
+        if self._lock_fd is not None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise JournalBusy("outra troca de perfil está em andamento") from None
+        self._lock_fd = fd
+
+    def release(self):
+        """Solta a trava e deixa o diário no disco (troca que falhou, parou ou foi cancelada)"""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def executing(self):
+        """Este processo está no meio de uma troca (segura a trava)"""
+        return self._lock_fd is not None
+
+    def _owner_alive(self):
+        """Outro processo segura a trava (a troca dele ainda está rodando)"""
+        try:
+            fd = os.open(self.lock_path, os.O_RDWR)
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    def _write(self):
+        with atomic_write(self.path, sync=True) as f:
+            json.dump(self._entry, f)
+
+    def begin(self, profile_name, steps):
+        """Registra o plano completo antes da primeira etapa"""
+        self._acquire()
+        self._entry = {
+            "profile": profile_name, "started": time.time(), "pid": os.getpid(), "steps": steps, "done": []
+        }
+        self._write()
+
+    def resume(self, entry):
+        """Continua registrando sobre um diário carregado com `pending`"""
+        self._acquire()
+        entry["pid"] = os.getpid()
+        self._entry = entry
+
+    def mark_done(self, index):
+        self._entry["done"].append(index)
+        self._write()
+
+    def stopped(self):
+        """Entrada da última troca deste processo deixada no disco por release(), ou None
+
+        Usada para desfazer logo em seguida uma troca cancelada, sem depender
+        de o arquivo ainda ser dela.
+        """
+        if self.executing():
+            return None
+        return self._entry
+
+    def pending(self):
+        """Troca interrompida encontrada no disco, ou None
+
+        A troca que este processo está executando e a de outro processo
+        ainda vivo não contam como interrompidas.
+        """
+        if self.executing() or self._owner_alive():
+            return None
+        try:
+            with open(self.path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "steps" not in entry:
+            return None
+        return entry
+
+    def clear(self):
+        """Troca terminada (ou desfeita): remove o diário"""
+        self._entry = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self.release()
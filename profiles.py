@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""Armazenamento de perfis: índice leve na inicialização, conteúdo dconf carregado sob demanda"""
+import hashlib
+import json
+import os
+
+from gi.repository import GLib
+
+from dconf_settings import DconfParseError, parse_keyfile
+from files import atomic_write
+
+# Arquivo de índice em cada diretório de perfis
+PROFILE_INDEX = "index.json"
+
+# Formato do cache compilado: (impressão digital da fonte, {extensão: {chave: valor}})
+CACHE_TYPE = "(sa{sa{sv}})"
+
+# Subdiretório dos perfis do sistema com os perfis compilados pelo gerar_deb.py
+COMPILED_DIR = "compilados"
+
+
+def user_profile_dir():
+    """Diretório de perfis do usuário (~/.local/share/gnome-customizer/perfis)"""
+    return os.path.join(GLib.get_user_data_dir(), "gnome-customizer", "perfis")
+
+
+def user_cache_dir():
+    """Diretório de cache do aplicativo (~/.cache/gnome-customizer)"""
+    return os.path.join(GLib.get_user_cache_dir(), "gnome-customizer")
+
+
+def parse_profile(text, dconf_paths):
+    """Converte o texto de um arquivo de perfil em valores dconf tipados
+
+    O arquivo é um keyfile cujas seções são as extensões ([panel],
+    [arcmenu/subdir], ...). Retorna ({extensão: {chave: GLib.Variant}},
+    {extensão: erro}); uma extensão com erro é ignorada por inteiro, como
+    no `dconf load`.
+    """
+    blocks = {}
+    current = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            extension_id, _, subdir = stripped[1:-1].partition("/")
+            current = blocks.setdefault(extension_id, [])
+            current.append(f"[{subdir or '/'}]")
+        elif current is not None:
+            current.append(line)
+        elif stripped and not stripped.startswith("#"):
+            raise DconfParseError("conteúdo antes da primeira seção de extensão")
+
+    payload = {}
+    errors = {}
+    for extension_id, lines in blocks.items():
+        if extension_id not in dconf_paths:
+            errors[extension_id] = "extensão sem caminho dconf conhecido"
+            continue
+        try:
+            payload[extension_id] = parse_keyfile("\n".join(lines), dconf_paths[extension_id])
+        except DconfParseError as e:
+            errors[extension_id] = str(e)
+
+    return payload, errors
+
+
+def file_fingerprint(path):
+    """Impressão digital barata de um arquivo (data de modificação e tamanho)"""
+    if path is None:
+        return "-"
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def payload_to_variant(fingerprint, payload):
+    """Serializa o conteúdo de um perfil para o cache compilado"""
+    return GLib.Variant(CACHE_TYPE, (fingerprint, payload))
+
+
+def variant_to_payload(variant):
+    """Reconstrói {extensão: {chave: GLib.Variant}} a partir do cache compilado"""
+    payload = {}
+    extensions = variant.get_child_value(1)
+    for i in range(extensions.n_children()):
+        entry = extensions.get_child_value(i)
+        values = entry.get_child_value(1)
+        payload[entry.get_child_value(0).get_string()] = {
+            values.get_child_value(j).get_child_value(0).get_string():
+                values.get_child_value(j).get_child_value(1).get_variant()
+            for j in range(values.n_children())
+        }
+    return payload
+
+
+class ProfileStore:
+    """Perfis definidos em diretórios do sistema e do usuário
+
+    Na inicialização só os índices (nome, ícone, extensões) são lidos. O
+    conteúdo dconf de um perfil é interpretado na primeira vez em que é
+    pedido e guardado em um cache compilado em disco, invalidado quando a
+    data de modificação ou o tamanho de algum arquivo de origem mudam.
+
+    Um perfil pode declarar um perfil "base" e definir apenas as chaves
+    que sobrescreve (e, em "unset", as chaves da base que não usa). O
+    resultado da combinação é memorizado e recalculado quando qualquer
+    perfil da cadeia muda.
+
+    Perfis compilados na geração do pacote (`compiled_dir`) são mapeados
+    em memória e usados sem interpretar texto, desde que o conteúdo das
+    fontes seja o mesmo da compilação.
+    """
+
+    def __init__(self, profile_dirs, dconf_paths, cache_dir=None, compiled_dir=None):
+        self.profile_dirs = profile_dirs
+        self.dconf_paths = dconf_paths
+        self.cache_dir = cache_dir or os.path.join(user_cache_dir(), "perfis")
+        self.compiled_dir = compiled_dir
+        self._memory = {}
+        self.index_errors = {}
+        self.profiles = self.load_index()
+
+    def load_index(self):
+        """Lê os índices; diretórios posteriores sobrescrevem os anteriores
+
+        Perfis com herança inválida ou "unset" de extensões sem caminho
+        dconf são descartados e os erros ficam em `index_errors`.
+        """
+        profiles = {}
+        self.index_errors = {}
+        for directory in self.profile_dirs:
+            index_path = os.path.join(directory, PROFILE_INDEX)
+            if not os.path.exists(index_path):
+                continue
+            try:
+                with open(index_path, "r") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Erro ao ler índice de perfis {index_path}: {e}")
+                continue
+
+            for profile_id, entry in entries.items():
+                entry = dict(entry)
+                entry["dir"] = directory
+                profiles[profile_id] = entry
+
+        self.profiles = profiles
+        for profile_id in list(profiles):
+            try:
+                self.check_unset(profile_id)
+            except ValueError as e:
+                self._discard(profile_id, e)
+
+        # Perfis derivados herdam a lista de extensões da base
+        for profile_id in list(profiles):
+            try:
+                chain = self.chain(profile_id)
+            except ValueError as e:
+                self._discard(profile_id, e)
+                continue
+            for ancestor in reversed(chain):
+                if "extensions" in profiles[ancestor]:
+                    profiles[profile_id].setdefault("extensions", profiles[ancestor]["extensions"])
+                    break
+            else:
+                profiles[profile_id].setdefault("extensions", [])
+
+        return profiles
+
+    def chain(self, profile_id):
+        """Lista o perfil e seus ancestrais, da base mais distante até ele"""
+        chain = []
+        current = profile_id
+        while current is not None:
+            if current in chain:
+                raise ValueError(f"herança circular envolvendo {current}")
+            if current not in self.profiles:
+                raise ValueError(f"perfil base desconhecido: {current}")
+            chain.insert(0, current)
+            current = self.profiles[current].get("base")
+        return chain
+
+    def _discard(self, profile_id, error):
+        print(f"Erro no perfil {profile_id}: {error}")
+        self.index_errors[profile_id] = [str(error)]
+        del self.profiles[profile_id]
+
+    def check_unset(self, profile_id):
+        """Confere se "unset" só cita extensões conhecidas, com listas de chaves"""
+        unset = self.profiles[profile_id].get("unset", {})
+        if not isinstance(unset, dict):
+            raise ValueError("\"unset\" deve mapear extensões a listas de chaves")
+        for extension_id, keys in unset.items():
+            if extension_id not in self.dconf_paths:
+                raise ValueError(f"\"unset\" cita extensão sem caminho dconf: {extension_id}")
+            if not isinstance(keys, list):
+                raise ValueError(f"\"unset\" de {extension_id} deve ser uma lista de chaves")
+
+    def source_path(self, profile_id):
+        """Caminho do arquivo com o conteúdo dconf do próprio perfil (ou None)"""
+        entry = self.profiles[profile_id]
+        if not entry.get("file"):
+            return None
+        return os.path.join(entry["dir"], entry["file"])
+
+    def fingerprint(self, profile_id):
+        """Impressão digital da cadeia de herança inteira do perfil"""
+        parts = []
+        for ancestor in self.chain(profile_id):
+            unset = json.dumps(self.profiles[ancestor].get("unset", {}), sort_keys=True)
+            parts.append(f"{ancestor}={file_fingerprint(self.source_path(ancestor))}{unset}")
+        return "|".join(parts)
+
+    def content_fingerprint(self, profile_id):
+        """Hash do conteúdo da cadeia de herança (não depende de datas dos arquivos)"""
+        digest = hashlib.sha256()
+        for ancestor in self.chain(profile_id):
+            digest.update(ancestor.encode("utf-8") + b"\0")
+            source = self.source_path(ancestor)
+            if source is not None:
+                with open(source, "rb") as f:
+                    digest.update(f.read())
+            digest.update(b"\0" + json.dumps(self.profiles[ancestor].get("unset", {}), sort_keys=True).encode("utf-8"))
+            digest.update(b"\0")
+        return f"sha256:{digest.hexdigest()}"
+
+    def load_dconf(self, profile_id):
+        """Retorna o conteúdo dconf combinado do perfil: {extensão: {chave: GLib.Variant}}"""
+        try:
+            fingerprint = self.fingerprint(profile_id)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler perfil {profile_id}: {e}")
+            return {}
+
+        cached = self._memory.get(profile_id)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        payload = self._read_compiled(profile_id)
+        if payload is None:
+            payload = self._read_cache(profile_id, fingerprint)
+        if payload is None:
+            payload, errors = self._merge(profile_id)
+            for extension_id, error in errors.items():
+                print(f"Erro na configuração dconf do perfil {profile_id}: {extension_id}: {error}")
+            # Só guarda em disco conteúdo sem erros, para que eles continuem visíveis
+            if not errors:
+                self._write_cache(profile_id, fingerprint, payload)
+
+        self._memory[profile_id] = (fingerprint, payload)
+        return payload
+
+    def _merge(self, profile_id):
+        """Combina os arquivos da cadeia de herança, da base até o perfil"""
+        merged = {}
+        errors = {}
+        for ancestor in self.chain(profile_id):
+            source = self.source_path(ancestor)
+            if source is not None:
+                with open(source, "r") as f:
+                    payload, file_errors = parse_profile(f.read(), self.dconf_paths)
+                errors.update(file_errors)
+                for extension_id, values in payload.items():
+                    merged.setdefault(extension_id, {}).update(values)
+
+            for extension_id, keys in self.profiles[ancestor].get("unset", {}).items():
+                for key in keys:
+                    merged.get(extension_id, {}).pop(self.dconf_paths[extension_id] + key, None)
+
+        # Uma extensão com erro em qualquer nível da cadeia é ignorada por inteiro
+        for extension_id in errors:
+            merged.pop(extension_id, None)
+
+        return merged, errors
+
+    def compile(self, output_dir):
+        """Valida todos os perfis e grava os sem erro em output_dir/<perfil>.gvariant
+
+        Além dos erros de sintaxe, acusa uma mesma chave com tipos
+        diferentes em perfis diferentes (por exemplo 5 e 5.0). Retorna
+        {perfil: [erros]}; vazio se todos foram compilados.
+        """
+        errors = dict(self.index_errors)
+        types = {}
+        os.makedirs(output_dir, exist_ok=True)
+        for profile_id in sorted(self.profiles):
+            try:
+                payload, merge_errors = self._merge(profile_id)
+            except (OSError, ValueError, KeyError) as e:
+                errors[profile_id] = [str(e)]
+                continue
+
+            problems = [f"{extension_id}: {error}" for extension_id, error in merge_errors.items()]
+            for values in payload.values():
+                for key, value in values.items():
+                    type_string = value.get_type_string()
+                    first_type, first_profile = types.setdefault(key, (type_string, profile_id))
+                    if type_string != first_type:
+                        problems.append(f"{key}: tipo {type_string}, mas {first_profile} usa {first_type}")
+
+            if problems:
+                errors[profile_id] = problems
+                continue
+
+            variant = payload_to_variant(self.content_fingerprint(profile_id), payload)
+            with open(os.path.join(output_dir, f"{profile_id}.gvariant"), "wb") as f:
+                f.write(variant.get_data_as_bytes().get_data())
+
+        return errors
+
+    def _read_compiled(self, profile_id):
+        """Mapeia em memória o perfil compilado, se ele corresponder às fontes atuais"""
+        if self.compiled_dir is None:
+            return None
+        try:
+            mapped = GLib.MappedFile.new(os.path.join(self.compiled_dir, f"{profile_id}.gvariant"), False)
+            variant = GLib.Variant.new_from_bytes(GLib.VariantType(CACHE_TYPE), mapped.get_bytes(), False)
+            if variant.get_child_value(0).get_string() != self.content_fingerprint(profile_id):
+                return None
+        except (GLib.Error, OSError):
+            return None
+        return variant_to_payload(variant)
+
+    def _cache_path(self, profile_id):
+        return os.path.join(self.cache_dir, f"{profile_id}.gvariant")
+
+    def _read_cache(self, profile_id, fingerprint):
+        """Lê o cache compilado se ele corresponder às fontes atuais"""
+        try:
+            with open(self._cache_path(profile_id), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        variant = GLib.Variant.new_from_bytes(GLib.VariantType(CACHE_TYPE), GLib.Bytes.new(data), False)
+        if variant.get_child_value(0).get_string() != fingerprint:
+            return None
+        return variant_to_payload(variant)
+
+    def _write_cache(self, profile_id, fingerprint, payload):
+        """Grava o cache compilado de forma atômica"""
+        path = self._cache_path(profile_id)
+        try:
+            with atomic_write(path, "wb") as f:
+                f.write(payload_to_variant(fingerprint, payload).get_data_as_bytes().get_data())
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar o cache do perfil {profile_id}: {e}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Progresso determinado das trocas de perfil, com estimativa de tempo aprendida das trocas anteriores"""
+import json
+
+from files import atomic_write
+
+# Duração estimada (s) de cada tipo de etapa enquanto não há histórico
+DEFAULT_STEP_SECONDS = {
+    "disable": 0.5,
+    "enable": 0.5,
+    "dconf": 0.5,
+}
+
+# Peso da medição mais recente na média móvel do histórico
+HISTORY_WEIGHT = 0.3
+
+
+def history_keys(step):
+    """Chaves do histórico de uma etapa (uma por extensão nos grupos de extensões)"""
+    if "key" in step:
+        return [step["key"]]
+    if "ext_ids" in step:
+        return [f"{step['kind']}:{ext_id}" for ext_id in step["ext_ids"]]
+    return [step["kind"]]
+
+
+class StepHistory:
+    """Durações observadas de cada etapa, guardadas em um arquivo JSON local"""
+
+    def __init__(self, path):
+        self.path = path
+        self.durations = {}
+        try:
+            with open(path, "r") as f:
+                self.durations = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def expected(self, key, kind):
+        """Duração esperada de uma etapa (média móvel ou valor padrão)"""
+        return self.durations.get(key, DEFAULT_STEP_SECONDS.get(kind, 0.5))
+
+    def record(self, key, seconds):
+        """Incorpora uma nova medição à média móvel"""
+        previous = self.durations.get(key)
+        if previous is None:
+            self.durations[key] = seconds
+        else:
+            self.durations[key] = (1 - HISTORY_WEIGHT) * previous + HISTORY_WEIGHT * seconds
+
+    def save(self):
+        try:
+            with atomic_write(self.path) as f:
+                json.dump(self.durations, f, indent=1, sort_keys=True)
+        except OSError as e:
+            print(f"Aviso: não foi possível gravar o histórico de etapas: {e}")
+
+
+class ApplyProgress:
+    """Converte a execução de uma lista de etapas em fração concluída e tempo restante
+
+    Cada etapa pesa o quanto se espera que ela demore. Nos grupos de
+    extensões (executados em lote) a etapa dura o tempo da extensão mais
+    lenta e avança à medida que cada extensão confirma.
+    """
+
+    def __init__(self, steps, history, callback=None):
+        self.steps = steps
+        self.history = history
+        self.callback = callback
+        self.weights = [self.expected(step) for step in steps]
+        self.total = sum(self.weights) or 1.0
+        self.done = 0.0
+        self.current = 0.0
+        self.message = ""
+
+    def expected(self, step):
+        return max(self.history.expected(key, step["kind"]) for key in history_keys(step))
+
+    def fraction(self):
+        return min(1.0, (self.done + self.current) / self.total)
+
+    def eta(self):
+        """Segundos restantes estimados"""
+        return max(0.0, self.total - self.done - self.current)
+
+    def report(self, message=None):
+        if message is not None:
+            self.message = message
+        if self.callback:
+            self.callback(self.message, self.fraction(), self.eta())
+
+    def begin(self, index, message):
+        """Início da etapa `index`"""
+        self.current = 0.0
+        self.report(message)
+
+    def advance(self, index, part):
+        """Parte (0..1) da etapa `index` já concluída"""
+        self.current = self.weights[index] * min(1.0, part)
+        self.report()
+
+    def finish(self, index, durations):
+        """Fim da etapa `index`; durations: {chave do histórico: segundos}"""
+        for key, seconds in durations.items():
+            self.history.record(key, seconds)
+        self.done += self.weights[index]
+        self.current = 0.0
+        self.report()
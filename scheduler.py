@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Fila das trocas de perfil: uma thread de execução, vale o pedido mais recente"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+class ApplyRequest:
+    """Pedido de troca entregue ao ApplyScheduler
+
+    `result` fica verdadeiro se o perfil foi aplicado; uma troca que falhou
+    ou foi cancelada (ou substituída antes de começar) termina com falso e,
+    no segundo caso, `cancelled()` verdadeiro.
+    """
+
+    def __init__(self, profile_name, progress_callback=None, done_callback=None):
+        self.profile_name = profile_name
+        self.progress_callback = progress_callback
+        self.done_callback = done_callback
+        self.result = False
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+
+    def cancel(self):
+        """Pede o cancelamento; a troca em andamento para antes da próxima etapa"""
+        self._cancelled.set()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self, timeout=None):
+        """Espera o fim da troca e retorna `result`"""
+        self._finished.wait(timeout)
+        return self.result
+
+
+class ApplyScheduler:
+    """Executa as trocas de perfil uma de cada vez, em uma única thread
+
+    Só um pedido espera na fila: um novo substitui o anterior e pede o
+    cancelamento da troca em andamento. `apply(perfil, progress_callback,
+    cancelled=...)` retorna None quando para por cancelamento; se nenhum
+    pedido novo estiver esperando, `rollback(progress_callback)` desfaz as
+    etapas concluídas, senão a troca seguinte parte do estado em que a
+    anterior parou. Tarefas avulsas (backups, recuperação do diário) rodam
+    na mesma thread, na ordem em que foram pedidas em relação às trocas.
+    """
+
+    def __init__(self, apply, rollback):
+        self._apply = apply
+        self._rollback = rollback
+        self._condition = threading.Condition()
+        # ApplyRequest (no máximo um) e tarefas (future, função, argumentos), em ordem
+        self._queue = deque()
+        self._current = None
+        self._thread = None
+
+    def _start_worker(self):
+        """Cria a thread de execução no primeiro pedido (chamada com a condição travada)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name="apply-scheduler", daemon=True)
+            self._thread.start()
+
+    def submit(self, profile_name, progress_callback=None, done_callback=None):
+        """Enfileira uma troca; retorna o ApplyRequest
+
+        `done_callback(pedido)` é chamada na thread de execução quando o
+        pedido termina, inclusive quando ele é substituído.
+        """
+        request = ApplyRequest(profile_name, progress_callback, done_callback)
+        with self._condition:
+            self._drop_queued_request()
+            self._queue.append(request)
+            if self._current is not None:
+                self._current.cancel()
+            self._start_worker()
+            self._condition.notify()
+        return request
+
+    def call(self, function, *args):
+        """Executa `function(*args)` na thread das trocas; retorna um Future"""
+        future = Future()
+        with self._condition:
+            self._queue.append((future, function, args))
+            self._start_worker()
+            self._condition.notify()
+        return future
+
+    def cancel(self):
+        """Cancela a troca em andamento e a que espera na fila (a em andamento é desfeita)"""
+        with self._condition:
+            self._drop_queued_request()
+            if self._current is not None:
+                self._current.cancel()
+
+    def _queued_request(self):
+        for item in self._queue:
+            if isinstance(item, ApplyRequest):
+                return item
+        return None
+
+    def _drop_queued_request(self):
+        """Cancela a troca que ainda espera (chamada com a condição travada)
+
+        O pedido sai da fila e é encerrado pela thread de execução, antes de
+        qualquer outro item, para que `done_callback` rode sempre nela.
+        """
+        request = self._queued_request()
+        if request is not None:
+            request.cancel()
+            self._queue.remove(request)
+            self._queue.appendleft((Future(), self._finish, (request,)))
+            self._condition.notify()
+
+    def _finish(self, request):
+        request._finished.set()
+        if request.done_callback:
+            request.done_callback(request)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                item = self._queue.popleft()
+                if isinstance(item, ApplyRequest):
+                    self._current = item
+
+            if isinstance(item, ApplyRequest):
+                self._run_request(item)
+            else:
+                self._run_task(*item)
+
+    def _run_task(self, future, function, args):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _run_request(self, request):
+        try:
+            result = self._apply(request.profile_name, request.progress_callback, cancelled=request.cancelled)
+            if result is None:
+                with self._condition:
+                    replaced = self._queued_request() is not None
+                if not replaced:
+                    self._rollback(request.progress_callback)
+            request.result = bool(result)
+        except Exception as e:
+            print(f"Erro ao aplicar {request.profile_name}: {e}")
+            request.result = False
+        finally:
+            with self._condition:
+                self._current = None
+            self._finish(request)
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""Camada de estado das extensões do GNOME Shell via D-Bus (org.gnome.Shell.Extensions)"""
+import threading
+import time
+
+from gi.repository import Gio, GLib
+
+# ===========================
+# CONSTANTES D-BUS
+# ===========================
+SHELL_BUS_NAME = "org.gnome.Shell"
+SHELL_OBJECT_PATH = "/org/gnome/Shell"
+SHELL_EXTENSIONS_INTERFACE = "org.gnome.Shell.Extensions"
+
+# Timeout das chamadas D-Bus (ms)
+DBUS_CALL_TIMEOUT = 5000
+
+# Tempo máximo (s) para o Shell confirmar uma mudança de estado
+STATE_CHANGE_TIMEOUT = 10.0
+
+# Estados reportados pelo GNOME Shell (ExtensionState do gnome-shell)
+# ENABLED/DISABLED até o GNOME 44, ACTIVE/INACTIVE a partir do 45 - mesmos valores
+STATE_ENABLED = 1
+STATE_DISABLED = 2
+STATE_ERROR = 3
+STATE_OUT_OF_DATE = 4
+STATE_INITIALIZED = 6
+STATE_UNINSTALLED = 99
+
+# Estados finais que indicam que a extensão não vai mais mudar sozinha
+FAILED_STATES = (STATE_ERROR, STATE_OUT_OF_DATE, STATE_UNINSTALLED)
+DISABLED_STATES = (STATE_DISABLED, STATE_INITIALIZED)
+
+
+def info_is_enabled(info):
+    """Verifica se o dicionário de informações indica extensão habilitada"""
+    return int(info.get("state", 0)) == STATE_ENABLED
+
+
+class ExtensionStateCache:
+    """Mantém em memória um snapshot do estado de todas as extensões.
+
+    O snapshot é obtido com uma única chamada ListExtensions, em vez de
+    um processo `gnome-extensions` por extensão.
+    """
+
+    def __init__(self, connection=None):
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._watching = False
+        # Incrementado a cada mudança observada; permite saber se um plano ficou velho
+        self.generation = 0
+
+    def _get_connection(self):
+        """Obtém a conexão com o barramento de sessão"""
+        if self._connection is None:
+            self._connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        return self._connection
+
+    def _call(self, method, parameters=None, reply_type=None):
+        """Chama um método da interface org.gnome.Shell.Extensions"""
+        return self._get_connection().call_sync(
+            SHELL_BUS_NAME,
+            SHELL_OBJECT_PATH,
+            SHELL_EXTENSIONS_INTERFACE,
+            method,
+            parameters,
+            GLib.VariantType(reply_type) if reply_type else None,
+            Gio.DBusCallFlags.NONE,
+            DBUS_CALL_TIMEOUT,
+            None
+        )
+
+    def refresh(self):
+        """Recarrega o snapshot com uma única chamada ListExtensions
+
+        Com watch() ativo o snapshot já acompanha os sinais do Shell e só é
+        recarregado se tiver sido descartado. Retorna None (e não guarda
+        nada) se o Shell não responder: um estado desconhecido não pode
+        passar por "nenhuma extensão instalada".
+        """
+        if self._watching:
+            with self._lock:
+                snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+
+        try:
+            result = self._call("ListExtensions", reply_type="(a{sa{sv}})")
+            snapshot = result.unpack()[0]
+        except GLib.Error as e:
+            print(f"Erro ao consultar extensões via D-Bus: {e.message}")
+            return None
+
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def watch(self):
+        """Mantém o snapshot atualizado pelos sinais ExtensionStateChanged
+
+        Os sinais são entregues no main loop padrão, que precisa estar
+        rodando. Se o Shell reiniciar o snapshot é descartado.
+        """
+        if self._watching:
+            return
+        connection = self._get_connection()
+
+        def on_state_changed(connection, sender, path, interface, signal, parameters):
+            uuid, info = parameters.unpack()
+            self._update(uuid, info)
+
+        # O primeiro "apareceu" só confirma o Shell atual; depois dele, qualquer
+        # mudança de dono é um Shell novo
+        seen = []
+
+        def on_owner_changed(connection, name, *owner):
+            if seen:
+                self.invalidate()
+            seen.append(owner)
+
+        connection.signal_subscribe(
+            SHELL_BUS_NAME, SHELL_EXTENSIONS_INTERFACE, "ExtensionStateChanged",
+            SHELL_OBJECT_PATH, None, Gio.DBusSignalFlags.NONE, on_state_changed
+        )
+        Gio.bus_watch_name_on_connection(
+            connection, SHELL_BUS_NAME, Gio.BusNameWatcherFlags.NONE, on_owner_changed, on_owner_changed
+        )
+        self._watching = True
+
+    def invalidate(self):
+        """Descarta o snapshot atual (a próxima leitura consulta o Shell)"""
+        with self._lock:
+            self._snapshot = None
+            self.generation += 1
+
+    def snapshot(self):
+        """Retorna o snapshot atual, consultando o Shell se necessário (None se ele não responder)"""
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    def is_installed(self, uuid):
+        """Verifica se a extensão está instalada (falso se o Shell não responder)"""
+        return uuid in (self.snapshot() or {})
+
+    def is_enabled(self, uuid):
+        """Verifica se a extensão está habilitada (falso se o Shell não responder)"""
+        info = (self.snapshot() or {}).get(uuid)
+        if info is None:
+            return False
+        return info_is_enabled(info)
+
+    def _update(self, uuid, info):
+        """Atualiza o snapshot com o estado recebido em ExtensionStateChanged"""
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot[uuid] = info
+            self.generation += 1
+
+    def _fetch_info(self, uuid):
+        """Consulta o estado de uma única extensão"""
+        try:
+            result = self._call("GetExtensionInfo", GLib.Variant("(s)", (uuid,)), "(a{sv})")
+            info = result.unpack()[0]
+        except GLib.Error as e:
+            print(f"Erro ao consultar {uuid} via D-Bus: {e.message}")
+            return None
+        if info:
+            self._update(uuid, info)
+        return info
+
+    def wait_for_states(self, targets, action, timeout=STATE_CHANGE_TIMEOUT, confirmed_at=None,
+                        on_confirmed=None):
+        """Executa `action` e aguarda o Shell reportar cada extensão no estado alvo
+        
+        targets: dicionário uuid -> True (habilitada) / False (desabilitada).
+        action: função que dispara as mudanças; pode retornar UUIDs que falharam.
+        A espera termina pelo sinal ExtensionStateChanged ou pelo timeout.
+        Se `confirmed_at` for um dicionário, recebe uuid -> time.perf_counter()
+        do momento em que cada extensão confirmou o estado; `on_confirmed(uuid)`
+        é chamada a cada confirmação, na thread que espera.
+        Retorna a lista de UUIDs que não chegaram ao estado alvo.
+        """
+        pending = dict(targets)
+        if confirmed_at is None:
+            confirmed_at = {}
+        failed = []
+        timed_out = [False]
+        
+        def confirm(uuid):
+            del pending[uuid]
+            confirmed_at[uuid] = time.perf_counter()
+            if on_confirmed:
+                on_confirmed(uuid)
+        
+        # Contexto próprio: funciona em qualquer thread, com ou sem main loop rodando
+        context = GLib.MainContext.new()
+        context.push_thread_default()
+        
+        def on_state_changed(connection, sender, path, interface, signal, parameters):
+            uuid, info = parameters.unpack()
+            self._update(uuid, info)
+            if uuid not in pending:
+                return
+            state = int(info.get("state", 0))
+            if pending[uuid] and state == STATE_ENABLED:
+                confirm(uuid)
+            elif not pending[uuid] and state in DISABLED_STATES:
+                confirm(uuid)
+            elif state in FAILED_STATES:
+                del pending[uuid]
+                failed.append(uuid)
+        
+        def on_timeout(*args):
+            timed_out[0] = True
+            return False
+        
+        connection = self._get_connection()
+        subscription = connection.signal_subscribe(
+            None, SHELL_EXTENSIONS_INTERFACE, "ExtensionStateChanged",
+            SHELL_OBJECT_PATH, None, Gio.DBusSignalFlags.NONE, on_state_changed
+        )
+        timeout_source = GLib.timeout_source_new(int(timeout * 1000))
+        timeout_source.set_callback(on_timeout)
+        timeout_source.attach(context)
+        
+        try:
+            for uuid in action() or []:
+                if pending.pop(uuid, None) is not None:
+                    failed.append(uuid)
+            
+            while pending and not timed_out[0]:
+                context.iteration(True)
+            
+            # Processa sinais que chegaram junto com o último
+            while context.pending():
+                context.iteration(False)
+        finally:
+            timeout_source.destroy()
+            connection.signal_unsubscribe(subscription)
+            context.pop_thread_default()
+        
+        # Sem sinal a tempo: confirma diretamente (a extensão pode já estar no estado alvo)
+        for uuid, enabled in list(pending.items()):
+            info = self._fetch_info(uuid)
+            if info and info_is_enabled(info) == enabled:
+                confirm(uuid)
+        
+        return failed + list(pending)
+
+    def set_enabled(self, changes, timeout=STATE_CHANGE_TIMEOUT, confirmed_at=None, on_confirmed=None):
+        """Habilita/desabilita extensões e aguarda a confirmação do Shell
+        
+        changes: dicionário uuid -> True (habilitar) / False (desabilitar).
+        Retorna a lista de UUIDs que não chegaram ao estado pedido.
+        """
+        def action():
+            failed = []
+            for uuid, enabled in changes.items():
+                method = "EnableExtension" if enabled else "DisableExtension"
+                try:
+                    result = self._call(method, GLib.Variant("(s)", (uuid,)), "(b)")
+                    if not result.unpack()[0]:
+                        failed.append(uuid)
+                except GLib.Error as e:
+                    print(f"Erro ao chamar {method} para {uuid}: {e.message}")
+                    failed.append(uuid)
+            return failed
+        
+        return self.wait_for_states(changes, action, timeout, confirmed_at, on_confirmed)
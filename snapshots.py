@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Pontos de restauração: snapshots endereçados por conteúdo, comprimidos e com retenção limitada"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+from gi.repository import GLib
+
+from files import atomic_write
+
+# Limites padrão de retenção: os snapshots mais antigos saem primeiro
+SNAPSHOT_KEEP = 20
+SNAPSHOT_MAX_BYTES = 2 * 1024 * 1024
+
+# Lista de snapshots (mais antigo primeiro) dentro do diretório do store
+SNAPSHOT_INDEX = "snapshots.json"
+
+
+def user_snapshot_dir():
+    """Diretório dos snapshots do usuário (~/.local/share/gnome-customizer/snapshots)"""
+    return os.path.join(GLib.get_user_data_dir(), "gnome-customizer", "snapshots")
+
+
+def encode(data):
+    """Serialização determinística (mesmo conteúdo, mesmo hash)"""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class SnapshotStore:
+    """Snapshots do estado das extensões e das subárvores dconf
+
+    Cada parte do estado (extensões, uma subárvore dconf por extensão) é
+    gravada como blob comprimido com zlib e nomeado pelo SHA-256 do
+    conteúdo, então partes iguais entre snapshots são guardadas uma vez.
+    Um manifesto liga as partes; o hash dele identifica o snapshot.
+
+    Conteúdo de um snapshot:
+        {"extensions": {uuid: habilitada}, "dconf": {caminho: {chave: texto GVariant}}}
+    """
+
+    def __init__(self, root, keep=SNAPSHOT_KEEP, max_bytes=SNAPSHOT_MAX_BYTES):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objetos")
+        self.keep = keep
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Blobs
+    # ---------------------------
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _put_blob(self, data):
+        """Grava um blob se ainda não existir; retorna o hash"""
+        digest = content_hash(data)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            with atomic_write(path, "wb") as f:
+                f.write(zlib.compress(data, 9))
+        return digest
+
+    def _get_blob(self, digest):
+        with open(self._object_path(digest), "rb") as f:
+            return json.loads(zlib.decompress(f.read()).decode("utf-8"))
+
+    def _blobs_of(self, content):
+        """Serializa as partes de um snapshot; retorna ({hash: dados}, manifesto)"""
+        blobs = {}
+
+        def add(part):
+            data = encode(part)
+            digest = content_hash(data)
+            blobs[digest] = data
+            return digest
+
+        manifest = {
+            "extensions": add(content["extensions"]),
+            "dconf": {path: add(values) for path, values in content["dconf"].items()},
+        }
+        return blobs, manifest
+
+    # ---------------------------
+    # Índice
+    # ---------------------------
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.root, SNAPSHOT_INDEX), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _write_index(self, entries):
+        with atomic_write(os.path.join(self.root, SNAPSHOT_INDEX)) as f:
+            json.dump(entries, f, indent=1)
+
+    def list(self):
+        """Snapshots do mais antigo ao mais recente: [{"id", "created", "label"}]"""
+        return self._read_index()
+
+    def latest(self):
+        entries = self._read_index()
+        return entries[-1] if entries else None
+
+    # ---------------------------
+    # Snapshots
+    # ---------------------------
+    def take(self, content, label=""):
+        """Guarda um snapshot; retorna (id, criado)
+
+        Se o estado é igual ao do snapshot mais recente nada é gravado.
+        """
+        blobs, manifest = self._blobs_of(content)
+        manifest_data = encode(manifest)
+        snapshot_id = content_hash(manifest_data)
+
+        with self._lock:
+            entries = self._read_index()
+            if entries and entries[-1]["id"] == snapshot_id:
+                return snapshot_id, False
+
+            for data in blobs.values():
+                self._put_blob(data)
+            self._put_blob(manifest_data)
+
+            entries.append({"id": snapshot_id, "created": time.time(), "label": label})
+            entries = self._apply_retention(entries)
+            self._write_index(entries)
+            self._collect_garbage(entries)
+
+        return snapshot_id, True
+
+    def load(self, snapshot_id):
+        """Conteúdo de um snapshot, ou None se não existir/estiver corrompido"""
+        try:
+            manifest = self._get_blob(snapshot_id)
+            return {
+                "extensions": self._get_blob(manifest["extensions"]),
+                "dconf": {path: self._get_blob(digest) for path, digest in manifest["dconf"].items()},
+            }
+        except (OSError, ValueError, KeyError, zlib.error) as e:
+            print(f"Erro ao ler o snapshot {snapshot_id}: {e}")
+            return None
+
+    # ---------------------------
+    # Retenção
+    # ---------------------------
+    def _referenced(self, entries):
+        """Hashes de todos os blobs usados pelos snapshots listados"""
+        referenced = set()
+        for entry in entries:
+            try:
+                manifest = self._get_blob(entry["id"])
+            except (OSError, ValueError, zlib.error):
+                continue
+            referenced.add(entry["id"])
+            referenced.add(manifest["extensions"])
+            referenced.update(manifest["dconf"].values())
+        return referenced
+
+    def _size_of(self, digests):
+        size = 0
+        for digest in digests:
+            try:
+                size += os.path.getsize(self._object_path(digest))
+            except OSError:
+                pass
+        return size
+
+    def _apply_retention(self, entries):
+        """Remove os snapshots mais antigos até caber em `keep` e `max_bytes` (o mais recente fica)"""
+        while len(entries) > 1 and (
+            len(entries) > self.keep or self._size_of(self._referenced(entries)) > self.max_bytes
+        ):
+            entries = entries[1:]
+        return entries
+
+    def _collect_garbage(self, entries):
+        """Apaga os blobs que nenhum snapshot restante referencia"""
+        referenced = self._referenced(entries)
+        if not os.path.isdir(self.objects_dir):
+            return
+        for prefix in os.listdir(self.objects_dir):
+            directory = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(directory):
+                if prefix + name not in referenced:
+                    try:
+                        os.unlink(os.path.join(directory, name))
+                    except OSError:
+                        pass
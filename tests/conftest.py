@@ -0,0 +1,55 @@
+"""Configuração comum dos testes: módulos do repositório e serviços D-Bus falsos"""
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "tools"))
+
+
+@pytest.fixture(scope="session")
+def fake_session():
+    """Barramento de sessão isolado com o Shell e o dconf falsos de tools/
+
+    O Shell falso tem instaladas todas as extensões que o aplicativo
+    conhece, todas desabilitadas até o reset de cada teste. HOME, XDG_* e
+    PATH apontam para um diretório temporário enquanto a sessão de testes
+    durar e são restaurados no final.
+    """
+    pytest.importorskip("gi")
+    if shutil.which("dbus-daemon") is None:
+        pytest.skip("dbus-daemon não encontrado")
+
+    from benchmark import FakeEnvironment
+
+    saved_environ = dict(os.environ)
+    saved_cwd = os.getcwd()
+    env = FakeEnvironment(latency=0.05)
+    try:
+        env.start()
+        # O index acha os perfis a partir do diretório atual
+        os.chdir(REPO_DIR)
+        import index
+        os.chdir(saved_cwd)
+        env.start_services(sorted(set(index.extensoes) | set(index.EXTENSIONS.values())))
+        yield env
+    finally:
+        os.chdir(saved_cwd)
+        env.stop()
+        os.environ.clear()
+        os.environ.update(saved_environ)
+
+
+@pytest.fixture
+def app(fake_session):
+    """Módulo index com Shell e dconf falsos zerados e sem troca pendente"""
+    import index
+
+    fake_session.reset([])
+    index.extension_state.invalidate()
+    index.dconf_cache.invalidate()
+    index.journal.clear()
+    return index
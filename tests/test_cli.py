@@ -0,0 +1,67 @@
+"""Linha de comando: saída e códigos de saída, sem o daemon (--local)"""
+import pytest
+
+pytest.importorskip("gi")
+
+
+def test_quiet_apply_prints_nothing(app, capsys):
+    assert app.main(["--local", "apply", "-q", "windows10"]) == app.EXIT_OK
+    assert capsys.readouterr().out == ""
+
+
+def test_verbose_lists_written_keys(app, capsys):
+    assert app.main(["--local", "--verbose", "apply", "-q", "macos_normal"]) == app.EXIT_OK
+    lines = capsys.readouterr().out.splitlines()
+    assert lines and all(line.startswith("dconf /org/gnome/shell/extensions/") for line in lines)
+    app.VERBOSE = False
+
+
+@pytest.mark.parametrize("argv", [["apply"], ["trocar", "windows10"], ["apply", "windows10", "--sem-opcao"]])
+def test_usage_errors(app, argv, capsys):
+    assert app.main(["--local"] + argv) == app.EXIT_USAGE
+
+
+def test_unknown_profile_or_backup(app, capsys):
+    assert app.main(["--local", "apply", "-q", "nao-existe"]) == app.EXIT_NOT_FOUND
+    assert app.main(["--local", "restore", "zzzz"]) == app.EXIT_NOT_FOUND
+
+
+def test_backup_and_restore(app, capsys):
+    assert app.main(["--local", "backup", "--label", "teste"]) == app.EXIT_OK
+    # O identificador é a última linha (antes pode vir o aviso de backup repetido)
+    snapshot_id = capsys.readouterr().out.splitlines()[-1]
+    assert app.main(["--local", "apply", "-q", "windows10"]) == app.EXIT_OK
+    assert app.main(["--local", "restore", snapshot_id[:12]]) == app.EXIT_OK
+    assert app.plan_apply("windows10")[0]
+
+
+def test_failed_switch(app, monkeypatch, capsys):
+    monkeypatch.setattr(app, "write_dconf_delta", lambda delta: False)
+    assert app.main(["--local", "apply", "-q", "windows10"]) == app.EXIT_FAILURE
+
+    # A troca que falhou fica no diário e o status acusa
+    monkeypatch.undo()
+    assert app.main(["--local", "status"]) == app.EXIT_FAILURE
+    assert "Troca interrompida: windows10" in capsys.readouterr().out
+
+
+def test_ctrl_c_cancels_and_rolls_back(app, monkeypatch, capsys):
+    before = app.capture_state()
+    submit = app.apply_scheduler.submit
+
+    def submit_then_interrupt(*args, **kwargs):
+        request = submit(*args, **kwargs)
+        wait = request.wait
+
+        def wait_interrupted(*args, **kwargs):
+            # Ctrl+C na primeira espera, como no terminal
+            request.wait = wait
+            raise KeyboardInterrupt
+
+        request.wait = wait_interrupted
+        return request
+
+    monkeypatch.setattr(app.apply_scheduler, "submit", submit_then_interrupt)
+    assert app.main(["--local", "apply", "-q", "windows10"]) == app.EXIT_CANCELLED
+    assert app.journal.pending() is None
+    assert app.capture_state() == before
@@ -0,0 +1,104 @@
+"""Estado das extensões e gravação dconf contra os serviços falsos do Shell e do dconf"""
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import GLib
+
+from dconf_settings import read_values, write_changes
+from shell_extensions import ExtensionStateCache
+
+ARCMENU = "arcmenu@arcmenu.com"
+PANEL = "dash-to-panel@jderose9.github.com"
+ARCMENU_PATH = "/org/gnome/shell/extensions/arcmenu/"
+
+
+@pytest.fixture
+def extension_state(fake_session):
+    """Cache novo com só o ArcMenu habilitado no Shell falso"""
+    fake_session.reset([ARCMENU])
+    return ExtensionStateCache()
+
+
+def test_set_enabled_waits_for_shell_confirmation(extension_state):
+    assert extension_state.set_enabled({PANEL: True, ARCMENU: False}, timeout=5) == []
+
+    # O snapshot em memória acompanhou os sinais e confere com o Shell
+    assert extension_state.is_enabled(PANEL)
+    assert not extension_state.is_enabled(ARCMENU)
+    fresh = ExtensionStateCache()
+    assert fresh.is_enabled(PANEL)
+    assert not fresh.is_enabled(ARCMENU)
+
+
+def test_set_enabled_reports_rejected_extension(extension_state):
+    missing = "nao-instalada@teste"
+    assert extension_state.set_enabled({missing: True, PANEL: True}, timeout=5) == [missing]
+    assert extension_state.is_enabled(PANEL)
+
+
+def test_set_enabled_reports_confirmations(extension_state):
+    confirmed_at = {}
+    confirmed = []
+    extension_state.set_enabled({PANEL: True}, timeout=5, confirmed_at=confirmed_at, on_confirmed=confirmed.append)
+    assert list(confirmed_at) == [PANEL]
+    assert confirmed == [PANEL]
+
+
+def test_wait_for_states_times_out_without_signal(extension_state):
+    # Nada dispara a mudança: a espera termina no timeout e a extensão fica pendente
+    assert extension_state.wait_for_states({PANEL: True}, lambda: None, timeout=0.2) == [PANEL]
+
+
+def test_wait_for_states_confirms_state_already_reached(extension_state):
+    # Sem sinal, mas já no estado pedido: confirmado pela consulta final
+    assert extension_state.wait_for_states({ARCMENU: True}, lambda: None, timeout=0.2) == []
+
+
+def test_write_changes_is_one_change_set(fake_session):
+    fake_session.reset([])
+    changes = {
+        ARCMENU_PATH + "menu-height": GLib.Variant("i", 600),
+        ARCMENU_PATH + "menu-layout": GLib.Variant("s", "Eleven"),
+    }
+    assert write_changes(changes)
+    values = read_values(ARCMENU_PATH, strict=True)
+    assert values[ARCMENU_PATH + "menu-height"].get_int32() == 600
+    assert values[ARCMENU_PATH + "menu-layout"].get_string() == "Eleven"
+
+    # None volta a chave ao padrão
+    assert write_changes({ARCMENU_PATH + "menu-height": None})
+    assert list(read_values(ARCMENU_PATH, strict=True)) == [ARCMENU_PATH + "menu-layout"]
+
+
+@pytest.fixture
+def shell_down(app, monkeypatch):
+    """Toda chamada ao Shell falha, como com o GNOME Shell fora do barramento"""
+    def unavailable(*args, **kwargs):
+        raise GLib.Error("org.gnome.Shell não está no barramento")
+
+    monkeypatch.setattr(app.extension_state, "_call", unavailable)
+    app.extension_state.invalidate()
+    yield app
+    monkeypatch.undo()
+    app.extension_state.invalidate()
+
+
+def test_unavailable_shell_is_not_an_empty_state(shell_down):
+    from daemon import status_to_variant, variant_to_status
+
+    app = shell_down
+    assert app.extension_state.refresh() is None
+    assert not app.check_extension_installed(ARCMENU)
+
+    latest = app.snapshot_store.latest()
+    assert app.apply_mode("windows10") is False
+    assert app.journal.pending() is None
+    assert app.capture_state() is None
+    assert app.create_backup() is None
+    assert app.snapshot_store.latest() == latest
+
+    status = app.current_status()
+    assert status["extensions"] is None and status["profiles"] == []
+    assert variant_to_status(status_to_variant(status))["extensions"] is None
+    assert app.main(["--local", "status"]) == app.EXIT_FAILURE
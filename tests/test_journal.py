@@ -0,0 +1,135 @@
+"""Diário das trocas: trava entre processos, retomada e desfazer"""
+import pytest
+
+pytest.importorskip("gi")
+
+from journal import Journal, JournalBusy
+
+STEPS = [{"kind": "disable", "ext_ids": ["a@teste"], "message": "Desabilitando extensões..."}]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.json")
+
+
+def test_busy_journal_fails_fast(path):
+    owner = Journal(path)
+    owner.begin("windows10", STEPS)
+
+    # Outro dono (outra descrição de arquivo da trava) não espera: recusa na hora
+    other = Journal(path)
+    with pytest.raises(JournalBusy):
+        other.begin("macos_normal", STEPS)
+    assert other.pending() is None
+
+    owner.clear()
+    other.begin("macos_normal", STEPS)
+    other.clear()
+
+
+def test_released_entry_is_left_for_recovery(path):
+    owner = Journal(path)
+    owner.begin("windows10", STEPS)
+    owner.mark_done(0)
+    owner.release()
+
+    other = Journal(path)
+    entry = other.pending()
+    assert entry["profile"] == "windows10" and entry["done"] == [0]
+    other.resume(entry)
+    other.clear()
+    assert other.pending() is None
+
+
+def test_failed_switch_releases_the_lock(app, monkeypatch):
+    monkeypatch.setattr(app, "write_dconf_delta", lambda delta: False)
+    assert app.apply_mode("windows10") is False
+
+    # O diário fica para recuperação, mas outro processo pode trocar
+    other = Journal(app.journal.path)
+    assert other.pending()["profile"] == "windows10"
+    other.begin("windows10", STEPS)
+    other.clear()
+
+
+def test_exception_releases_the_lock(app, monkeypatch):
+    def interrupt(*args, **kwargs):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(app, "set_extensions_enabled", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        app.apply_mode("windows10")
+    assert Journal(app.journal.path).pending()["profile"] == "windows10"
+
+
+def test_running_switch_is_not_interrupted(app):
+    seen = []
+
+    def cancelled():
+        # Consultado antes de cada etapa, com a troca em andamento
+        seen.append(app.journal.pending())
+        return len(seen) > 1
+
+    before = app.capture_state()
+    assert app.apply_mode("windows10", cancelled=cancelled) is None
+    assert seen == [None, None]
+
+    # Cancelada: a entrada fica para o rollback, que a encontra sem ler o disco
+    assert app.journal.stopped()["profile"] == "windows10"
+    assert app.rollback_cancelled() is True
+    assert app.journal.stopped() is None
+    assert app.journal.pending() is None
+    assert app.capture_state() == before
+
+
+def test_unreadable_dconf_aborts_the_switch(app, monkeypatch):
+    import dconf_settings
+
+    # `dconf dump` falhando: sem os valores atuais não há como desfazer a troca
+    monkeypatch.setattr(dconf_settings, "read_many", lambda paths, strict=False: {
+        path: None if strict else {} for path in paths
+    })
+    before = app.extension_state.refresh()
+    assert app.plan_apply("windows10") is None
+    assert app.apply_mode("windows10") is False
+    assert app.journal.pending() is None
+    monkeypatch.undo()
+
+    app.extension_state.invalidate()
+    assert app.extension_state.refresh() == before
+
+
+@pytest.fixture
+def interrupted(app, monkeypatch):
+    """Troca para windows10 interrompida no meio das habilitações; devolve o estado anterior"""
+    before = app.capture_state()
+    set_extensions_enabled = app.set_extensions_enabled
+
+    def interrupt(ext_ids, enabled, *args, **kwargs):
+        if enabled:
+            set_extensions_enabled(ext_ids[:2], enabled, *args, **kwargs)
+            raise KeyboardInterrupt
+        return set_extensions_enabled(ext_ids, enabled, *args, **kwargs)
+
+    monkeypatch.setattr(app, "set_extensions_enabled", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        app.apply_mode("windows10")
+    monkeypatch.undo()
+
+    entry = app.journal.pending()
+    assert entry["profile"] == "windows10"
+    assert [entry["steps"][index]["kind"] for index in entry["done"]] == ["dconf"]
+    return before
+
+
+def test_resume_runs_only_the_missing_steps(app, interrupted):
+    assert app.recover_interrupted(resume=True)
+    assert app.journal.pending() is None
+    assert app.plan_apply("windows10") == ([], {})
+
+
+def test_undo_restores_the_previous_state(app, interrupted):
+    assert app.recover_interrupted(resume=False)
+    assert app.journal.pending() is None
+    assert app.capture_state() == interrupted
+    assert app.recover_interrupted(resume=False) is False
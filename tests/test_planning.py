@@ -0,0 +1,72 @@
+"""Planos de troca e de restauração: só o que difere do estado atual"""
+import pytest
+
+pytest.importorskip("gi")
+
+from gi.repository import GLib
+
+from dconf_settings import write_changes
+
+
+def operations(plan):
+    return [(op["action"], op["ext_id"]) for op in plan]
+
+
+def test_extension_plan_touches_only_differing_extensions(app):
+    extensions = app.EXTENSIONS
+    always = [extensions[key] for key in app.ALWAYS_ENABLED_EXTENSIONS]
+
+    # Tudo desabilitado: só habilitações, as do perfil e as padrão
+    assert sorted(operations(app.plan_extensions("windows11_centered"))) == sorted(
+        ("enable", ext_id) for ext_id in always + [extensions["panel"], extensions["arcmenu"]]
+    )
+    assert app.apply_mode("windows11_centered")
+
+    # Reaplicar o perfil ativo não faz nada
+    assert app.plan_apply("windows11_centered") == ([], {})
+    # As duas variantes do Windows 11 usam as mesmas extensões
+    assert app.plan_extensions("windows11_left") == []
+    # Desabilitações primeiro; as extensões padrão continuam como estão
+    assert operations(app.plan_extensions("macos_normal")) == [
+        ("disable", extensions["panel"]),
+        ("disable", extensions["arcmenu"]),
+        ("enable", extensions["dash2dock"]),
+    ]
+
+
+def test_dconf_delta_lists_only_changed_keys(app):
+    configs = app.profile_configs("windows11_centered")
+    wanted = {key: value for changes in configs.values() for key, value in changes.items()}
+    # dconf vazio: todas as chaves do perfil mudam, a partir do padrão
+    assert app.plan_dconf(configs) == {key: (None, value) for key, value in wanted.items()}
+
+    same_key, other_key = sorted(wanted)[:2]
+    assert write_changes({same_key: wanted[same_key], other_key: GLib.Variant("s", "outro")})
+    delta = app.plan_dconf(configs)
+    assert same_key not in delta
+    assert delta[other_key][0].get_string() == "outro"
+    assert len(delta) == len(wanted) - 1
+
+    assert app.write_dconf_delta(delta)
+    assert app.plan_dconf(configs) == {}
+
+
+def test_restore_plans_only_the_difference(app):
+    extensions = app.EXTENSIONS
+    assert app.apply_mode("windows11_centered")
+    state = app.snapshot_store.load(app.create_backup())
+    assert app.plan_restore(state) == ({}, {})
+
+    assert app.apply_mode("macos_normal")
+    extension_changes, delta = app.plan_restore(state)
+    assert extension_changes == {
+        extensions["panel"]: True,
+        extensions["arcmenu"]: True,
+        extensions["dash2dock"]: False,
+    }
+    # Chaves gravadas pelo macOS que o backup não tinha voltam ao padrão
+    dash2dock_keys = {key for key in delta if key.startswith(app.DCONF_PATHS["dash2dock"])}
+    assert dash2dock_keys and all(delta[key][1] is None for key in dash2dock_keys)
+
+    assert app.restore_state(state)
+    assert app.plan_restore(state) == ({}, {})
@@ -0,0 +1,118 @@
+"""Perfis: herança com "unset", invalidação pela cadeia e validação na compilação"""
+import json
+import os
+
+import pytest
+
+pytest.importorskip("gi")
+
+from profiles import ProfileStore
+
+DCONF_PATHS = {
+    "panel": "/org/gnome/shell/extensions/dash-to-panel/",
+    "arcmenu": "/org/gnome/shell/extensions/arcmenu/",
+}
+PANEL = DCONF_PATHS["panel"]
+ARCMENU = DCONF_PATHS["arcmenu"]
+
+BASE_CONF = """[panel]
+panel-size=48
+animate-show-apps=true
+
+[arcmenu]
+menu-height=600
+menu-layout='Eleven'
+"""
+
+INDEX = {
+    "base": {"name": "Base", "icon": "windows11", "extensions": ["panel", "arcmenu"], "file": "base.conf"},
+    "filho": {
+        "name": "Filho", "icon": "windows10", "base": "base", "file": "filho.conf",
+        "unset": {"arcmenu": ["menu-height"]},
+    },
+}
+
+
+def write_profiles(directory, index, files):
+    for name, text in files.items():
+        (directory / name).write_text(text)
+    (directory / "index.json").write_text(json.dumps(index))
+
+
+def printed(payload):
+    """{chave: texto GVariant} de todas as extensões do perfil"""
+    return {key: value.print_(False) for values in payload.values() for key, value in values.items()}
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    directory = tmp_path / "perfis"
+    directory.mkdir()
+    write_profiles(directory, INDEX, {"base.conf": BASE_CONF, "filho.conf": "[panel]\npanel-size=32\n"})
+    return directory
+
+
+def make_store(profile_dir, **kwargs):
+    return ProfileStore([str(profile_dir)], DCONF_PATHS, cache_dir=str(profile_dir.parent / "cache"), **kwargs)
+
+
+def test_child_overrides_and_unsets_base_keys(profile_dir):
+    store = make_store(profile_dir)
+    assert store.profiles["filho"]["extensions"] == ["panel", "arcmenu"]
+
+    assert printed(store.load_dconf("filho")) == {
+        PANEL + "panel-size": "32",
+        PANEL + "animate-show-apps": "true",
+        ARCMENU + "menu-layout": "'Eleven'",
+    }
+    # A base não é afetada pelo que o filho sobrescreve ou remove
+    assert printed(store.load_dconf("base"))[PANEL + "panel-size"] == "48"
+    assert printed(store.load_dconf("base"))[ARCMENU + "menu-height"] == "600"
+
+
+def test_changing_the_base_invalidates_merged_children(profile_dir):
+    store = make_store(profile_dir)
+    assert printed(store.load_dconf("filho"))[PANEL + "animate-show-apps"] == "true"
+
+    (profile_dir / "base.conf").write_text(BASE_CONF.replace("animate-show-apps=true", "animate-show-apps=false"))
+
+    # Tanto a memória deste processo quanto o cache em disco de um processo novo
+    assert printed(store.load_dconf("filho"))[PANEL + "animate-show-apps"] == "false"
+    assert printed(make_store(profile_dir).load_dconf("filho"))[PANEL + "animate-show-apps"] == "false"
+
+
+def test_invalid_inheritance_is_discarded(profile_dir):
+    index = dict(INDEX)
+    index["orfao"] = {"name": "Órfão", "base": "nao-existe"}
+    index["a"] = {"name": "A", "base": "b"}
+    index["b"] = {"name": "B", "base": "a"}
+    index["unset-ruim"] = {"name": "Unset", "base": "base", "unset": {"desconhecida": ["chave"]}}
+    write_profiles(profile_dir, index, {})
+
+    store = make_store(profile_dir)
+    assert sorted(store.profiles) == ["base", "filho"]
+    assert sorted(store.index_errors) == ["a", "b", "orfao", "unset-ruim"]
+
+
+def test_compile_rejects_parse_and_type_errors(profile_dir, tmp_path):
+    index = dict(INDEX)
+    index["quebrado"] = {"name": "Quebrado", "extensions": ["panel"], "file": "quebrado.conf"}
+    index["tipo"] = {"name": "Tipo", "extensions": ["panel"], "file": "tipo.conf"}
+    write_profiles(profile_dir, index, {
+        "quebrado.conf": "[panel]\nanimate-show-apps=verdadeiro\n",
+        # 48.0 é double; os outros perfis usam int32 para a mesma chave
+        "tipo.conf": "[panel]\npanel-size=48.0\n",
+    })
+
+    output_dir = tmp_path / "compilados"
+    errors = make_store(profile_dir).compile(str(output_dir))
+    assert sorted(errors) == ["quebrado", "tipo"]
+    assert any("tipo d" in error for error in errors["tipo"])
+    assert sorted(os.listdir(output_dir)) == ["base.gvariant", "filho.gvariant"]
+
+    # O perfil compilado é usado enquanto as fontes não mudam
+    store = make_store(profile_dir, compiled_dir=str(output_dir))
+    assert printed(store._read_compiled("filho"))[PANEL + "panel-size"] == "32"
+    (profile_dir / "filho.conf").write_text("[panel]\npanel-size=40\n")
+    assert store._read_compiled("filho") is None
+    assert printed(store.load_dconf("filho"))[PANEL + "panel-size"] == "40"
@@ -0,0 +1,107 @@
+"""Fila das trocas: pedidos substituídos, cancelamento com rollback e tarefas avulsas"""
+import threading
+
+import pytest
+
+from scheduler import ApplyScheduler
+
+TIMEOUT = 5
+
+
+class FakeEngine:
+    """apply/rollback de mentira: cada troca espera `release` antes de terminar"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.order = []
+        self.rollbacks = 0
+
+    def apply(self, profile_name, progress_callback, cancelled):
+        self.started.set()
+        assert self.release.wait(TIMEOUT)
+        if profile_name == "falha":
+            raise RuntimeError("troca com erro")
+        self.order.append(profile_name)
+        return None if cancelled() else True
+
+    def rollback(self, progress_callback):
+        self.rollbacks += 1
+        self.order.append("rollback")
+
+
+@pytest.fixture
+def engine():
+    return FakeEngine()
+
+
+@pytest.fixture
+def scheduler(engine):
+    return ApplyScheduler(engine.apply, engine.rollback)
+
+
+def test_latest_request_replaces_the_waiting_one(engine, scheduler):
+    callback_threads = {}
+
+    def done_callback(request):
+        callback_threads[request.profile_name] = threading.current_thread().name
+
+    first = scheduler.submit("a", done_callback=done_callback)
+    assert engine.started.wait(TIMEOUT)
+    second = scheduler.submit("b", done_callback=done_callback)
+    third = scheduler.submit("c", done_callback=done_callback)
+
+    engine.release.set()
+
+    # "b" nunca roda: termina cancelado, mas na thread das trocas
+    assert second.wait(TIMEOUT) is False
+    assert second.cancelled()
+    assert third.wait(TIMEOUT) is True
+    assert first.result is False and first.cancelled()
+    # A troca seguinte parte de onde "a" parou: nada é desfeito
+    assert engine.order == ["a", "c"]
+    assert set(callback_threads) == {"a", "b", "c"}
+    assert set(callback_threads.values()) == {"apply-scheduler"}
+
+
+def test_cancel_rolls_back_running_switch(engine, scheduler):
+    request = scheduler.submit("a")
+    assert engine.started.wait(TIMEOUT)
+    scheduler.cancel()
+    engine.release.set()
+
+    assert request.wait(TIMEOUT) is False
+    assert request.cancelled()
+    assert engine.order == ["a", "rollback"]
+
+
+def test_cancel_drops_waiting_switch(engine, scheduler):
+    running = scheduler.submit("a")
+    assert engine.started.wait(TIMEOUT)
+    waiting = scheduler.submit("b")
+    scheduler.cancel()
+    engine.release.set()
+
+    assert running.wait(TIMEOUT) is False
+    assert waiting.wait(TIMEOUT) is False
+    assert waiting.cancelled()
+    assert engine.order == ["a", "rollback"]
+
+
+def test_tasks_run_in_submission_order(engine, scheduler):
+    scheduler.submit("a")
+    assert engine.started.wait(TIMEOUT)
+    queued = scheduler.submit("b")
+    task = scheduler.call(engine.order.append, "tarefa")
+    engine.release.set()
+
+    task.result(TIMEOUT)
+    assert queued.result is True
+    assert engine.order == ["a", "b", "tarefa"]
+
+
+def test_failed_switch_does_not_stop_the_worker(engine, scheduler):
+    engine.release.set()
+    assert scheduler.submit("falha").wait(TIMEOUT) is False
+    assert scheduler.submit("a").wait(TIMEOUT) is True
+    assert isinstance(scheduler.call(lambda: 1 / 0).exception(TIMEOUT), ZeroDivisionError)
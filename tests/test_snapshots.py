@@ -0,0 +1,92 @@
+"""Snapshots: deduplicação por conteúdo, blobs compartilhados, retenção e o que o backup guarda"""
+import os
+
+import pytest
+
+pytest.importorskip("gi")
+
+from snapshots import SnapshotStore
+
+
+def make_state(layout="'Eleven'", blur="true"):
+    return {
+        "extensions": {"arcmenu@arcmenu.com": True, "blur-my-shell@aunetx": False},
+        "dconf": {
+            "/org/gnome/shell/extensions/arcmenu/": {"menu-layout": layout},
+            "/org/gnome/shell/extensions/blur-my-shell/": {"blur-panel": blur},
+        },
+    }
+
+
+def object_count(store):
+    return sum(len(files) for _, _, files in os.walk(store.objects_dir))
+
+
+def test_same_state_is_not_stored_twice(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first_id, created = store.take(make_state(), "automático")
+    assert created
+    objects = object_count(store)
+
+    assert store.take(make_state(), "manual") == (first_id, False)
+    assert [entry["id"] for entry in store.list()] == [first_id]
+    assert object_count(store) == objects
+    assert store.load(first_id) == make_state()
+
+
+def test_unchanged_parts_are_shared(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    store.take(make_state())
+    # extensões, duas subárvores e o manifesto
+    assert object_count(store) == 4
+
+    # Só uma subárvore mudou: um blob novo e um manifesto novo
+    second_id, created = store.take(make_state(layout="'Windows'"))
+    assert created
+    assert object_count(store) == 6
+    assert store.load(second_id) == make_state(layout="'Windows'")
+
+
+def test_returning_to_an_older_state_is_a_new_entry(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first_id, _ = store.take(make_state())
+    second_id, _ = store.take(make_state(blur="false"))
+    assert store.take(make_state()) == (first_id, True)
+    assert [entry["id"] for entry in store.list()] == [first_id, second_id, first_id]
+
+
+def test_retention_keeps_newest_and_collects_garbage(tmp_path):
+    store = SnapshotStore(str(tmp_path), keep=3)
+    ids = [store.take(make_state(layout=f"'Layout{i}'"))[0] for i in range(5)]
+
+    assert [entry["id"] for entry in store.list()] == ids[-3:]
+    assert store.load(ids[0]) is None
+    assert store.load(ids[-1]) == make_state(layout="'Layout4'")
+    # Blobs compartilhados (extensões, blur-my-shell) uma vez; por snapshot, layout e manifesto
+    assert object_count(store) == 2 + 3 * 2
+
+
+def test_size_limit_always_keeps_latest(tmp_path):
+    store = SnapshotStore(str(tmp_path), max_bytes=1)
+    store.take(make_state())
+    latest_id, _ = store.take(make_state(blur="false"))
+
+    assert [entry["id"] for entry in store.list()] == [latest_id]
+    assert store.latest()["id"] == latest_id
+    assert object_count(store) == 4
+
+
+def test_backup_covers_every_managed_extension(app):
+    from gi.repository import GLib
+
+    from dconf_settings import read_values, write_changes
+
+    # blur-my-shell não está em nenhum perfil, mas é uma extensão gerenciada
+    blur_path = app.SETTINGS_PATHS["blur"]
+    assert write_changes({blur_path + "sigma": GLib.Variant("i", 30)})
+    backup_id = app.create_backup()
+    assert set(app.snapshot_store.load(backup_id)["dconf"]) == set(app.SETTINGS_PATHS.values())
+
+    assert write_changes({blur_path + "sigma": GLib.Variant("i", 5), blur_path + "brightness": GLib.Variant("d", 0.2)})
+    assert app.restore_backup(backup_id)
+    assert read_values(blur_path, strict=True) == {blur_path + "sigma": GLib.Variant("i", 30)}
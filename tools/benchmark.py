@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Benchmarks da troca de perfil, do backup/restauração e da abertura da janela.
+
+Roda em uma máquina sem GNOME Shell: sobe um barramento de sessão próprio
+com os serviços falsos do Shell e do dconf e coloca `gnome-extensions`,
+`dconf` e `gsettings` falsos no PATH, todos com latência configurável.
+
+Para cada cenário informa tempo total, processos criados pelo aplicativo,
+processos das ferramentas e tempo gasto em time.sleep.
+
+Uso:
+    python3 tools/benchmark.py [--latency 0.05] [--repeat 3]
+                               [--save-baseline base.json | --baseline base.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+
+FAKE_TOOLS = ["gnome-extensions", "dconf", "gsettings"]
+
+
+class Counters:
+    """Contadores de processos criados e de tempo dormindo"""
+
+    def __init__(self):
+        self.spawns = 0
+        self.sleep = 0.0
+
+    def reset(self):
+        self.spawns = 0
+        self.sleep = 0.0
+
+
+COUNTERS = Counters()
+
+
+def install_counters():
+    """Conta cada subprocesso e cada time.sleep feitos pelo aplicativo"""
+    real_popen = subprocess.Popen
+    real_sleep = time.sleep
+
+    class CountingPopen(real_popen):
+        def __init__(self, *args, **kwargs):
+            COUNTERS.spawns += 1
+            super().__init__(*args, **kwargs)
+
+    def counting_sleep(seconds):
+        COUNTERS.sleep += seconds
+        real_sleep(seconds)
+
+    subprocess.Popen = CountingPopen
+    time.sleep = counting_sleep
+
+
+class FakeEnvironment:
+    """Barramento de sessão isolado com Shell, dconf e ferramentas falsos"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.root = tempfile.mkdtemp(prefix="gnome-customizer-bench-")
+        self.tool_log = os.path.join(self.root, "ferramentas.log")
+        self.processes = []
+
+    def start(self):
+        # Diretórios pessoais temporários: backups e caches não tocam no usuário real
+        for name in ("home", "cache", "data", "state", "bin"):
+            os.makedirs(os.path.join(self.root, name))
+        os.environ["HOME"] = os.path.join(self.root, "home")
+        os.environ["XDG_CACHE_HOME"] = os.path.join(self.root, "cache")
+        os.environ["XDG_DATA_HOME"] = os.path.join(self.root, "data")
+        os.environ["XDG_STATE_HOME"] = os.path.join(self.root, "state")
+        os.environ["FAKE_TOOLS_LOG"] = self.tool_log
+        os.environ["FAKE_TOOLS_LATENCY"] = str(self.latency)
+
+        bin_dir = os.path.join(self.root, "bin")
+        for tool in FAKE_TOOLS:
+            path = os.path.join(bin_dir, tool)
+            with open(path, "w") as f:
+                f.write(f'#!/bin/sh\nexec "{sys.executable}" "{TOOLS_DIR}/fake_tools.py" {tool} "$@"\n')
+            os.chmod(path, 0o755)
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+        daemon = subprocess.Popen(
+            ["dbus-daemon", "--session", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE, text=True
+        )
+        self.processes.append(daemon)
+        os.environ["DBUS_SESSION_BUS_ADDRESS"] = daemon.stdout.readline().strip()
+
+    def start_services(self, installed):
+        """Sobe os serviços falsos e espera os nomes aparecerem no barramento"""
+        self.processes.append(subprocess.Popen([
+            sys.executable, os.path.join(TOOLS_DIR, "fake_shell_service.py"),
+            "--installed", ",".join(installed), "--latency", str(self.latency)
+        ]))
+        self.processes.append(subprocess.Popen([
+            sys.executable, os.path.join(TOOLS_DIR, "fake_dconf_service.py")
+        ]))
+
+        from gi.repository import Gio, GLib
+        connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        deadline = time.monotonic() + 10
+        for name in ("org.gnome.Shell", "ca.desrt.dconf"):
+            while True:
+                reply = connection.call_sync(
+                    "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus",
+                    "NameHasOwner", GLib.Variant("(s)", (name,)), GLib.VariantType("(b)"),
+                    Gio.DBusCallFlags.NONE, -1, None
+                )
+                if reply.unpack()[0]:
+                    break
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"serviço falso {name} não iniciou")
+                time.sleep(0.05)
+
+    def reset(self, enabled):
+        """Volta Shell e dconf falsos a um estado conhecido"""
+        from gi.repository import Gio, GLib
+        connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        connection.call_sync(
+            "org.gnome.Shell", "/org/gnome/Shell", "org.gnome.Shell.Extensions.Testing",
+            "Reset", GLib.Variant("(as)", (list(enabled),)), None,
+            Gio.DBusCallFlags.NONE, -1, None
+        )
+        connection.call_sync(
+            "ca.desrt.dconf", "/ca/desrt/dconf/Writer/user", "ca.desrt.dconf.Testing",
+            "Reset", None, None, Gio.DBusCallFlags.NONE, -1, None
+        )
+
+    def tool_spawns(self):
+        """Número de execuções das ferramentas falsas desde o último reset do log"""
+        if not os.path.exists(self.tool_log):
+            return 0
+        with open(self.tool_log) as f:
+            return sum(1 for _ in f)
+
+    def clear_tool_log(self):
+        if os.path.exists(self.tool_log):
+            os.unlink(self.tool_log)
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.terminate()
+            process.wait()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def build_scenarios(app, env):
+    """Cenários: (nome, preparação, ação)"""
+    always = [app.EXTENSIONS[key] for key in app.ALWAYS_ENABLED_EXTENSIONS]
+
+    def profile_enabled(profile_name):
+        keys = list(app.PROFILES[profile_name]["extensions"]) + app.ALWAYS_ENABLED_EXTENSIONS
+        return [app.EXTENSIONS[key] for key in keys]
+
+    def from_nothing():
+        env.reset([])
+
+    def from_profile(profile_name):
+        def setup():
+            env.reset(profile_enabled(profile_name))
+            app.extension_state.invalidate()
+            app.apply_mode(profile_name)
+        return setup
+
+    def with_backup():
+        env.reset(always)
+        app.extension_state.invalidate()
+        app.create_backup()
+        env.reset([])
+
+    scenarios = [
+        ("apply_frio", from_nothing, lambda: app.apply_mode("windows11_centered")),
+        ("apply_troca_windows11", from_profile("windows11_centered"), lambda: app.apply_mode("windows11_left")),
+        ("apply_mesmo_perfil", from_profile("windows11_left"), lambda: app.apply_mode("windows11_left")),
+        ("apply_troca_macos", from_profile("windows10"), lambda: app.apply_mode("macos_normal")),
+        ("create_backup", lambda: env.reset(always), app.create_backup),
+        ("restore_backup", with_backup, app.restore_backup),
+    ]
+
+    if has_display():
+        def open_window():
+            from gi.repository import Gtk
+            from interface import CustomizerWindow
+            window = CustomizerWindow()
+            window.show_all()
+            while Gtk.events_pending():
+                Gtk.main_iteration()
+            window.destroy()
+        scenarios.append(("janela", lambda: env.reset(always), open_window))
+    else:
+        print("Aviso: sem display; cenário 'janela' ignorado (use xvfb-run para incluí-lo)")
+
+    return scenarios
+
+
+def has_display():
+    try:
+        import gi
+        gi.require_version("Gdk", "3.0")
+        from gi.repository import Gdk
+        return Gdk.Display.get_default() is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def run_scenarios(app, env, repeat, only=None):
+    from commands import runner
+
+    results = {}
+    for name, setup, action in build_scenarios(app, env):
+        if only and name not in only:
+            continue
+        runs = []
+        for _ in range(repeat):
+            setup()
+            app.extension_state.invalidate()
+            env.clear_tool_log()
+            COUNTERS.reset()
+            runner.reset_counters()
+            start = time.perf_counter()
+            action()
+            wall = time.perf_counter() - start
+            runs.append({
+                "wall": wall,
+                "spawns": COUNTERS.spawns,
+                "tool_spawns": env.tool_spawns(),
+                "sleep": COUNTERS.sleep,
+                "spawn_time": runner.spawn_seconds,
+            })
+        results[name] = {
+            "wall": statistics.median(run["wall"] for run in runs),
+            "spawns": max(run["spawns"] for run in runs),
+            "tool_spawns": max(run["tool_spawns"] for run in runs),
+            "sleep": max(run["sleep"] for run in runs),
+            "spawn_time": statistics.median(run["spawn_time"] for run in runs),
+        }
+    return results
+
+
+def print_results(results):
+    print(f"{'cenário':<24} {'tempo (s)':>10} {'processos':>10} {'ferramentas':>12} {'sleep (s)':>10} "
+          f"{'comandos (s)':>13}")
+    for name, result in results.items():
+        print(f"{name:<24} {result['wall']:>10.3f} {result['spawns']:>10} "
+              f"{result['tool_spawns']:>12} {result['sleep']:>10.2f} {result.get('spawn_time', 0.0):>13.3f}")
+
+
+def compare(results, baseline, threshold):
+    """Lista as regressões em relação à linha de base"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["wall"] > base["wall"] * (1 + threshold) and result["wall"] - base["wall"] > 0.01:
+            regressions.append(f"{name}: tempo {base['wall']:.3f}s -> {result['wall']:.3f}s")
+        for counter in ("spawns", "tool_spawns"):
+            if result[counter] > base[counter]:
+                regressions.append(f"{name}: {counter} {base[counter]} -> {result[counter]}")
+        if result["sleep"] > base["sleep"] + 0.001:
+            regressions.append(f"{name}: sleep {base['sleep']:.2f}s -> {result['sleep']:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do GNOME Customizer com Shell e dconf falsos")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="Latência (s) das ferramentas e dos sinais do Shell falsos")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por cenário (mediana)")
+    parser.add_argument("--scenario", action="append", help="Roda só os cenários indicados")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo")
+    parser.add_argument("--baseline", help="Compara com esta linha de base e falha em regressões")
+    parser.add_argument("--save-baseline", help="Grava os resultados como nova linha de base")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Aumento de tempo tolerado em relação à linha de base (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    env = FakeEnvironment(args.latency)
+    env.start()
+    try:
+        sys.path.insert(0, REPO_DIR)
+        os.chdir(REPO_DIR)
+        import index as app
+
+        installed = sorted(set(app.EXTENSIONS.values()) | set(app.extensoes))
+        env.start_services(installed)
+        install_counters()
+
+        results = run_scenarios(app, env, args.repeat, args.scenario)
+    finally:
+        env.stop()
+
+    print_results(results)
+
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressões:")
+            for regression in regressions:
+                print(f"- {regression}")
+            return 1
+        print("\nSem regressões em relação à linha de base.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
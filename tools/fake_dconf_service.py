@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Serviço D-Bus que imita o gravador do dconf (ca.desrt.dconf.Writer) para testes locais.
+
+Guarda os valores em memória e imprime cada change set recebido.
+
+Uso (em um barramento de sessão isolado):
+    dbus-run-session -- python3 tools/fake_dconf_service.py
+"""
+import argparse
+import sys
+
+from gi.repository import Gio, GLib
+
+DCONF_BUS_NAME = "ca.desrt.dconf"
+DCONF_WRITER_PATH = "/ca/desrt/dconf/Writer/user"
+
+INTROSPECTION_XML = """
+<node>
+  <interface name="ca.desrt.dconf.Writer">
+    <method name="Change">
+      <arg type="ay" direction="in" name="blob"/>
+      <arg type="s" direction="out" name="tag"/>
+    </method>
+    <signal name="Notify">
+      <arg type="s" name="prefix"/>
+      <arg type="as" name="changes"/>
+      <arg type="s" name="tag"/>
+    </signal>
+  </interface>
+  <interface name="ca.desrt.dconf.Testing">
+    <method name="Dump">
+      <arg type="s" direction="in" name="path"/>
+      <arg type="s" direction="out" name="keyfile"/>
+    </method>
+    <method name="Reset"/>
+  </interface>
+</node>
+"""
+
+
+class FakeDconfWriter:
+    """Implementação mínima do método Change do dconf"""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.values = {}
+        self.counter = 0
+        self.connection = None
+
+    def on_testing_call(self, connection, sender, path, interface, method, params, invocation):
+        # Interface extra (não existe no dconf real) usada pelas ferramentas de benchmark
+        if method == "Dump":
+            invocation.return_value(GLib.Variant("(s)", (dump_keyfile(self.values, params.unpack()[0]),)))
+        else:
+            self.values = {}
+            invocation.return_value(None)
+
+    def on_method_call(self, connection, sender, path, interface, method, params, invocation):
+        if method != "Change":
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.UnknownMethod", f"Método desconhecido: {method}"
+            )
+            return
+
+        blob = params.get_child_value(0).get_data_as_bytes()
+        changeset = GLib.Variant.new_from_bytes(GLib.VariantType("a{smv}"), blob, False)
+
+        changed = []
+        for i in range(changeset.n_children()):
+            entry = changeset.get_child_value(i)
+            key = entry.get_child_value(0).get_string()
+            maybe = entry.get_child_value(1)
+            value = maybe.get_child_value(0).get_variant() if maybe.n_children() else None
+            if key.endswith("/"):
+                for existing in [k for k in self.values if k.startswith(key)]:
+                    del self.values[existing]
+            elif value is None:
+                self.values.pop(key, None)
+            else:
+                self.values[key] = value
+            changed.append(key)
+            if self.verbose:
+                print(f"{key} = {value.print_(True) if value is not None else '(redefinida)'}")
+
+        self.counter += 1
+        tag = f"fake:{self.counter}"
+        invocation.return_value(GLib.Variant("(s)", (tag,)))
+
+        if changed:
+            prefix = changed[0] if len(changed) == 1 else "/"
+            relative = [key[len(prefix):] for key in changed] if len(changed) > 1 else [""]
+            connection.emit_signal(
+                None, DCONF_WRITER_PATH, "ca.desrt.dconf.Writer", "Notify",
+                GLib.Variant("(sass)", (prefix, relative, tag))
+            )
+
+
+def dump_keyfile(values, path):
+    """Texto no formato do `dconf dump` para as chaves sob `path`"""
+    sections = {}
+    for key in sorted(values):
+        if not key.startswith(path):
+            continue
+        directory, _, name = key[len(path):].rpartition("/")
+        sections.setdefault(directory or "/", []).append(f"{name}={values[key].print_(True)}")
+
+    lines = []
+    for directory, entries in sections.items():
+        lines.append(f"[{directory}]")
+        lines.extend(entries)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço falso ca.desrt.dconf.Writer")
+    parser.add_argument("--verbose", action="store_true", help="Imprime cada chave gravada")
+    args = parser.parse_args()
+
+    service = FakeDconfWriter(args.verbose)
+    node_info = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION_XML)
+    loop = GLib.MainLoop()
+
+    def on_bus_acquired(connection, name):
+        service.connection = connection
+        connection.register_object(
+            DCONF_WRITER_PATH, node_info.interfaces[0], service.on_method_call, None, None
+        )
+        connection.register_object(
+            DCONF_WRITER_PATH, node_info.interfaces[1], service.on_testing_call, None, None
+        )
+
+    def on_name_lost(connection, name):
+        print(f"Não foi possível obter o nome {name} no barramento", file=sys.stderr)
+        loop.quit()
+
+    Gio.bus_own_name(
+        Gio.BusType.SESSION, DCONF_BUS_NAME, Gio.BusNameOwnerFlags.NONE,
+        on_bus_acquired, None, on_name_lost
+    )
+    loop.run()
+
+
+if __name__ == "__main__":
+    main()
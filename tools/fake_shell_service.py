@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Serviço D-Bus que imita org.gnome.Shell.Extensions para testes locais.
+
+Uso (em um barramento de sessão isolado):
+    dbus-run-session -- python3 tools/fake_shell_service.py \\
+        --installed dash-to-panel@jderose9.github.com,arcmenu@arcmenu.com \\
+        --enabled arcmenu@arcmenu.com
+"""
+import argparse
+import sys
+
+from gi.repository import Gio, GLib
+
+SHELL_BUS_NAME = "org.gnome.Shell"
+SHELL_OBJECT_PATH = "/org/gnome/Shell"
+
+INTROSPECTION_XML = """
+<node>
+  <interface name="org.gnome.Shell.Extensions">
+    <method name="ListExtensions">
+      <arg type="a{sa{sv}}" direction="out" name="extensions"/>
+    </method>
+    <method name="GetExtensionInfo">
+      <arg type="s" direction="in" name="uuid"/>
+      <arg type="a{sv}" direction="out" name="info"/>
+    </method>
+    <method name="EnableExtension">
+      <arg type="s" direction="in" name="uuid"/>
+      <arg type="b" direction="out" name="success"/>
+    </method>
+    <method name="DisableExtension">
+      <arg type="s" direction="in" name="uuid"/>
+      <arg type="b" direction="out" name="success"/>
+    </method>
+    <signal name="ExtensionStateChanged">
+      <arg type="s" name="uuid"/>
+      <arg type="a{sv}" name="state"/>
+    </signal>
+    <property name="ShellVersion" type="s" access="read"/>
+  </interface>
+  <interface name="org.gnome.Shell.Extensions.Testing">
+    <method name="Reset">
+      <arg type="as" direction="in" name="enabled"/>
+    </method>
+    <method name="SetUserExtensionsDisabled">
+      <arg type="b" direction="in" name="disabled"/>
+    </method>
+  </interface>
+</node>
+"""
+
+# Interface extra (não existe no Shell real) usada pelas ferramentas de benchmark:
+# Reset define o estado inicial e SetUserExtensionsDisabled imita a chave
+# org.gnome.shell disable-user-extensions
+TESTING_INTERFACE = "org.gnome.Shell.Extensions.Testing"
+
+STATE_ENABLED = 1
+STATE_DISABLED = 2
+
+
+class FakeShellExtensions:
+    """Implementação mínima da interface de extensões do GNOME Shell"""
+
+    def __init__(self, installed, enabled, latency=0.0):
+        self.latency = latency
+        self.states = {
+            uuid: STATE_ENABLED if uuid in enabled else STATE_DISABLED
+            for uuid in installed
+        }
+        self.connection = None
+        self.suspended = []
+
+    def info(self, uuid):
+        """Dicionário a{sv} com os dados de uma extensão"""
+        state = self.states[uuid]
+        return {
+            "uuid": GLib.Variant("s", uuid),
+            "state": GLib.Variant("d", float(state)),
+            "enabled": GLib.Variant("b", state == STATE_ENABLED),
+        }
+
+    def set_state(self, uuid, state):
+        """Altera o estado de uma extensão e emite ExtensionStateChanged"""
+        if self.states[uuid] == state:
+            return False
+        self.states[uuid] = state
+        self.connection.emit_signal(
+            None, SHELL_OBJECT_PATH, "org.gnome.Shell.Extensions",
+            "ExtensionStateChanged",
+            GLib.Variant("(sa{sv})", (uuid, self.info(uuid)))
+        )
+        return False
+
+    def on_method_call(self, connection, sender, path, interface, method, params, invocation):
+        if method == "ListExtensions":
+            result = {uuid: self.info(uuid) for uuid in self.states}
+            invocation.return_value(GLib.Variant("(a{sa{sv}})", (result,)))
+        elif method == "GetExtensionInfo":
+            uuid = params.unpack()[0]
+            info = self.info(uuid) if uuid in self.states else {}
+            invocation.return_value(GLib.Variant("(a{sv})", (info,)))
+        elif method in ("EnableExtension", "DisableExtension"):
+            uuid = params.unpack()[0]
+            if uuid not in self.states:
+                invocation.return_value(GLib.Variant("(b)", (False,)))
+                return
+            state = STATE_ENABLED if method == "EnableExtension" else STATE_DISABLED
+            invocation.return_value(GLib.Variant("(b)", (True,)))
+            # Como no Shell real, a mudança é anunciada depois da resposta
+            GLib.timeout_add(int(self.latency * 1000), self.set_state, uuid, state)
+        else:
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.UnknownMethod", f"Método desconhecido: {method}"
+            )
+
+    def on_testing_call(self, connection, sender, path, interface, method, params, invocation):
+        if method == "Reset":
+            enabled = set(params.unpack()[0])
+            self.suspended = []
+            for uuid in self.states:
+                self.states[uuid] = STATE_ENABLED if uuid in enabled else STATE_DISABLED
+        elif method == "SetUserExtensionsDisabled":
+            if params.unpack()[0]:
+                self.suspended = [uuid for uuid, state in self.states.items() if state == STATE_ENABLED]
+                targets = [(uuid, STATE_DISABLED) for uuid in self.suspended]
+            else:
+                targets = [(uuid, STATE_ENABLED) for uuid in self.suspended]
+                self.suspended = []
+            for uuid, state in targets:
+                GLib.timeout_add(int(self.latency * 1000), self.set_state, uuid, state)
+        invocation.return_value(None)
+
+    def on_get_property(self, connection, sender, path, interface, name):
+        if name == "ShellVersion":
+            return GLib.Variant("s", "46.0")
+        return None
+
+
+def split_list(value):
+    return [item for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço falso org.gnome.Shell.Extensions")
+    parser.add_argument("--installed", type=split_list, default=[],
+                        help="UUIDs instalados, separados por vírgula")
+    parser.add_argument("--enabled", type=split_list, default=[],
+                        help="UUIDs habilitados, separados por vírgula")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Atraso (s) até o Shell anunciar cada mudança de estado")
+    args = parser.parse_args()
+
+    service = FakeShellExtensions(args.installed, set(args.enabled), args.latency)
+    node_info = Gio.DBusNodeInfo.new_for_xml(INTROSPECTION_XML)
+    loop = GLib.MainLoop()
+
+    def on_bus_acquired(connection, name):
+        service.connection = connection
+        connection.register_object(
+            SHELL_OBJECT_PATH, node_info.interfaces[0],
+            service.on_method_call, service.on_get_property, None
+        )
+        connection.register_object(
+            SHELL_OBJECT_PATH, node_info.interfaces[1], service.on_testing_call, None, None
+        )
+
+    def on_name_lost(connection, name):
+        print(f"Não foi possível obter o nome {name} no barramento", file=sys.stderr)
+        loop.quit()
+
+    Gio.bus_own_name(
+        Gio.BusType.SESSION, SHELL_BUS_NAME, Gio.BusNameOwnerFlags.NONE,
+        on_bus_acquired, None, on_name_lost
+    )
+    loop.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Substitutos de `gnome-extensions`, `dconf` e `gsettings` para benchmarks sem GNOME Shell.
+
+Uso: fake_tools.py <ferramenta> [argumentos...]
+
+Cada execução é registrada em $FAKE_TOOLS_LOG (uma linha por processo) e
+espera $FAKE_TOOLS_LATENCY segundos antes de responder. O estado fica nos
+serviços falsos (fake_shell_service.py e fake_dconf_service.py) do
+barramento de sessão.
+"""
+import os
+import sys
+import time
+
+from gi.repository import Gio, GLib
+
+SHELL_BUS_NAME = "org.gnome.Shell"
+SHELL_OBJECT_PATH = "/org/gnome/Shell"
+DCONF_BUS_NAME = "ca.desrt.dconf"
+DCONF_WRITER_PATH = "/ca/desrt/dconf/Writer/user"
+
+
+def call(bus_name, path, interface, method, parameters=None, reply_type=None):
+    connection = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    return connection.call_sync(
+        bus_name, path, interface, method, parameters,
+        GLib.VariantType(reply_type) if reply_type else None,
+        Gio.DBusCallFlags.NONE, -1, None
+    )
+
+
+def gnome_extensions(args):
+    iface = "org.gnome.Shell.Extensions"
+    if not args:
+        return 1
+    command = args[0]
+    if command == "list":
+        result = call(SHELL_BUS_NAME, SHELL_OBJECT_PATH, iface, "ListExtensions", None, "(a{sa{sv}})")
+        for uuid in result.unpack()[0]:
+            print(uuid)
+        return 0
+    if command == "info" and len(args) > 1:
+        result = call(SHELL_BUS_NAME, SHELL_OBJECT_PATH, iface, "GetExtensionInfo",
+                      GLib.Variant("(s)", (args[1],)), "(a{sv})")
+        info = result.unpack()[0]
+        if not info:
+            print(f"A extensão “{args[1]}” não existe", file=sys.stderr)
+            return 2
+        print(args[1])
+        print(f"  State: {'ENABLED' if int(info['state']) == 1 else 'DISABLED'}")
+        return 0
+    if command in ("enable", "disable") and len(args) > 1:
+        method = "EnableExtension" if command == "enable" else "DisableExtension"
+        result = call(SHELL_BUS_NAME, SHELL_OBJECT_PATH, iface, method,
+                      GLib.Variant("(s)", (args[1],)), "(b)")
+        return 0 if result.unpack()[0] else 2
+    return 1
+
+
+def dconf(args):
+    if len(args) == 2 and args[0] == "dump":
+        result = call(DCONF_BUS_NAME, DCONF_WRITER_PATH, "ca.desrt.dconf.Testing", "Dump",
+                      GLib.Variant("(s)", (args[1],)), "(s)")
+        sys.stdout.write(result.unpack()[0])
+        return 0
+    if len(args) == 3 and args[0] == "compile":
+        # Sem o formato binário do dconf: o "banco" é a concatenação dos keyfiles
+        names = sorted(name for name in os.listdir(args[2]) if os.path.isfile(os.path.join(args[2], name)))
+        with open(args[1], "w") as out:
+            for name in names:
+                with open(os.path.join(args[2], name)) as f:
+                    out.write(f.read())
+        return 0
+    return 1
+
+
+def gsettings(args):
+    if args[:3] == ["set", "org.gnome.shell", "disable-user-extensions"] and len(args) == 4:
+        call(SHELL_BUS_NAME, SHELL_OBJECT_PATH, "org.gnome.Shell.Extensions.Testing",
+             "SetUserExtensionsDisabled", GLib.Variant("(b)", (args[3] == "true",)))
+    return 0
+
+
+TOOLS = {
+    "gnome-extensions": gnome_extensions,
+    "dconf": dconf,
+    "gsettings": gsettings,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in TOOLS:
+        print(__doc__, file=sys.stderr)
+        return 1
+
+    log_path = os.environ.get("FAKE_TOOLS_LOG")
+    if log_path:
+        with open(log_path, "a") as f:
+            f.write(" ".join(sys.argv[1:]) + "\n")
+
+    time.sleep(float(os.environ.get("FAKE_TOOLS_LATENCY", "0")))
+    return TOOLS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Registro das etapas de uma troca de perfil, exportável no formato Chrome trace-event"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from files import atomic_write
+
+
+class Tracer:
+    """Coleta spans (nome, início, fim, argumentos) das operações
+
+    Desligado por padrão; com `enabled` verdadeiro cada span é guardado e
+    pode ser gravado como JSON do chrome://tracing / Perfetto.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.perf_counter()
+
+    @contextmanager
+    def span(self, name, category="apply", **args):
+        """Mede o bloco; o dicionário retornado recebe o resultado da operação"""
+        start = self.now()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = repr(e)
+            raise
+        finally:
+            self.add_span(name, start, self.now(), category, **args)
+
+    def add_span(self, name, start, end, category="apply", **args):
+        """Registra um span com início e fim já conhecidos"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._spans.append({
+                "name": name,
+                "cat": category,
+                "start": start,
+                "end": end,
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def clear(self):
+        """Descarta os spans coletados"""
+        with self._lock:
+            self._spans = []
+
+    def to_chrome_trace(self):
+        """Converte os spans em eventos completos ("ph": "X") em microssegundos"""
+        with self._lock:
+            spans = list(self._spans)
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": span["name"],
+                    "cat": span["cat"],
+                    "ph": "X",
+                    "ts": round(span["start"] * 1e6, 3),
+                    "dur": round((span["end"] - span["start"]) * 1e6, 3),
+                    "pid": pid,
+                    "tid": span["tid"],
+                    "args": {key: str(value) for key, value in span["args"].items()},
+                }
+                for span in spans
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def write(self, path):
+        """Grava o trace em `path` (substituição atômica)"""
+        with atomic_write(path) as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+# Instância usada por todo o aplicativo
+tracer = Tracer()